@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# 🏷️ **Labels and tooltips built with NumPy string ops, once per aggregate**
+# The results are cached with their aggregates (CachedBackend.derive), so reruns over the same
+# selection reuse the strings instead of formatting them value by value in Python.
+NO_DATA = "No data"
+# Separates the levels of a treemap node id. Ids are built from labels with their control characters
+# (tabs and newlines pass ingest validation) replaced by spaces, so the separator cannot appear inside a
+# level and sorts before every character that can: the subtree of a node is one contiguous id range.
+NODE_SEP = "\x1f"
+_CONTROL_CHARS = str.maketrans({chr(c): " " for c in range(0x20)})
+
+
+def format_fixed(values, decimals=2, prefix="", suffix="", missing=NO_DATA):
+    # 🔹 "-1,234.25 days", the same digits as f"{x:,.2f}": integer maths for the digits, np.char for
+    # the concatenation. Missing values (NaN, inf) are shown as `missing`.
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.empty(values.shape, dtype=object)
+    finite = np.isfinite(values)
+    scale = 10 ** decimals
+    magnitude = np.abs(np.where(finite, values, 0)) * scale
+    scaled = np.round(magnitude).astype(np.int64)
+    # Exact halves after scaling may come from a value just below or above the half (1.115 is
+    # 1.11499...): those few are rounded by Python, like the f-string does
+    for i in np.flatnonzero(magnitude % 1 == 0.5):
+        scaled.flat[i] = int(f"{abs(values.flat[i]):.{decimals}f}".replace(".", ""))
+    text = _grouped(scaled // scale)
+    if decimals:
+        fraction = np.char.zfill((scaled % scale).astype(str), decimals)
+        text = np.char.add(np.char.add(text, "."), fraction)
+    sign = np.where(np.signbit(values), "-", "")
+    text = np.char.add(np.char.add(np.char.add(sign, prefix), text), suffix)
+    return np.where(finite, text, missing).astype(object)
+
+
+def _grouped(whole):
+    # "1,234,567": the leading group as is, every following group zero-padded to three digits
+    separators = (np.char.str_len(whole.astype(str)) - 1) // 3
+    text = (whole // np.power(1000, separators)).astype(str)
+    for j in range(int(separators.max(initial=0)) - 1, -1, -1):
+        group = np.char.add(",", np.char.zfill((whole // 1000 ** j % 1000).astype(str), 3))
+        text = np.where(j < separators, np.char.add(text, group), text)
+    return text
+
+
+def format_percent(fractions, decimals=1):
+    return format_fixed(np.asarray(fractions, dtype=np.float64) * 100, decimals, suffix="%")
+
+
+def join_lines(*columns):
+    # Plotly hover text: one line per column, joined with <br>
+    text = np.asarray(columns[0], dtype=str)
+    for column in columns[1:]:
+        text = np.char.add(np.char.add(text, "<br>"), np.asarray(column, dtype=str))
+    return text.astype(object)
+
+
+def labelled(names, values):
+    # "Label: value" for every row
+    return np.char.add(f"{names}: ", np.asarray(values, dtype=str))
+
+
+def with_delay_labels(df, column="Delay", label_column="Delay Label"):
+    df[label_column] = format_fixed(df[column].to_numpy(dtype=np.float64, na_value=np.nan), suffix=" days")
+    return df
+
+
+def _id_parts(values):
+    return values.astype(str).str.translate(_CONTROL_CHARS).to_numpy(dtype=str)
+
+
+def _node_ids(level, keys):
+    # "Apparel\x1fCleats": the path of a node, built column by column
+    ids = _id_parts(level[keys[0]])
+    for key in keys[1:]:
+        ids = np.char.add(np.char.add(ids, NODE_SEP), _id_parts(level[key]))
+    return ids.astype(object)
+
+
+def treemap_nodes(df, path, value, color, weight=None, size=None, value_name="Total Delay", color_name="Average Delay"):
+    # ✅ Every node of the hierarchy at once: ids, parents, sums, weighted colours, text and hover
+    # strings. Feeding these to go.Treemap skips px.treemap's own per-level grouping and the
+    # browser-side textinfo computation. Colours are averaged with `weight` (the value when omitted)
+    # and rectangles are sized by `size` (non-negative), which defaults to the value.
+    # 📌 The share in the text and hover is of the whole table's total, not of the node on screen
+    # (plotly's "percent entry"): a node keeps the same share at every drill level.
+    levels = []
+    weight = weight or value
+    size = size or value
+    df = df.assign(_weighted=df[weight] * df[color])
+    sums = list(dict.fromkeys([value, weight, size, "_weighted"]))
+    total = df[value].sum()
+    for depth in range(1, len(path) + 1):
+        keys = path[:depth]
+        level = df.groupby(keys, observed=True, sort=True)[sums].sum().reset_index()
+        ids = _node_ids(level, keys)
+        parents = _node_ids(level, keys[:-1]) if depth > 1 else np.full(len(level), "", dtype=object)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            colors = level["_weighted"].to_numpy() / level[weight].to_numpy()
+        levels.append(pd.DataFrame({
+            "id": ids,
+            "parent": parents,
+            "label": level[keys[-1]].astype(str).to_numpy(dtype=object),
+            "level": keys[-1],
+            "depth": depth,
+            "value": level[value].to_numpy(),
+            "size": level[size].to_numpy(),
+            "color": colors,
+        }))
+    nodes = pd.concat(levels, ignore_index=True)
+
+    value_text = format_fixed(nodes["value"], 0)
+    share = format_percent(nodes["value"] / total if total else np.full(len(nodes), np.nan))
+    nodes["text"] = join_lines(nodes["label"], value_text, share)
+    nodes["hover"] = join_lines(
+        np.char.add("<b>", np.char.add(nodes["label"].to_numpy(dtype=str), "</b>")),
+        labelled(value_name, format_fixed(nodes["value"], 0, suffix=" days")),
+        labelled(color_name, format_fixed(nodes["color"], 2, suffix=" days")),
+        labelled("Share", share),
+    )
+    return nodes
@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 🧵 **Shared pool building chart payloads (figures, maps, KPIs) off the script thread**
+# Workers must not call Streamlit: they only return objects, the script thread renders them.
+# A chart job never waits on another chart job: with every worker busy waiting, the job they wait
+# for would never start. Downloads go to their own pool and are resolved before the chart is submitted.
+CHART_WORKERS = int(os.environ.get("DASHBOARD_CHART_WORKERS", "4"))
+IO_WORKERS = int(os.environ.get("DASHBOARD_IO_WORKERS", "2"))
+_executor = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="chart")
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="chart-io")
+
+
+def submit(fn, *args, **kwargs):
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def submit_io(fn, *args, **kwargs):
+    # 🔹 Downloads and file reads started early (e.g. while the CSV is parsed)
+    return _io_executor.submit(fn, *args, **kwargs)
+
+
+def render_as_completed(jobs):
+    # ✅ `jobs` maps future -> render callback, each callback fills its own placeholder
+    results = {}
+    for future in as_completed(jobs):
+        result = future.result()
+        jobs[future](result)
+        results[future] = result
+    return results
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 🧪 **Cohort comparison: 2-N cohorts of one dimension, compared in one grouped pass**
+# A cohort is a set of values of one column (e.g. Consumer vs Home Office, 2016 vs 2017).
+# Cohorts never overlap, so every row gets one cohort label (-1 when it is in none of them).
+COHORT_DIMENSIONS = ["Customer Segment", "Shipping Year", "Market", "Shipping Mode", "Type"]
+MAX_COHORTS = 6
+
+
+def cohort_values(df, dimension):
+    # "Shipping Year" is a derived column of the query backends, the page frame only has the date
+    if dimension == "Shipping Year":
+        return df["Shipping date (DateOrders)"].dt.year
+    return df[dimension]
+
+
+def cohort_lookup(values, cohorts):
+    # 🔹 {value: cohort index}; a value picked twice stays in the first cohort
+    lookup = {}
+    for i, members in enumerate(cohorts):
+        for value in members:
+            lookup.setdefault(value, i)
+    return lookup
+
+
+def cohort_labels(values, cohorts):
+    # 🔹 One factorize over the column, then one take: no isin pass per cohort
+    codes, uniques = pd.factorize(values)
+    lookup = cohort_lookup(uniques, cohorts)
+    by_code = np.array([lookup.get(value, -1) for value in uniques] + [-1], dtype=np.int64)
+    return by_code[codes]
+
+
+def show_cohort_controls(df, key):
+    # 📌 Sidebar definition of the cohorts; returns (dimension, [(name, values)]) or None when disabled
+    with st.sidebar.expander("🧪 Cohort Comparison"):
+        if not st.checkbox("Compare cohorts", key=f"{key}_cohorts_on"):
+            return None
+        dimensions = [d for d in COHORT_DIMENSIONS if d == "Shipping Year" or d in df.columns]
+        dimension = st.selectbox("Cohort dimension", dimensions, key=f"{key}_cohort_dimension")
+        values = sorted(cohort_values(df, dimension).dropna().unique().tolist())
+        count = st.number_input("Number of cohorts", min_value=2, max_value=max(2, min(MAX_COHORTS, len(values))),
+                                value=2, key=f"{key}_cohort_count")
+
+        cohorts, taken = [], set()
+        for i in range(int(count)):
+            options = [v for v in values if v not in taken]
+            default = options[:1]
+            members = st.multiselect(f"Cohort {i + 1}", options, default=default, key=f"{key}_cohort_{dimension}_{i}")
+            taken.update(members)
+            if members:
+                cohorts.append((" + ".join(str(v) for v in members), members))
+    return dimension, cohorts
+
+
+def cohort_aggregates(backend, selection, dimension, cohorts, by="Customer Segment"):
+    # ✅ One backend pass grouped by (dimension, by) returns sums and counts; cohorts are rolled up from
+    # those partial sums, so the cost does not grow with the number of cohorts
+    keys = [dimension] if dimension == by else [dimension, by]
+    parts = backend.aggregate(selection, keys, {
+        "delay_sum": ("Delay", "sum"),
+        "delay_count": ("Delay", "count"),
+        "margin_sum": ("Profit Margin", "sum"),
+        "margin_count": ("Profit Margin", "count"),
+        "total_sales": ("Sales", "sum"),
+        "orders": ("Sales", "count"),
+    })
+    lookup = cohort_lookup(parts[dimension].unique(), [members for _, members in cohorts])
+    names = np.array([name for name, _ in cohorts], dtype=object)
+    labels = parts[dimension].map(lookup)
+    parts = parts[labels.notna()].assign(Cohort=names[labels.dropna().astype(int).to_numpy()])
+
+    sums = ["delay_sum", "delay_count", "margin_sum", "margin_count", "total_sales", "orders"]
+    by_segment = parts.groupby(["Cohort", by], observed=True, sort=False)[sums].sum().reset_index()
+    totals = parts.groupby("Cohort", observed=True, sort=False)[sums].sum()
+    totals = totals.reindex([name for name in names if name in totals.index]).reset_index()
+    return _with_means(by_segment), _with_means(totals)
+
+
+def _with_means(frame):
+    frame["avg_delay_ratio"] = frame["delay_sum"] / frame["delay_count"]
+    frame["avg_profit_margin"] = frame["margin_sum"] / frame["margin_count"]
+    return frame.drop(columns=["delay_sum", "delay_count", "margin_sum", "margin_count"])
+
+
+def cohort_correlations(df, labels, cohort_names, pairs):
+    # ✅ Pearson correlation per cohort from grouped moments (n, Σx, Σy, Σx², Σy², Σxy) accumulated with
+    # bincount; values are centred on their global mean first to keep the sums well conditioned
+    n_cohorts = len(cohort_names)
+    rows = []
+    for x_col, y_col in pairs:
+        x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype=np.float64)
+        y = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype=np.float64)
+        keep = (labels >= 0) & np.isfinite(x) & np.isfinite(y)
+        group, x, y = labels[keep], x[keep], y[keep]
+        if len(x) == 0:
+            rows.append([np.nan] * n_cohorts)
+            continue
+        x = x - x.mean()
+        y = y - y.mean()
+        n = np.bincount(group, minlength=n_cohorts).astype(np.float64)
+        sx = np.bincount(group, weights=x, minlength=n_cohorts)
+        sy = np.bincount(group, weights=y, minlength=n_cohorts)
+        sxx = np.bincount(group, weights=x * x, minlength=n_cohorts)
+        syy = np.bincount(group, weights=y * y, minlength=n_cohorts)
+        sxy = np.bincount(group, weights=x * y, minlength=n_cohorts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        rows.append(r * 100)
+
+    index = pd.MultiIndex.from_tuples(pairs, names=["Shipping Measure", "Financial Metric"])
+    return pd.DataFrame(rows, index=index, columns=list(cohort_names)).reset_index()
+
+
+def add_differences(frame, value_columns, baseline):
+    # 🔹 Δ of every cohort against the baseline (first) cohort, or the first cohort with rows
+    if frame.empty:
+        return frame
+    rows = frame[frame["Cohort"] == baseline]
+    base = (rows if len(rows) else frame)[value_columns].iloc[0]
+    for col in value_columns:
+        frame[f"Δ {col}"] = frame[col] - base[col]
+    return frame
@@ -3,6 +3,8 @@ import pandas as pd
 import dashboard002
 import dashboard003
 import dashboard004
+import dashboard005
+import dashboard006
 
 # 📊 **Dashboard Title**
 st.set_page_config(page_title="Supply Chain Shipments - Delays", layout="wide")
@@ -18,7 +20,9 @@ selected_dashboard = st.sidebar.radio("Go to:",
                                       ["Home", 
                                        "Region & Mode", 
                                        "Product Categories & Delays", 
-                                       "Shipping Delays & Profitability"])
+                                       "Shipping Delays & Profitability",
+                                       "Delay Forecast",
+                                       "Risk"])
 
 # ✅ **Load Data Only Once**
 # if uploaded_file is not None:
@@ -37,5 +41,11 @@ if True:
     elif selected_dashboard == "Shipping Delays & Profitability":
         dashboard004.show_dashboard()
 
+    elif selected_dashboard == "Delay Forecast":
+        dashboard005.show_dashboard()
+
+    elif selected_dashboard == "Risk":
+        dashboard006.show_dashboard()
+
 else:
     st.warning("⚠️ Please upload a CSV file to view the visualizations.")
@@ -9,21 +9,254 @@ import branca.colormap as cm
 import json
 import requests
 import os
+import plotly.express as px
+import plotly.graph_objects as go
+import chart_pool
+from data_export import show_export_panel
+from data_validation import require_columns, show_quality_panel
+from dataset_registry import dataset_date_index, default_dataset, load_dataset
+from date_index import describe_ranges, show_date_filter
+from query_backend import filter_options, get_backend, make_selection, select_orders
+from chart_labels import NO_DATA, format_fixed, join_lines, labelled, with_delay_labels
+from delay_kernels import normalize, reusable_buffer
+from geo_index import describe_area
+
+
+# 📌 **Chart builders: each one only reads the filtered frame or queries the backend, so they run concurrently in `chart_pool`**
+GEOJSON_URL = "https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json"
+
+
+def fetch_geojson(geojson_url=GEOJSON_URL):
+    # 📂 DASHBOARD_GEOJSON_PATH points to a local copy, for offline runs
+    geojson_path = os.environ.get("DASHBOARD_GEOJSON_PATH")
+    if geojson_path:
+        with open(geojson_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return requests.get(geojson_url).json()
+
+
+def heat_points(df, norm_delay):
+    # 🔹 (lat, lon, weight) rows in a new array: `norm_delay` may be a buffer the next rerun overwrites
+    return np.column_stack([df["Latitude"].to_numpy(), df["Longitude"].to_numpy(), norm_delay])
+
+
+def build_heatmap(points, colormap_clients):
+    m = folium.Map(location=[points[:, 0].mean(), points[:, 1].mean()], zoom_start=4)
+    heat_data = points.tolist()
+    HeatMap(heat_data, gradient={"0.0": "blue", "0.5": "green", "1.0": "red"}, radius=10, blur=10, min_opacity=0.5).add_to(m)
+    colormap_clients.add_to(m)
+    return m
+
+
+def build_country_map(geojson_data, country_delay_dict, country_label_dict, colormap_countries):
+    def country_color(feature):
+        country_name = feature["properties"]["name"]
+        delay = country_delay_dict.get(country_name, None)
+        if delay is None:
+            return {"fillColor": "gray", "color": "black", "weight": 0.5, "fillOpacity": 0.3}
+        return {
+            "fillColor": colormap_countries(delay),
+            "color": "black",
+            "weight": 0.5,
+            "fillOpacity": 0.3
+        }
+
+    # Création de la carte Folium
+    m3 = folium.Map(location=[20, 0], zoom_start=2)
+
+    # Ajouter les informations de retard moyen dans le GeoJSON (libellés préformatés avec l'agrégat)
+    for feature in geojson_data["features"]:
+        feature["properties"]["delay"] = country_label_dict.get(feature["properties"]["name"], NO_DATA)
+
+    # Ajouter le GeoJSON avec le tooltip
+    folium.GeoJson(
+        geojson_data,
+        style_function=country_color,
+        tooltip=folium.GeoJsonTooltip(
+            fields=["name", "delay"],
+            aliases=["Country", "Avg Delay (days)"]
+        )
+    ).add_to(m3)
+
+    # Ajouter la légende
+    colormap_countries.add_to(m3)
+    return m3
+
+
+def query_country_delays(backend, selection, country_translation):
+    # 🔹 Sums and counts per source country, so translated names that merge stay exact averages
+    df_country = backend.aggregate(selection, ["Order Country"], {
+        "delay_sum": ("Delay", "sum"),
+        "delay_count": ("Delay", "count"),
+    })
+    country_names = df_country["Order Country"].astype(str)
+    df_country["Order Country"] = country_names.map(country_translation).fillna(country_names)
+    df_country = df_country.groupby("Order Country")[["delay_sum", "delay_count"]].sum()
+    df_country = (df_country["delay_sum"] / df_country["delay_count"]).rename("Delay").reset_index()
+    return with_delay_labels(df_country)
+
+
+def query_delay_counts(backend, selection):
+    df_counts = backend.aggregate(selection, ["Shipping Mode", "Delay Category"], {"count": ("Delay", "count")})
+    df_delay_ratio = df_counts.pivot(index="Shipping Mode", columns="Delay Category", values="count").fillna(0).astype(int)
+    # 🏷️ Hover text per bar, built once with the aggregate
+    df_hover = pd.DataFrame({
+        category: join_lines(
+            labelled("Shipping Mode", df_delay_ratio.index.astype(str)),
+            labelled("Delay Category", np.full(len(df_delay_ratio), category)),
+            labelled("Deliveries", df_delay_ratio[category].to_numpy()),
+        )
+        for category in df_delay_ratio.columns
+    }, index=df_delay_ratio.index)
+    return df_delay_ratio, df_hover
+
+
+def build_delay_count_chart(backend, selection):
+    df_delay_ratio, df_hover = backend.derive("delay_count_chart", selection, lambda: query_delay_counts(backend, selection))
+
+    # Création du graphique interactif avec Plotly
+    fig = go.Figure()
+    colors = {"Low": "blue", "Medium": "green", "High": "red"}
+
+    for category in ["Low", "Medium", "High"]:
+        if category in df_delay_ratio.columns:
+            fig.add_trace(go.Bar(
+                x=df_delay_ratio.index,
+                y=df_delay_ratio[category],
+                name=category,
+                marker=dict(
+                    color=colors[category],  # Couleur principale
+                    opacity=0.5,  # Opacité à 50%
+                    line=dict(color="black", width=1)  # Contour noir avec épaisseur 1
+                ),
+                hovertext=df_hover[category],  # Shipping Mode, catégorie et valeur, préformatés
+                hoverinfo="text"
+            ))
+
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title="Shipping Mode",
+        yaxis_title="Number of Deliveries",
+        title="Delay Count by Shipping Mode",
+        legend_title="Delay Category"
+    )
+    return fig, df_delay_ratio
+
+
+def query_delay_trend(backend, selection):
+    df_delay_trend = backend.aggregate(selection, ["Shipping Month"], {"Delay": ("Delay", "mean")})
+    df_delay_trend = df_delay_trend.set_index("Shipping Month")["Delay"]  # Moyenne des retards
+    hover = join_lines(df_delay_trend.index.astype(str), format_fixed(df_delay_trend.to_numpy(), suffix=" days"))
+    return df_delay_trend, hover
+
+
+def build_delay_trend_chart(backend, selection):
+    df_delay_trend, hover = backend.derive("delay_trend_chart", selection, lambda: query_delay_trend(backend, selection))
+
+    # Création du graphique interactif avec Plotly
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=df_delay_trend.index.astype(str),
+        y=df_delay_trend.values,
+        mode="lines+markers",
+        name="Average Delay",
+        marker=dict(size=8, color="orange", opacity=0.5),  # Points oranges semi-transparents
+        line=dict(width=2, color="orange", backoff=0.5),  # Ligne orange semi-transparente
+        hovertext=hover,  # Mois et valeur au survol, préformatés
+        hoverinfo="text"
+    ))
+
+    fig.update_layout(
+        xaxis_title="Shipping Month",
+        yaxis_title="Average Delay (days)",
+        title="Average Delay Trend Over Time",
+        legend_title="",
+        hovermode="x"  # Mode interactif optimisé
+    )
+    return fig, df_delay_trend
+
+
+def compute_delivery_kpi(backend, selection):
+    kpi = backend.aggregate(selection, [], {
+        "avg_real": ("Days for shipping (real)", "mean"),
+        "avg_scheduled": ("Days for shipment (scheduled)", "mean"),
+    }).iloc[0]
+    avg_real_shipping = kpi["avg_real"]
+    avg_scheduled_shipping = kpi["avg_scheduled"]
+
+    if avg_scheduled_shipping != 0:  # Avoid division by zero
+        delivery_ratio = avg_real_shipping / avg_scheduled_shipping
+    else:
+        delivery_ratio = None
+    return avg_real_shipping, avg_scheduled_shipping, delivery_ratio
+
+
+def format_delivery_kpi(kpi):
+    # (label, value, delta) as shown by st.metric
+    avg_real_shipping, avg_scheduled_shipping, delivery_ratio = kpi
+    return ("📦 Delivery Performance Ratio",
+            f"{avg_real_shipping:.1f} / {avg_scheduled_shipping:.1f}" if delivery_ratio is not None else "N/A",
+            f"{(delivery_ratio - 1) * -100:.1f}%" if delivery_ratio is not None else "N/A")
+
+
+def show_delivery_kpi(kpi):
+    label, value, delta = format_delivery_kpi(kpi)
+    st.metric(label=label, value=value, delta=delta)
+
+
+def delay_colormap(vmin, vmax, caption):
+    # 🎨 Blue (early) -> green (on time) -> red (late)
+    return cm.LinearColormap(
+        colors=["blue", "green", "red"],
+        index=[vmin, 0, vmax],
+        vmin=vmin, vmax=vmax,
+        caption=caption
+    )
+
+
+def load_country_translation(translation_file="country_translation.json"):
+    # None when the file is missing
+    if not os.path.exists(translation_file):
+        return None
+    with open(translation_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# 🗺️ **Map drill-down: the heatmap view/click or a clicked country filters the bar chart, trend and KPI**
+# Coordinates the maps need: optional in the dataset, nulls are masked on this page only
+MAP_COLUMNS = ["Latitude", "Longitude"]
+MAP_FILTERS = ["Off", "Heatmap visible area", "Heatmap click", "Country click"]
+
+
+def map_drilldown(map_filter, heatmap_state, country_state, radius_km, country_translation):
+    # Returns (area, country names) read from the last state reported by st_folium
+    heatmap_state = heatmap_state or {}
+    country_state = country_state or {}
+    if map_filter == "Heatmap visible area" and heatmap_state.get("bounds"):
+        south_west = heatmap_state["bounds"].get("_southWest") or {}
+        north_east = heatmap_state["bounds"].get("_northEast") or {}
+        if south_west.get("lat") is not None and north_east.get("lat") is not None:
+            return {"bbox": [south_west["lat"], south_west["lng"], north_east["lat"], north_east["lng"]]}, None
+    if map_filter == "Heatmap click" and heatmap_state.get("last_clicked"):
+        clicked = heatmap_state["last_clicked"]
+        return {"center": [clicked["lat"], clicked["lng"]], "radius_km": radius_km}, None
+    if map_filter == "Country click" and country_state.get("last_active_drawing"):
+        country_name = country_state["last_active_drawing"]["properties"]["name"]
+        # 🔹 Orders keep the source (Spanish) names, so every name translating to the clicked one is selected
+        return None, [source for source, name in country_translation.items() if name == country_name] + [country_name]
+    return None, None
+
 
 def show_dashboard():
     # 📂 **Loading the JSON file containing country translations**
-    translation_file = "country_translation.json"
-
-    if os.path.exists(translation_file):
-        with open(translation_file, "r", encoding="utf-8") as f:
-            country_translation = json.load(f)
-    else:
+    country_translation = load_country_translation()
+    if country_translation is None:
         st.error("⚠️ File country_translation.json not found! Make sure it is in the script folder.")
         st.stop()
 
-    # 📌 **Loading country borders via GeoJSON**
-    geojson_url = "https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json"
-    geojson_data = requests.get(geojson_url).json()
+    # 📌 **Loading country borders via GeoJSON (downloaded in the background while the CSV is parsed)**
+    geojson_future = chart_pool.submit_io(fetch_geojson, GEOJSON_URL)
 
     # 📊 **Dashboard Configuration**
     # st.set_page_config(page_title="Dashboard - Delivery Delays", layout="wide")
@@ -31,87 +264,96 @@ def show_dashboard():
     # 📂 **Uploading CSV file**
     st.sidebar.title("📂 Upload Data")
     uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file, encoding='latin-1')
-
-        # 📌 **Convert "Shipping date (DateOrders)" to datetime**
-        df["Shipping date (DateOrders)"] = pd.to_datetime(df["shipping date (DateOrders)"], errors='coerce')
-
-        # 📌 **Add year filter**
-        st.sidebar.markdown("### 📆 Filter by Year")
-        available_years = df["Shipping date (DateOrders)"].dt.year.dropna().unique()
-        selected_years = st.sidebar.multiselect("Select Year", available_years, default=available_years)
-        if selected_years:
-            df = df[df["Shipping date (DateOrders)"].dt.year.isin(selected_years)]
-
-        # 📌 **Adding dynamic filters**
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+        require_columns(df, MAP_COLUMNS + ["Order Country", "Market"])
+        backend = get_backend(df)
+
+        # 📌 **Add period filter** (years, a quarter, a custom range or the last N days)
+        st.sidebar.markdown("### 📆 Filter by Period")
+        # Rows are sorted by shipping date: the period is one binary-searched slice, not a year mask
+        date_index = dataset_date_index(df.attrs["dataset_id"])
+        selected_dates = show_date_filter(date_index, "dashboard002")
+        if selected_dates:
+            st.sidebar.caption(f"📆 {describe_ranges(selected_dates)}")
+
+        # 📌 **Adding dynamic filters** (recorded in `selected_columns`, applied by the query backend)
         st.sidebar.markdown("### 🎯 Available Filters")
 
 
         # 🔹 **Drilldown to Department**
-        column_names = list(df.columns)
+        selected_columns = {}
         filters = ["Type","Category Name","Department Name","Market","Order Region","Product Name","Shipping Mode",]
         for col in filters:
-            departments = df[col].unique()
+            departments = filter_options(backend, make_selection(columns=selected_columns, dates=selected_dates), col)
             if len(departments)<15:
                 selected_departments = st.sidebar.multiselect(col, departments, default=departments)
 
-                if selected_departments:
-                    df = df[df[col].isin(selected_departments)]
-
-        # 📌 **Converting geographic coordinates**
-        df["Latitude"] = pd.to_numeric(df["Latitude"], errors="coerce")
-        df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
-        df = df.dropna(subset=["Latitude", "Longitude"])
-
-        # ⏳ **Calculating delivery delay**
-        df["Delay"] = df["Days for shipping (real)"] - df["Days for shipment (scheduled)"]
-
-        # 📌 **Categorizing delay levels**
-        df["Delay Category"] = pd.cut(df["Delay"], bins=[-np.inf, -1, 1, np.inf], labels=["Low", "Medium", "High"])
+                # Every value kept: nothing to filter on this column
+                if selected_departments and len(selected_departments) < len(departments):
+                    selected_columns[col] = selected_departments
+
+        # 📌 Latitude/Longitude are numeric and in range since ingest; rows where they were missing or
+        # invalid (cleared by the validation) are kept in the dataset and only left out of this page
+        map_selection = make_selection(columns=selected_columns, dates=selected_dates, not_null=MAP_COLUMNS)
+        df = select_orders(df, map_selection)
+
+        # 🗺️ **Map drill-down** (the maps themselves always show the whole selection)
+        st.sidebar.markdown("### 🗺️ Map Drill-down")
+        map_filter = st.sidebar.selectbox("Filter charts by", MAP_FILTERS, key="dashboard002_map_filter")
+        radius_km = st.sidebar.slider("Click radius (km)", 10, 1000, 100, key="dashboard002_radius") if map_filter == "Heatmap click" else None
+        area, clicked_countries = map_drilldown(
+            map_filter,
+            st.session_state.get("dashboard002_heatmap"),
+            st.session_state.get("dashboard002_country_map"),
+            radius_km,
+            country_translation,
+        )
+        if area is not None or clicked_countries:
+            st.sidebar.caption(f"📍 Charts limited to: {clicked_countries[-1] if clicked_countries else describe_area(area)}")
+        selection = make_selection(
+            columns=dict(selected_columns, **({"Order Country": clicked_countries} if clicked_countries else {})),
+            not_null=MAP_COLUMNS,
+            area=area,
+            dates=selected_dates,
+        )
 
         # 📌 **Client delivery delays (Delivery Point Map)**
-        abs_max_clients = df["Delay"].max()
-        abs_min_clients = df["Delay"].min()
-        df["norm_delay"] = (
-            (df["Delay"] - abs_min_clients) / (abs_max_clients - abs_min_clients) if abs_max_clients != abs_min_clients else 0.5
-        )
+        # "Delay" comes from ingest, the normalized view is written into this session's reusable buffer
+        abs_max_clients = float(df["Delay"].max())
+        abs_min_clients = float(df["Delay"].min())
+        norm_delay = normalize(df["Delay"].to_numpy(), out=reusable_buffer(st.session_state, "dashboard002_norm_delay", len(df)))
 
         # 📌 **Average delays by country**
-        df["Order Country"] = df["Order Country"].map(country_translation).fillna(df["Order Country"])
-        df_country_avg = df.groupby("Order Country")["Delay"].mean().reset_index()
+        df_country_avg = backend.derive(
+            "country_delays", map_selection,
+            lambda: query_country_delays(backend, map_selection, country_translation), country_translation,
+        )
         abs_max_countries = df_country_avg["Delay"].max()
         abs_min_countries = df_country_avg["Delay"].min()
         country_delay_dict = dict(zip(df_country_avg["Order Country"], df_country_avg["Delay"]))
+        country_label_dict = dict(zip(df_country_avg["Order Country"], df_country_avg["Delay Label"]))
 
         # 🎨 **Defining colormaps**
-        colormap_clients = cm.LinearColormap(
-            colors=["blue", "green", "red"],
-            index=[abs_min_clients, 0, abs_max_clients],
-            vmin=abs_min_clients, vmax=abs_max_clients,
-            caption="⏳ Delivery Delay (days)"
-        )
-
-        colormap_countries = cm.LinearColormap(
-            colors=["blue", "green", "red"],
-            index=[abs_min_countries, 0, abs_max_countries],
-            vmin=abs_min_countries, vmax=abs_max_countries,
-            caption="⏳ Average Delivery Delay (days)"
+        colormap_clients = delay_colormap(abs_min_clients, abs_max_clients, "⏳ Delivery Delay (days)")
+        colormap_countries = delay_colormap(abs_min_countries, abs_max_countries, "⏳ Average Delivery Delay (days)")
+
+        # 🧵 **Start every chart at once, each placeholder is filled as soon as its chart is ready**
+        # The reusable buffer stays on the script thread: the pool job gets its own stacked points
+        heatmap_job = chart_pool.submit(build_heatmap, heat_points(df, norm_delay), colormap_clients)
+        delay_count_job = chart_pool.submit(build_delay_count_chart, backend, selection)
+        delay_trend_job = chart_pool.submit(build_delay_trend_chart, backend, selection)
+        kpi_job = chart_pool.submit(compute_delivery_kpi, backend, selection)
+        # 🔹 The GeoJSON is awaited here, not inside a chart worker: the other charts are already running
+        country_map_job = chart_pool.submit(
+            build_country_map, geojson_future.result(), country_delay_dict, country_label_dict, colormap_countries
         )
 
-        def country_color(feature):
-            country_name = feature["properties"]["name"]
-            delay = country_delay_dict.get(country_name, None)
-            if delay is None:
-                return {"fillColor": "gray", "color": "black", "weight": 0.5, "fillOpacity": 0.3}
-            return {
-                "fillColor": colormap_countries(delay),
-                "color": "black",
-                "weight": 0.5,
-                "fillOpacity": 0.3
-            }
-
         st.markdown("---")
         st.title("📊 Delivery Delays")
         st.markdown("---")
@@ -120,11 +362,7 @@ def show_dashboard():
 
         with col1:
             st.markdown("### 🗺️ Heatmap of Delivery Delays (Inbound Logistics)")
-            m = folium.Map(location=[df["Latitude"].mean(), df["Longitude"].mean()], zoom_start=4)
-            heat_data = df[["Latitude", "Longitude", "norm_delay"]].values.tolist()
-            HeatMap(heat_data, gradient={"0.0": "blue", "0.5": "green", "1.0": "red"}, radius=10, blur=10, min_opacity=0.5).add_to(m)
-            colormap_clients.add_to(m)
-            st_folium(m, width="100%", height=500)
+            heatmap_placeholder = st.empty()
 
         # with col2:
         #     st.markdown("### 🌍 Average Delivery Delays by Country")
@@ -139,36 +377,7 @@ def show_dashboard():
 
         with col2:
             st.markdown("### 🌍 Average Delivery Delays by Country (Outbound Logistics)")
-            
-            # Création de la carte Folium
-            m3 = folium.Map(location=[20, 0], zoom_start=2)
-
-            # Ajouter les informations de retard moyen arrondi dans le GeoJSON
-            for feature in geojson_data["features"]:
-                country_name = feature["properties"]["name"]
-                delay = country_delay_dict.get(country_name, None)
-
-                # Vérifier si on a une valeur de retard valide, sinon afficher "No data"
-                if delay is not None:
-                    feature["properties"]["delay"] = f"{round(delay, 2)} days"
-                else:
-                    feature["properties"]["delay"] = "No data"
-
-            # Ajouter le GeoJSON avec le tooltip
-            folium.GeoJson(
-                geojson_data,
-                style_function=country_color,
-                tooltip=folium.GeoJsonTooltip(
-                    fields=["name", "delay"],
-                    aliases=["Country", "Avg Delay (days)"]
-                )
-            ).add_to(m3)
-
-            # Ajouter la légende
-            colormap_countries.add_to(m3)
-
-            # Afficher la carte avec Streamlit
-            st_folium(m3, width="100%", height=500)
+            country_map_placeholder = st.empty()
 
         st.markdown("---")
 
@@ -210,75 +419,18 @@ def show_dashboard():
 
         # st.title("📊 Dashboard - Delivery Delays")
 
-        import plotly.express as px
-        import plotly.graph_objects as go
-
         ## 📊 **2️⃣ Stacked Bar Chart - Delay Count by Shipping Mode | Line Chart - Delay Trend Over Time**
         col5, col6 = st.columns(2)
 
         # 🔹 Stacked Bar Chart (Delay Count by Shipping Mode)
         with col5:
             st.markdown("### 📊 Delay Count by Shipping Mode")
-
-            df_delay_ratio = df.groupby(["Shipping Mode", "Delay Category"]).size().unstack(fill_value=0)
-
-            # Création du graphique interactif avec Plotly
-            fig = go.Figure()
-            colors = {"Low": "blue", "Medium": "green", "High": "red"}
-
-            for category in ["Low", "Medium", "High"]:
-                if category in df_delay_ratio.columns:
-                    fig.add_trace(go.Bar(
-                        x=df_delay_ratio.index,
-                        y=df_delay_ratio[category],
-                        name=category,
-                        marker=dict(
-                            color=colors[category],  # Couleur principale
-                            opacity=0.5,  # Opacité à 50%
-                            line=dict(color="black", width=1)  # Contour noir avec épaisseur 1
-                        ),
-                        hoverinfo="x+y"  # Affiche le Shipping Mode et la valeur au survol
-                    ))
-
-            fig.update_layout(
-                barmode="stack",
-                xaxis_title="Shipping Mode",
-                yaxis_title="Number of Deliveries",
-                title="Delay Count by Shipping Mode",
-                legend_title="Delay Category"
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            delay_count_placeholder = st.empty()
 
         # 🔹 Line Chart (Average Delay Trend Over Time)
         with col6:
             st.markdown("### 📈 Average Delay Trend Over Time")
-
-            df["Shipping Month"] = df["Shipping date (DateOrders)"].dt.to_period("M")
-            df_delay_trend = df.groupby(["Shipping Month"])["Delay"].mean()  # Moyenne des retards
-
-            # Création du graphique interactif avec Plotly
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter(
-                x=df_delay_trend.index.astype(str),
-                y=df_delay_trend.values,
-                mode="lines+markers",
-                name="Average Delay",
-                marker=dict(size=8, color="orange", opacity=0.5),  # Points oranges semi-transparents
-                line=dict(width=2, color="orange", backoff=0.5),  # Ligne orange semi-transparente
-                hoverinfo="x+y"  # Affiche le mois et la valeur au survol
-            ))
-
-            fig.update_layout(
-                xaxis_title="Shipping Month",
-                yaxis_title="Average Delay (days)",
-                title="Average Delay Trend Over Time",
-                legend_title="",
-                hovermode="x"  # Mode interactif optimisé
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            delay_trend_placeholder = st.empty()
 
         st.markdown("---")
 
@@ -308,22 +460,11 @@ def show_dashboard():
         st.markdown("---")
         st.markdown("### 📊 KPI - Delivery Performance Ratio")
 
-        # Calculate KPI
-        avg_real_shipping = df["Days for shipping (real)"].mean()
-        avg_scheduled_shipping = df["Days for shipment (scheduled)"].mean()
-
-        if avg_scheduled_shipping != 0:  # Avoid division by zero
-            delivery_ratio = avg_real_shipping / avg_scheduled_shipping
-        else:
-            delivery_ratio = None
-
         # Display KPI as a fraction
         col_kpi1, col_kpi2 = st.columns(2)
 
         with col_kpi1:
-            st.metric(label="📦 Delivery Performance Ratio", 
-                      value=f"{avg_real_shipping:.1f} / {avg_scheduled_shipping:.1f}" if delivery_ratio is not None else "N/A", 
-                      delta=f"{(delivery_ratio - 1) * -100:.1f}%" if delivery_ratio is not None else "N/A")
+            kpi_placeholder = st.empty()
 
         with col_kpi2:
             st.markdown("""
@@ -336,6 +477,44 @@ def show_dashboard():
               - If the value is **≈ 1/1**, then delivery times are well respected.
             """)
 
+        # ✅ **Render each chart in its placeholder in completion order**
+        # 🔹 Maps only send their state back (and trigger a rerun) when a drill-down needs it
+        heatmap_returns = {"Heatmap visible area": ["bounds"], "Heatmap click": ["last_clicked"]}.get(map_filter, [])
+        country_map_returns = ["last_active_drawing"] if map_filter == "Country click" else []
+
+        def show_map(placeholder, key, returned_objects):
+            def render(m):
+                with placeholder.container():
+                    st_folium(m, width="100%", height=500, key=key, returned_objects=returned_objects)
+            return render
+
+        def show_figure(placeholder):
+            def render(result):
+                placeholder.plotly_chart(result[0], use_container_width=True)
+            return render
+
+        def show_kpi(kpi):
+            with kpi_placeholder.container():
+                show_delivery_kpi(kpi)
+
+        chart_pool.render_as_completed({
+            heatmap_job: show_map(heatmap_placeholder, "dashboard002_heatmap", heatmap_returns),
+            country_map_job: show_map(country_map_placeholder, "dashboard002_country_map", country_map_returns),
+            delay_count_job: show_figure(delay_count_placeholder),
+            delay_trend_job: show_figure(delay_trend_placeholder),
+            kpi_job: show_kpi,
+        })
+        _, df_delay_ratio = delay_count_job.result()
+        _, df_delay_trend = delay_trend_job.result()
+
+        # 📤 **Export of the computed aggregates**
+        show_export_panel({
+            "Filtered Orders": df,
+            "Average Delay by Country": df_country_avg,
+            "Delay Count by Shipping Mode": df_delay_ratio.reset_index().rename_axis(columns=None),
+            "Delay Trend": df_delay_trend.reset_index().astype({"Shipping Month": str}),
+        }, key="dashboard002")
+
         st.markdown("---")
     else:
         st.warning("⚠️ Please upload a CSV file to view the visualizations.")
@@ -3,6 +3,37 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from chart_labels import format_percent
+from data_export import show_export_panel
+from data_validation import show_quality_panel
+from dataset_registry import dataset_date_index, default_dataset, load_dataset
+from delay_hierarchy import hierarchy_levels, show_hierarchy_treemap
+from date_index import describe_ranges, show_date_filter
+from query_backend import filter_options, get_backend, make_selection, select_orders
+
+
+# 📌 **Chart builders shared with the snapshot reports (snapshot_reports.py)**
+def build_top_products_chart(backend, selection):
+    top_5_delayed_products = backend.aggregate(selection, ["Product Name"], {"Delay": ("Delay", "mean")}).nlargest(5, "Delay")
+
+    # Création du Pie Chart avec contours noirs et police agrandie
+    fig = go.Figure(data=[go.Pie(
+        labels=top_5_delayed_products["Product Name"],
+        values=top_5_delayed_products["Delay"],
+        marker=dict(line=dict(color="black", width=1)),  # Contours noirs
+        text=format_percent(top_5_delayed_products["Delay"] / top_5_delayed_products["Delay"].sum()),
+        textinfo="text",  # Pourcentages préformatés
+        textfont=dict(size=12),  # Agrandissement des labels
+        pull=[0.02, 0.02, 0.02, 0.02, 0.02]  # Met en avant le premier élément légèrement
+    )])
+
+    fig.update_layout(
+        showlegend=True,
+        legend_title="<b>Product Name</b>",
+        legend=dict(font=dict(size=16)),  # Agrandir la police de la légende
+    )
+    return fig, top_5_delayed_products
+
 
 def show_dashboard():
     # 📊 Dashboard Configuration
@@ -11,40 +42,45 @@ def show_dashboard():
     # 📂 Uploading CSV file
     st.sidebar.title("📂 Upload Data")
     uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file, encoding='latin-1')
-
-        # 📌 Convert "Shipping date (DateOrders)" to datetime
-        df["Shipping date (DateOrders)"] = pd.to_datetime(df["shipping date (DateOrders)"], errors='coerce')
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+        backend = get_backend(df)
 
         # 📌 Filters
         st.sidebar.markdown("### 📆 Filters")
 
-        # 🔹 Filter by Year
-        available_years = df["Shipping date (DateOrders)"].dt.year.dropna().unique()
-        selected_years = st.sidebar.multiselect("Select Year", available_years, default=available_years)
-
-        if selected_years:
-            df = df[df["Shipping date (DateOrders)"].dt.year.isin(selected_years)]
+        # 🔹 Filter by Period (years, a quarter, a custom range or the last N days)
+        # Rows are sorted by shipping date: the period is one binary-searched slice, not a year mask
+        date_index = dataset_date_index(df.attrs["dataset_id"])
+        selected_dates = show_date_filter(date_index, "dashboard003")
+        if selected_dates:
+            st.sidebar.caption(f"📆 {describe_ranges(selected_dates)}")
 
         # 🔹 Drilldown to Department
         st.sidebar.markdown("### 🔍 Drilldown to Product Type")
-        departments = df["Department Name"].unique()
+        departments = filter_options(backend, make_selection(dates=selected_dates), "Department Name")
         selected_departments = st.sidebar.multiselect("Select Department", departments, default=departments)
 
-        if selected_departments:
-            df = df[df["Department Name"].isin(selected_departments)]
+        # 🔹 Optional fourth treemap level
+        by_region = st.sidebar.checkbox("Split products by Order Region", value=False)
 
-        # ⏳ Calculating delivery delay
-        df["Delay"] = df["Days for shipping (real)"] - df["Days for shipment (scheduled)"]
+        # 📌 Filters applied once by the query backend, the exported rows come from the same selection
+        filtered = selected_departments and len(selected_departments) < len(departments)
+        selection = make_selection(
+            columns={"Department Name": selected_departments} if filtered else None, dates=selected_dates,
+        )
+        df = select_orders(df, selection)
 
         # 📌 Aggregate total delay per Department and Category
-        df_agg = df.groupby(["Department Name", "Category Name"]).agg(
-            total_delay=("Delay", "sum"),  # Total delay for each category
-            avg_delay=("Delay", "mean")  # Average delay for color scale
-        ).reset_index()
-        print(df_agg)
+        df_agg = backend.aggregate(selection, ["Department Name", "Category Name"], {
+            "total_delay": ("Delay", "sum"),  # Total delay for each category
+            "avg_delay": ("Delay", "mean")  # Average delay for color scale
+        })
 
         # 📌 Normalize Delay Values for Color Scale
         min_delay = df_agg["avg_delay"].min()
@@ -60,34 +96,11 @@ def show_dashboard():
         st.markdown("---")
 
         # 📊 **Enhanced Treemap - Delay Analysis**
-        st.markdown("### 🌳 Improved Delay Ratio by Department & Category")
-
-        fig = px.treemap(
-            df_agg,
-            path=["Department Name", "Category Name"],  # 🔹 Hierarchy: Department -> Category
-            values="total_delay",  # 🔹 Size based on total accumulated delay
-            color="avg_delay",  # 🔹 Color based on average delay
-            color_continuous_scale="RdBu_r",  # 🔹 Aesthetic color scale (Red-Blue reverse)
-            labels={"avg_delay": "Average Delay (days)", "total_delay": "Total Delay (days)"},
-            title="📊 Delay Ratio by Department & Category",
-        )
+        st.markdown("### 🌳 Improved Delay Ratio by Department, Category & Product")
 
-        # 🔹 **Customizations for better visualization**
-        fig.update_traces(
-            marker=dict(line=dict(width=1.5, color="black")),  # 🔹 Add black borders
-            textinfo="label+value+percent entry"  # 🔹 Show category name + total delay + percentage
-        )
-
-        # 🔹 **Update layout for better readability**
-        fig.update_layout(
-            margin=dict(t=40, l=10, r=10, b=10),  # Reduce white spaces
-            title_x=0.5,  # Center the title
-            coloraxis_colorbar=dict(
-                title="Average Delay (days)",
-                tickvals=[df_agg["avg_delay"].min(), df_agg["avg_delay"].max()],
-                ticktext=["Low", "High"]
-            )
-        )
+        # 🔹 Precomputed hierarchy, drilled into one level per click (only the visible levels are sent)
+        levels = hierarchy_levels(by_region)
+        show_hierarchy_treemap(backend, selection, levels, key="dashboard003_treemap")
 
         # st.plotly_chart(fig, use_container_width=True)
 
@@ -104,35 +117,24 @@ def show_dashboard():
         #     template="plotly_white",  # ✅ Force un thème blanc
         # )
 
-        # 🟢 Afficher le graphique dans Streamlit
-        st.plotly_chart(fig, use_container_width=True)
         st.markdown("---")
 
         st.markdown("### 🏆 Top 5 Products with Highest Delays")
         col5, col6 = st.columns(2)
         with col5:
 
-            top_5_delayed_products = df.groupby("Product Name")["Delay"].mean().nlargest(5).reset_index()
-
-            # Création du Pie Chart avec contours noirs et police agrandie
-            fig = go.Figure(data=[go.Pie(
-                labels=top_5_delayed_products["Product Name"],
-                values=top_5_delayed_products["Delay"],
-                marker=dict(line=dict(color="black", width=1)),  # Contours noirs
-                textinfo="percent",
-                textfont=dict(size=12),  # Agrandissement des labels
-                pull=[0.02, 0.02, 0.02, 0.02, 0.02]  # Met en avant le premier élément légèrement
-            )])
-
-            fig.update_layout(
-                showlegend=True,
-                legend_title="<b>Product Name</b>",
-                legend=dict(font=dict(size=16)),  # Agrandir la police de la légende
-            )
+            fig, top_5_delayed_products = build_top_products_chart(backend, selection)
 
             # Affichage du graphique dans Streamlit
             st.plotly_chart(fig, use_container_width=True)
 
+        # 📤 Export of the computed aggregates
+        show_export_panel({
+            "Filtered Orders": df,
+            "Delay by Department & Category": df_agg,
+            "Top 5 Delayed Products": top_5_delayed_products,
+        }, key="dashboard003")
+
         st.markdown("---")
 
         with col6:
@@ -2,6 +2,142 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
+from cohort_compare import (add_differences, cohort_aggregates, cohort_correlations, cohort_labels, cohort_values,
+                            show_cohort_controls)
+from data_export import show_export_panel
+from data_validation import require_columns, show_quality_panel
+from dataset_registry import dataset_date_index, default_dataset, load_dataset
+from date_index import describe_ranges, show_date_filter
+from query_backend import filter_options, get_backend, make_selection, select_orders
+
+
+# Columns the profitability figures divide or sum: rows missing one of them are left out of the page
+PROFIT_COLUMNS = ["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales"]
+
+# 📌 **Chart builders and KPI shared with the snapshot reports (snapshot_reports.py)**
+SHIPPING_MEASURES = {"Days for shipping (real)", "Delay Ratio"}
+FINANCIAL_METRICS = {"Benefit per order", "Sales per customer", "Order Item Profit Ratio",
+                     "Sales", "Order Item Total", "Order Profit Per Order"}
+
+
+def build_bubble_chart(backend, selection):
+    # ✅ **Créer un DataFrame agrégé pour la Bubble Chart**
+    df_bubble = backend.aggregate(selection, ["Customer Segment"], {
+        "avg_delay_ratio": ("Delay", "mean"),
+        "avg_profit_margin": ("Profit Margin", "mean"),
+        "total_sales": ("Sales", "sum")
+    })
+
+    # ✅ **Vérifier s'il y a des valeurs NaN ou vides**
+    df_bubble = df_bubble.dropna(subset=["avg_delay_ratio", "avg_profit_margin", "total_sales"])
+    if df_bubble.empty:
+        return None, df_bubble
+
+    # ✅ **Normalize bubble size** (éviter qu'elles soient trop petites)
+    df_bubble["bubble_size"] = ((df_bubble["total_sales"] / df_bubble["total_sales"].max()) * 100 + 10)*3  # +10 pour éviter 0
+
+    fig = px.scatter(df_bubble,
+                     x="avg_delay_ratio",
+                     y="avg_profit_margin",
+                     size=df_bubble["bubble_size"],
+                     color="Customer Segment",
+                     hover_data=["Customer Segment", "avg_delay_ratio", "avg_profit_margin", "total_sales"],
+                     labels={"avg_delay_ratio": "Delay Ratio", "avg_profit_margin": "Profit Margin"},
+                     size_max=100
+                     # title="Profit Margin vs. Delay Ratio by Customer Segment"
+                     )
+
+    # ✅ **Format Y-Axis as Percentage**
+    fig.update_layout(
+        yaxis=dict(tickformat=".2f", title="Profit Margin (%)"),
+        xaxis=dict(tickformat=".4f"),
+        legend_title="Customer Segment"
+    )
+    fig.update_traces(marker=dict(opacity=.75, line=dict(width=1, color="black")))  # Add transparency + outline
+    return fig, df_bubble
+
+
+def build_segment_type_chart(backend, selection):
+    df_grouped = backend.aggregate(selection, ["Customer Segment", "Type"], {
+        "avg_delay": ("Delay", "mean")
+    })
+
+    # 📊 **Create a grouped bar chart**
+    fig = px.bar(
+        df_grouped,
+        x="Customer Segment",
+        y="avg_delay",
+        color="Type",
+        barmode="group",  # Group bars next to each other
+        labels={"avg_delay": "Average Delay (days)", "Customer Segment": "Customer Segment"},
+        # title="📊 Average Delay by Customer Segment & Payment Type",
+    )
+
+
+    # ✅ **Add black border around bars**
+    fig.update_traces(marker=dict(
+        line=dict(color="black", width=1.5)  # Black border with width 1.5
+    ))
+
+    # ✅ **Improve design**
+    fig.update_layout(
+        # yaxis=dict(tickformat=".2f", title="Average Delay (days)"),
+        yaxis=dict(tickformat=".2f", title="Average Delay (days)", range=[df_grouped["avg_delay"].min() - 0.05, df_grouped["avg_delay"].max() + 0.05]),
+        xaxis=dict(title="Customer Segment"),
+        legend_title="Type",
+    )
+    return fig, df_grouped
+
+
+def compute_correlation_kpi(df):
+    # ✅ Ensure the required columns exist in the dataset (None when they do not)
+    available_g1 = [col for col in SHIPPING_MEASURES if col in df.columns]
+    available_g2 = [col for col in FINANCIAL_METRICS if col in df.columns]
+    if not (available_g1 and available_g2):
+        return None
+
+    # 📌 Compute all correlations between g1 and g2
+    correlation_results = {}
+    for col1 in available_g1:
+        for col2 in available_g2:
+            correlation_value = df[col1].corr(df[col2])*100
+            correlation_results[(col1, col2)] = abs(correlation_value)  # Store absolute value for comparison
+
+    # 📌 Find the strongest correlation (highest absolute value)
+    strongest_pair = max(correlation_results, key=correlation_results.get)
+    df_correlations = pd.DataFrame(
+        [(col1, col2, value) for (col1, col2), value in correlation_results.items()],
+        columns=["Shipping Measure", "Financial Metric", "Absolute Correlation (%)"]
+    )
+    strongest_value = df[strongest_pair[0]].corr(df[strongest_pair[1]])*100
+
+    # 📌 Compute average financial metric for min/max shipping delay
+    min_delay_value = df[strongest_pair[0]].min()
+    max_delay_value = df[strongest_pair[0]].max()
+
+    avg_financial_min_delay = df[df[strongest_pair[0]] == min_delay_value][strongest_pair[1]].mean()
+    avg_financial_max_delay = df[df[strongest_pair[0]] == max_delay_value][strongest_pair[1]].mean()
+    return {
+        "pairs": (available_g1, available_g2),
+        "table": df_correlations,
+        "strongest_pair": strongest_pair,
+        "strongest_value": strongest_value,
+        "min_delay_value": min_delay_value,
+        "max_delay_value": max_delay_value,
+        "avg_financial_min_delay": avg_financial_min_delay,
+        "avg_financial_max_delay": avg_financial_max_delay,
+    }
+
+
+def format_correlation_kpi(kpi):
+    # (label, value, delta) as shown by st.metric
+    strongest_value = kpi["strongest_value"]
+    avg_financial_min_delay = kpi["avg_financial_min_delay"]
+    avg_financial_max_delay = kpi["avg_financial_max_delay"]
+    return (f"**📈 Correlation Value:** `{strongest_value:.2f}`",
+            f"{avg_financial_min_delay:.2f} / {avg_financial_max_delay:.2f}" if strongest_value is not None else "N/A",
+            f"{(avg_financial_max_delay-avg_financial_min_delay)/avg_financial_min_delay*100:.2f}%" if strongest_value is not None else "N/A")
+
 
 def show_dashboard():
     # 📊 **Dashboard Title**
@@ -11,88 +147,65 @@ def show_dashboard():
     # 📂 **Upload CSV File**
     st.sidebar.title("📂 Upload Data")
     uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file, encoding='latin-1')
-
-        # 📌 **Convert "Shipping date (DateOrders)" to datetime**
-        df["Shipping date (DateOrders)"] = pd.to_datetime(df["shipping date (DateOrders)"], errors='coerce')
-
-        # 📌 **Add year filter**
-        st.sidebar.markdown("### 📆 Filter by Year")
-        available_years = df["Shipping date (DateOrders)"].dt.year.dropna().unique()
-        selected_years = st.sidebar.multiselect("Select Year", available_years, default=available_years)
-        if selected_years:
-            df = df[df["Shipping date (DateOrders)"].dt.year.isin(selected_years)]
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+        # 📌 **Vérification des colonnes nécessaires** (optional at ingest, needed by this page)
+        require_columns(df, PROFIT_COLUMNS + ["Customer Segment", "Market"])
+        backend = get_backend(df)
+
+        # 📌 **Add period filter** (years, a quarter, a custom range or the last N days)
+        st.sidebar.markdown("### 📆 Filter by Period")
+        # Rows are sorted by shipping date: the period is one binary-searched slice, not a year mask
+        date_index = dataset_date_index(df.attrs["dataset_id"])
+        selected_dates = show_date_filter(date_index, "dashboard004")
+        if selected_dates:
+            st.sidebar.caption(f"📆 {describe_ranges(selected_dates)}")
 
         # 📌 **Adding dynamic filters**
         st.sidebar.markdown("### 🎯 Available Filters")
 
 
-        # 🔹 **Drilldown to Department**
-        column_names = list(df.columns)
+        # 🔹 **Drilldown to Department** (recorded in `selected_columns`, applied by the query backend)
+        selected_columns = {}
         filters = ["Type","Category Name","Department Name","Market","Order Region","Product Name","Shipping Mode",]
         for col in filters:
-            departments = df[col].unique()
+            departments = filter_options(backend, make_selection(columns=selected_columns, dates=selected_dates), col)
             if len(departments)<15:
                 selected_departments = st.sidebar.multiselect(col, departments, default=departments)
 
-                if selected_departments:
-                    df = df[df[col].isin(selected_departments)]
+                # Every value kept: nothing to filter on this column
+                if selected_departments and len(selected_departments) < len(departments):
+                    selected_columns[col] = selected_departments
 
-        # 📌 **Vérification des colonnes nécessaires**
-        required_columns = ["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales", "Customer Segment"]
-        if not all(col in df.columns for col in required_columns):
-            st.error("Missing required columns in the dataset!")
-            st.stop()
+        # ✅ **Types vérifiés une seule fois à l'ingestion** (data_validation); profit and sales may be
+        # missing there, those rows are left out of this page only
+        # Exclure les valeurs nulles ou 0 pour éviter division par zéro (positive scheduled days)
+        selection = make_selection(
+            columns=selected_columns, dates=selected_dates,
+            not_null=PROFIT_COLUMNS,
+            positive=["Days for shipment (scheduled)"],
+        )
+        df = select_orders(df, selection)
+        df["Delay Ratio"] = df["Delay"]  # Delay and Profit Margin are computed once at ingest
 
-        # ✅ **Éviter les divisions par zéro**
-        df = df.replace([np.inf, -np.inf], np.nan)  # Remplace les infinis par NaN
-        df = df.dropna(subset=["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales"])
+        # 🧪 **Cohort comparison (optional)**
+        cohort_spec = show_cohort_controls(df, key="dashboard004")
 
-        # ✅ **Calculer les ratios uniquement pour les valeurs valides**
-        df = df[df["Days for shipment (scheduled)"] > 0]  # Exclure les valeurs nulles ou 0 pour éviter division par zéro
-        df["Delay Ratio"] = df["Days for shipping (real)"] - df["Days for shipment (scheduled)"]
-        df["Profit Margin"] = df["Order Profit Per Order"] / df["Sales"]*100
+        fig, df_bubble = build_bubble_chart(backend, selection)
 
-        # ✅ **Créer un DataFrame agrégé pour la Bubble Chart**
-        df_bubble = df.groupby("Customer Segment").agg(
-            avg_delay_ratio=("Delay Ratio", "mean"),
-            avg_profit_margin=("Profit Margin", "mean"),
-            total_sales=("Sales", "sum")
-        ).reset_index()
+        # 📤 **Tables available for export (filled in as the page computes them)**
+        export_tables = {"Filtered Orders": df, "Profit & Delay by Customer Segment": df_bubble}
 
-        # ✅ **Vérifier s'il y a des valeurs NaN ou vides**
-        df_bubble = df_bubble.dropna(subset=["avg_delay_ratio", "avg_profit_margin", "total_sales"])
-
-        if df_bubble.empty:
+        if fig is None:
             st.warning("No data available for the selected filters!")
         else:
-            # ✅ **Normalize bubble size** (éviter qu'elles soient trop petites)
-            df_bubble["bubble_size"] = ((df_bubble["total_sales"] / df_bubble["total_sales"].max()) * 100 + 10)*3  # +10 pour éviter 0
-
             # 📊 **Bubble Chart: Profit Margin vs. Delay Ratio**
             st.markdown("### 📈 Profit Margin vs. Delay Ratio by Customer Segment")
-
-            fig = px.scatter(df_bubble,
-                             x="avg_delay_ratio",
-                             y="avg_profit_margin",
-                             size=df_bubble["bubble_size"],
-                             color="Customer Segment",
-                             hover_data=["Customer Segment", "avg_delay_ratio", "avg_profit_margin", "total_sales"],
-                             labels={"avg_delay_ratio": "Delay Ratio", "avg_profit_margin": "Profit Margin"},
-                             size_max=100
-                             # title="Profit Margin vs. Delay Ratio by Customer Segment"
-                             )
-
-            # ✅ **Format Y-Axis as Percentage**
-            fig.update_layout(
-                yaxis=dict(tickformat=".2f", title="Profit Margin (%)"),
-                xaxis=dict(tickformat=".4f"),
-                legend_title="Customer Segment"
-            )
-            fig.update_traces(marker=dict(opacity=.75, line=dict(width=1, color="black")))  # Add transparency + outline
-
             st.plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
@@ -131,67 +244,24 @@ def show_dashboard():
 
         # ✅ Ensure the column exists
         if "Type" in df.columns:
-            df_grouped = df.groupby(["Customer Segment", "Type"]).agg(
-                avg_delay=("Delay Ratio", "mean")
-            ).reset_index()
-
-            # 📊 **Create a grouped bar chart**
-            fig = px.bar(
-                df_grouped,
-                x="Customer Segment",
-                y="avg_delay",
-                color="Type",
-                barmode="group",  # Group bars next to each other
-                labels={"avg_delay": "Average Delay (days)", "Customer Segment": "Customer Segment"},
-                # title="📊 Average Delay by Customer Segment & Payment Type",
-            )
-
-
-            # ✅ **Add black border around bars**
-            fig.update_traces(marker=dict(
-                line=dict(color="black", width=1.5)  # Black border with width 1.5
-            ))
-    
-            # ✅ **Improve design**
-            fig.update_layout(
-                # yaxis=dict(tickformat=".2f", title="Average Delay (days)"),
-                yaxis=dict(tickformat=".2f", title="Average Delay (days)", range=[df_grouped["avg_delay"].min() - 0.05, df_grouped["avg_delay"].max() + 0.05]),
-                xaxis=dict(title="Customer Segment"),
-                legend_title="Type",
-            )
+            fig, df_grouped = build_segment_type_chart(backend, selection)
+            export_tables["Delay by Customer Segment & Type"] = df_grouped
 
             st.plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
 
 
-        # 📌 Define Groups
-        g1 = {"Days for shipping (real)", "Delay Ratio"}
-        g2 = {"Benefit per order", "Sales per customer", "Order Item Profit Ratio", 
-              "Sales", "Order Item Total", "Order Profit Per Order"}
-
-        # ✅ Ensure the required columns exist in the dataset
-        available_g1 = [col for col in g1 if col in df.columns]
-        available_g2 = [col for col in g2 if col in df.columns]
-
-        if available_g1 and available_g2:
-            # 📌 Compute all correlations between g1 and g2
-            correlation_results = {}
-            for col1 in available_g1:
-                for col2 in available_g2:
-                    correlation_value = df[col1].corr(df[col2])*100
-                    correlation_results[(col1, col2)] = abs(correlation_value)  # Store absolute value for comparison
-
-            # 📌 Find the strongest correlation (highest absolute value)
-            strongest_pair = max(correlation_results, key=correlation_results.get)
-            strongest_value = df[strongest_pair[0]].corr(df[strongest_pair[1]])*100
-
-            # 📌 Compute average financial metric for min/max shipping delay
-            min_delay_value = df[strongest_pair[0]].min()
-            max_delay_value = df[strongest_pair[0]].max()
+        # 📌 Strongest correlation between shipping measures and financial metrics
+        correlation_kpi = compute_correlation_kpi(df)
 
-            avg_financial_min_delay = df[df[strongest_pair[0]] == min_delay_value][strongest_pair[1]].mean()
-            avg_financial_max_delay = df[df[strongest_pair[0]] == max_delay_value][strongest_pair[1]].mean()
+        if correlation_kpi is not None:
+            available_g1, available_g2 = correlation_kpi["pairs"]
+            strongest_pair = correlation_kpi["strongest_pair"]
+            export_tables["Absolute Correlations (%)"] = correlation_kpi["table"]
+            min_delay_value, max_delay_value = correlation_kpi["min_delay_value"], correlation_kpi["max_delay_value"]
+            avg_financial_min_delay = correlation_kpi["avg_financial_min_delay"]
+            avg_financial_max_delay = correlation_kpi["avg_financial_max_delay"]
 
             # 📌 Interpretation function
             def interpret_correlation(value):
@@ -209,9 +279,8 @@ def show_dashboard():
             col_kpi1, col_kpi2 = st.columns(2)
 
             with col_kpi1:
-                st.metric(label=f"**📈 Correlation Value:** `{strongest_value:.2f}`", 
-                          value=f"{avg_financial_min_delay:.2f} / {avg_financial_max_delay:.2f}" if strongest_value is not None else "N/A", 
-                          delta=f"{(avg_financial_max_delay-avg_financial_min_delay)/avg_financial_min_delay*100:.2f}%" if strongest_value is not None else "N/A")
+                label, value, delta = format_correlation_kpi(correlation_kpi)
+                st.metric(label=label, value=value, delta=delta)
 
             with col_kpi2:
                 st.markdown(f"""
@@ -224,6 +293,47 @@ def show_dashboard():
         else:
             st.warning("⚠️ Required columns are missing from the dataset. Please check your data.")
 
+        # 🧪 **Cohort Comparison: every cohort from one grouped pass, differences against the first cohort**
+        if cohort_spec is not None:
+            cohort_dimension, cohorts = cohort_spec
+            st.markdown("---")
+            st.markdown(f"### 🧪 Cohort Comparison by {cohort_dimension}")
+            if len(cohorts) < 2:
+                st.info("Pick values for at least two cohorts.")
+            else:
+                df_cohort_bubble, df_cohorts = cohort_aggregates(backend, selection, cohort_dimension, cohorts)
+                baseline = cohorts[0][0]
+                df_cohorts = add_differences(df_cohorts, ["avg_delay_ratio", "avg_profit_margin", "total_sales"], baseline)
+                st.dataframe(df_cohorts, use_container_width=True, hide_index=True)
+                export_tables["Cohort Comparison"] = df_cohorts
+
+                if not df_cohort_bubble.empty:
+                    df_cohort_bubble["bubble_size"] = ((df_cohort_bubble["total_sales"] / df_cohort_bubble["total_sales"].max()) * 100 + 10)*3
+                    fig = px.scatter(df_cohort_bubble,
+                                     x="avg_delay_ratio",
+                                     y="avg_profit_margin",
+                                     size="bubble_size",
+                                     color="Customer Segment",
+                                     facet_col="Cohort",
+                                     hover_data=["Cohort", "Customer Segment", "avg_delay_ratio", "avg_profit_margin", "total_sales"],
+                                     labels={"avg_delay_ratio": "Delay Ratio", "avg_profit_margin": "Profit Margin"},
+                                     size_max=60)
+                    fig.update_traces(marker=dict(opacity=.75, line=dict(width=1, color="black")))
+                    st.plotly_chart(fig, use_container_width=True)
+
+                if correlation_kpi is not None:
+                    labels = cohort_labels(cohort_values(df, cohort_dimension), [members for _, members in cohorts])
+                    names = [name for name, _ in cohorts]
+                    df_cohort_corr = cohort_correlations(df, labels, names,
+                                                         [(c1, c2) for c1 in available_g1 for c2 in available_g2])
+                    for name in names[1:]:
+                        df_cohort_corr[f"Δ {name}"] = df_cohort_corr[name] - df_cohort_corr[baseline]
+                    st.markdown("#### 🔗 Correlations (%) by Cohort")
+                    st.dataframe(df_cohort_corr, use_container_width=True, hide_index=True)
+                    export_tables["Cohort Correlations (%)"] = df_cohort_corr
+
+        # 📤 **Export of the computed aggregates**
+        show_export_panel(export_tables, key="dashboard004")
 
         st.markdown("---")
 
@@ -2,6 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
+from data_export import show_export_panel
+from data_validation import require_columns, show_quality_panel
+from dataset_registry import dataset_date_index, default_dataset, load_dataset
+from date_index import describe_ranges, show_date_filter
+from query_backend import filter_options, get_backend, make_selection, select_orders
+
+# Columns the profitability figures divide or sum: rows missing one of them are left out of the page
+PROFIT_COLUMNS = ["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales"]
 
 def show_dashboard():
     # 📊 **Dashboard Title**
@@ -11,60 +19,65 @@ def show_dashboard():
     # 📂 **Upload CSV File**
     st.sidebar.title("📂 Upload Data")
     uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file, encoding='latin-1')
-
-        # 📌 **Convert "Shipping date (DateOrders)" to datetime**
-        df["Shipping date (DateOrders)"] = pd.to_datetime(df["shipping date (DateOrders)"], errors='coerce')
-
-        # 📌 **Add year filter**
-        st.sidebar.markdown("### 📆 Filter by Year")
-        available_years = df["Shipping date (DateOrders)"].dt.year.dropna().unique()
-        selected_years = st.sidebar.multiselect("Select Year", available_years, default=available_years)
-        if selected_years:
-            df = df[df["Shipping date (DateOrders)"].dt.year.isin(selected_years)]
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+        # 📌 **Vérification des colonnes nécessaires** (optional at ingest, needed by this page)
+        require_columns(df, PROFIT_COLUMNS + ["Customer Segment", "Market"])
+        backend = get_backend(df)
+
+        # 📌 **Add period filter** (years, a quarter, a custom range or the last N days)
+        st.sidebar.markdown("### 📆 Filter by Period")
+        # Rows are sorted by shipping date: the period is one binary-searched slice, not a year mask
+        date_index = dataset_date_index(df.attrs["dataset_id"])
+        selected_dates = show_date_filter(date_index, "dashboard004a")
+        if selected_dates:
+            st.sidebar.caption(f"📆 {describe_ranges(selected_dates)}")
 
         # 📌 **Adding dynamic filters**
         st.sidebar.markdown("### 🎯 Available Filters")
 
 
-        # 🔹 **Drilldown to Department**
-        column_names = list(df.columns)
+        # 🔹 **Drilldown to Department** (recorded in `selected_columns`, applied by the query backend)
+        selected_columns = {}
         filters = ["Type","Category Name","Department Name","Market","Order Region","Product Name","Shipping Mode",]
         for col in filters:
-            departments = df[col].unique()
+            departments = filter_options(backend, make_selection(columns=selected_columns, dates=selected_dates), col)
             if len(departments)<15:
                 selected_departments = st.sidebar.multiselect(col, departments, default=departments)
 
-                if selected_departments:
-                    df = df[df[col].isin(selected_departments)]
-
-        # 📌 **Vérification des colonnes nécessaires**
-        required_columns = ["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales", "Customer Segment"]
-        if not all(col in df.columns for col in required_columns):
-            st.error("Missing required columns in the dataset!")
-            st.stop()
-
-        # ✅ **Éviter les divisions par zéro**
-        df = df.replace([np.inf, -np.inf], np.nan)  # Remplace les infinis par NaN
-        df = df.dropna(subset=["Days for shipping (real)", "Days for shipment (scheduled)", "Order Profit Per Order", "Sales"])
-
-        # ✅ **Calculer les ratios uniquement pour les valeurs valides**
-        df = df[df["Days for shipment (scheduled)"] > 0]  # Exclure les valeurs nulles ou 0 pour éviter division par zéro
-        df["Delay Ratio"] = df["Days for shipping (real)"] - df["Days for shipment (scheduled)"]
-        df["Profit Margin"] = df["Order Profit Per Order"] / df["Sales"]*100
+                # Every value kept: nothing to filter on this column
+                if selected_departments and len(selected_departments) < len(departments):
+                    selected_columns[col] = selected_departments
+
+        # ✅ **Types vérifiés une seule fois à l'ingestion** (data_validation); profit and sales may be
+        # missing there, those rows are left out of this page only
+        # Exclure les valeurs nulles ou 0 pour éviter division par zéro (positive scheduled days)
+        selection = make_selection(
+            columns=selected_columns, dates=selected_dates,
+            not_null=PROFIT_COLUMNS,
+            positive=["Days for shipment (scheduled)"],
+        )
+        df = select_orders(df, selection)
+        df["Delay Ratio"] = df["Delay"]  # Delay and Profit Margin are computed once at ingest
 
         # ✅ **Créer un DataFrame agrégé pour la Bubble Chart**
-        df_bubble = df.groupby("Customer Segment").agg(
-            avg_delay_ratio=("Delay Ratio", "mean"),
-            avg_profit_margin=("Profit Margin", "mean"),
-            total_sales=("Sales", "sum")
-        ).reset_index()
+        df_bubble = backend.aggregate(selection, ["Customer Segment"], {
+            "avg_delay_ratio": ("Delay", "mean"),
+            "avg_profit_margin": ("Profit Margin", "mean"),
+            "total_sales": ("Sales", "sum")
+        })
 
         # ✅ **Vérifier s'il y a des valeurs NaN ou vides**
         df_bubble = df_bubble.dropna(subset=["avg_delay_ratio", "avg_profit_margin", "total_sales"])
 
+        # 📤 **Tables available for export (filled in as the page computes them)**
+        export_tables = {"Filtered Orders": df, "Profit & Delay by Customer Segment": df_bubble}
+
         if df_bubble.empty:
             st.warning("No data available for the selected filters!")
         else:
@@ -131,9 +144,10 @@ def show_dashboard():
 
         # ✅ Ensure the column exists
         if "Type" in df.columns:
-            df_grouped = df.groupby(["Customer Segment", "Type"]).agg(
-                avg_delay=("Delay Ratio", "mean")
-            ).reset_index()
+            df_grouped = backend.aggregate(selection, ["Customer Segment", "Type"], {
+                "avg_delay": ("Delay", "mean")
+            })
+            export_tables["Delay by Customer Segment & Type"] = df_grouped
 
             # 📊 **Create a grouped bar chart**
             fig = px.bar(
@@ -183,10 +197,8 @@ def show_dashboard():
             # 📌 **Calculate Delay Measures**
             df["Shipping Delay"] = df["Days for shipping (real)"] - df["Days for shipment (scheduled)"]
 
-            # 🔍 **Check for NaN values & Convert to numeric**
-            df = df[required_columns + ["Shipping Delay"]].copy()  # Keep only relevant columns
-            df = df.apply(pd.to_numeric, errors="coerce")  # Convert everything to numbers
-            df = df.dropna()  # Remove rows with NaN
+            # 🔍 Numeric and complete since ingest (data_validation)
+            df = df[required_columns + ["Shipping Delay"]]  # Keep only relevant columns
 
             # 📌 **List of financial indicators**
             financial_metrics = [
@@ -218,6 +230,7 @@ def show_dashboard():
 
             correlation_df["Interpretation (Shipping Delay)"] = correlation_df["Corr. with Shipping Delay"].apply(interpret_correlation)
             correlation_df["Interpretation (Days for shipping)"] = correlation_df["Corr. with Days for shipping (real)"].apply(interpret_correlation)
+            export_tables["Correlation Table"] = correlation_df.rename_axis("Financial Metric").reset_index()
 
             # # 📌 **Show correlation table in Streamlit**
             # st.markdown("### 📊 Correlation Results")
@@ -256,5 +269,8 @@ def show_dashboard():
             missing_columns = [col for col in required_columns if col not in df.columns]
             st.warning(f"⚠️ Required columns missing: {', '.join(missing_columns)}. Please check your dataset.")
 
+        # 📤 **Export of the computed aggregates**
+        show_export_panel(export_tables, key="dashboard004a")
+
     else:
         st.warning("⚠️ Please upload a CSV file to view the visualizations.")
@@ -0,0 +1,83 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+from data_export import show_export_panel
+from data_validation import show_quality_panel
+from dataset_registry import default_dataset, load_dataset
+from delay_forecast import (FORECAST_METRICS, MAX_HORIZON, SERIES_KEYS, combined_series, forecast_table,
+                            get_forecast_model)
+
+def show_dashboard():
+    # 🔮 **Dashboard Title**
+    st.title("🔮 Delay Forecast by Shipping Mode & Region")
+
+    # 📂 **Upload CSV File**
+    st.sidebar.title("📂 Upload Data")
+    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
+
+    if uploaded_file is not None:
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+
+        # 🔮 Fitted once per dataset version (and refreshed incrementally when orders are appended)
+        model = get_forecast_model(df)
+        if len(model.keys) == 0 or model.n_weeks < 2:
+            st.warning("⚠️ Not enough dated orders to forecast delays.")
+            st.stop()
+
+        # 📌 **Filters**
+        st.sidebar.markdown("### 🎯 Forecast Filters")
+        series_mask = np.ones(len(model.keys), dtype=bool)
+        for col in SERIES_KEYS:
+            values = sorted(model.keys[col].unique())
+            selected_values = st.sidebar.multiselect(col, values, default=values, key=f"dashboard005_{col}")
+            if selected_values:
+                series_mask &= model.keys[col].isin(selected_values).to_numpy()
+        metric = st.sidebar.selectbox("Metric", FORECAST_METRICS, key="dashboard005_metric")
+        horizon = st.sidebar.slider("Weeks ahead", 1, MAX_HORIZON, 6, key="dashboard005_horizon")
+
+        if not series_mask.any():
+            st.warning("No data available for the selected filters!")
+            st.stop()
+
+        # 📈 **Weekly history + forecast of the selected series**
+        history, forecast = combined_series(model, series_mask, horizon, metric)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=history.index, y=history.values, mode="lines", name="Weekly average",
+            line=dict(width=2, color="orange"),
+        ))
+        fig.add_trace(go.Scatter(
+            x=[history.index[-1]] + list(forecast.index), y=[history.values[-1]] + list(forecast.values),
+            mode="lines+markers", name="Forecast", line=dict(width=2, color="royalblue", dash="dash"),
+        ))
+        fig.update_layout(
+            xaxis_title="Week",
+            yaxis_title=f"{metric} (days)",
+            title=f"Weekly {metric}: history and {horizon}-week forecast",
+            hovermode="x",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # 📊 **Forecast per series**
+        st.markdown("### 📋 Forecast by Shipping Mode & Region")
+        df_forecast = forecast_table(model, horizon, metric)
+        df_forecast = df_forecast[np.repeat(series_mask, horizon)]
+        df_pivot = df_forecast.pivot_table(index="Order Region", columns="Shipping Mode",
+                                           values=f"Forecast {metric}", aggfunc="mean", observed=True)
+        st.dataframe(df_pivot.style.format("{:.2f}").background_gradient(cmap="OrRd", axis=None),
+                     use_container_width=True)
+        st.caption(f"Average of the next {horizon} weeks. Damped-trend exponential smoothing, parameters chosen per series.")
+
+        # 📤 **Export**
+        show_export_panel({"Forecast by Series": df_forecast,
+                           "Forecast Summary": df_pivot.reset_index(),
+                           "Combined Forecast": forecast.rename(f"Forecast {metric}").rename_axis("Week").reset_index()},
+                          key="dashboard005")
+
+    else:
+        st.warning("⚠️ Please upload a CSV file to view the visualizations.")
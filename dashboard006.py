@@ -0,0 +1,108 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+from data_export import show_export_panel
+from data_validation import require_columns, show_quality_panel
+from dataset_registry import _mapped_dataset, default_dataset, load_dataset
+from risk_model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, OPEN_STATUSES, dataset_scores, train
+
+
+@st.cache_resource(show_spinner="Training the late-delivery risk model...")
+def risk_model(dataset_id):
+    # One model per process and dataset version
+    return train(_mapped_dataset(dataset_id))
+
+
+def show_dashboard():
+    # ⚠️ **Dashboard Title**
+    st.title("⚠️ Late-Delivery Risk")
+
+    # 📂 **Upload CSV File**
+    st.sidebar.title("📂 Upload Data")
+    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+    if uploaded_file is None:
+        uploaded_file = default_dataset()
+
+    if uploaded_file is not None:
+        # 📂 Parsed once per file, then memory-mapped from the shared dataset registry
+        df = load_dataset(uploaded_file)
+        show_quality_panel(df)
+
+        required_columns = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+        require_columns(df, required_columns + ["Market"])
+
+        # ⚠️ Scored once per dataset version across the process pool, then read from disk
+        model = risk_model(df.attrs["dataset_id"])
+        df["Late Risk"] = dataset_scores(model, df.attrs["dataset_id"])
+
+        # 📌 **Filters**
+        st.sidebar.markdown("### 🎯 Available Filters")
+        if "Order Status" in df.columns and st.sidebar.checkbox("Open orders only", value=True):
+            df = df[df["Order Status"].isin(OPEN_STATUSES)]
+        for col in ["Market", "Shipping Mode", "Customer Segment"]:
+            values = df[col].unique()
+            if len(values) < 15:
+                selected_values = st.sidebar.multiselect(col, values, default=values, key=f"dashboard006_{col}")
+                if selected_values:
+                    df = df[df[col].isin(selected_values)]
+        threshold = st.sidebar.slider("High-risk threshold", 0.05, 0.95, 0.6, 0.05, key="dashboard006_threshold")
+
+        if df.empty:
+            st.warning("No data available for the selected filters!")
+            st.stop()
+
+        # 📊 **KPIs**
+        risk = df["Late Risk"].to_numpy()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("📦 Orders scored", f"{len(df):,}")
+        col2.metric("⚠️ Average late risk", f"{risk.mean():.1%}")
+        col3.metric(f"🚨 Orders above {threshold:.0%}", f"{(risk >= threshold).mean():.1%}")
+        if model.metrics.get("auc") is not None:
+            st.caption(f"Holdout AUC {model.metrics['auc']:.3f} · log loss {model.metrics['log_loss']:.3f} "
+                       f"· {model.metrics['train_rows']:,} training orders")
+
+        st.markdown("---")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # 🗺️ **Average risk by Order Region x Shipping Mode**
+            st.markdown("### 🗺️ Average Risk by Region & Shipping Mode")
+            df_region = df.groupby(["Order Region", "Shipping Mode"], observed=True)["Late Risk"].mean().reset_index()
+            fig = px.density_heatmap(df_region, x="Shipping Mode", y="Order Region", z="Late Risk",
+                                     histfunc="avg", color_continuous_scale="OrRd")
+            fig.update_layout(coloraxis_colorbar=dict(title="Late Risk", tickformat=".0%"))
+            st.plotly_chart(fig, use_container_width=True)
+
+        with col2:
+            # 📊 **Distribution of the scores** (binned with NumPy, not per row in the browser)
+            st.markdown("### 📊 Risk Distribution")
+            counts, edges = np.histogram(risk, bins=40, range=(0, 1))
+            df_hist = pd.DataFrame({"Late Risk": (edges[:-1] + edges[1:]) / 2, "Orders": counts})
+            fig = px.bar(df_hist, x="Late Risk", y="Orders")
+            fig.add_vline(x=threshold, line_dash="dash", line_color="red")
+            fig.update_layout(xaxis=dict(tickformat=".0%"), bargap=0)
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("---")
+
+        # 🔍 **What drives the risk**
+        st.markdown("### 🔍 Risk Drivers (model weights)")
+        df_coef = model.coefficients()
+        df_coef = df_coef.reindex(df_coef["Weight"].abs().sort_values(ascending=False).index).head(20)
+        fig = px.bar(df_coef, x="Weight", y=df_coef["Feature"] + ": " + df_coef["Value"].astype(str), orientation="h",
+                     color="Weight", color_continuous_scale="RdBu_r", labels={"y": ""})
+        fig.update_layout(yaxis=dict(autorange="reversed"))
+        st.plotly_chart(fig, use_container_width=True)
+
+        # 🚨 **Riskiest orders**
+        st.markdown("### 🚨 Riskiest Orders")
+        df_top = df.nlargest(50, "Late Risk")[["Late Risk"] + required_columns]
+        st.dataframe(df_top.style.format({"Late Risk": "{:.1%}"}), use_container_width=True)
+
+        # 📤 **Export**
+        show_export_panel({"Scored Orders": df, "Risk by Region & Mode": df_region,
+                           "Riskiest Orders": df_top, "Model Weights": model.coefficients()}, key="dashboard006")
+
+    else:
+        st.warning("⚠️ Please upload a CSV file to view the visualizations.")
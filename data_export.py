@@ -0,0 +1,106 @@
+import gzip
+import io
+import tempfile
+import streamlit as st
+
+# 📦 **pyarrow is optional: without it only the gzip CSV export is offered**
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 📌 **Export formats -> (file extension, mimetype)**
+EXPORT_FORMATS = {
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.stream"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+}
+
+# Rows written per chunk
+CHUNK_ROWS = 100_000
+
+
+def available_formats():
+    if pa is None:
+        return ["CSV (gzip)"]
+    return list(EXPORT_FORMATS)
+
+
+def iter_chunks(df, chunk_rows=CHUNK_ROWS):
+    # 🔹 Positional slices of a frame are views, no row data is copied here
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_export(df, fmt, sink, chunk_rows=CHUNK_ROWS):
+    # ✅ Writes `df` into the binary file-like `sink` chunk by chunk
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    if fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=sink, mode="wb") as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+                chunk.to_csv(text, header=(i == 0), index=False)
+            text.flush()
+            text.detach()
+        return sink
+
+    # 🔹 Arrow / Parquet share one schema, built for the whole frame
+    schema = export_schema(df)
+    if fmt == "Arrow IPC":
+        with pa_ipc.new_stream(sink, schema) as writer:
+            for chunk in iter_chunks(df, chunk_rows):
+                writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        with pq.ParquetWriter(sink, schema) as writer:
+            for chunk in iter_chunks(df, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return sink
+
+
+def export_schema(df):
+    # 📌 Typed from the dtypes of the whole frame (categoricals carry all their categories), not from the
+    # first chunk: an object column that is all null in the first chunk would be typed null there and
+    # fail on a later chunk. Only object columns look at their values, for their first non-null one.
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            values = df[field.name].dropna()
+            if len(values):
+                schema = schema.set(i, field.with_type(pa.array(values.iloc[:1].tolist()).type))
+    return schema
+
+
+def export_to_file(df, fmt, chunk_rows=CHUNK_ROWS):
+    # 📂 The export is written chunk by chunk into an anonymous temp file (removed once closed), so only
+    # one chunk is encoded in memory at a time. st.download_button gets the raw file handle: Streamlit
+    # still reads the finished file into one bytes object when it serves the download.
+    sink = tempfile.TemporaryFile(prefix="dashboard-export-")
+    write_export(df, fmt, sink, chunk_rows)
+    sink.flush()
+    raw = sink.detach()
+    raw.seek(0)
+    return raw
+
+
+def show_export_panel(tables, key):
+    # 📤 **Sidebar export of the page aggregates or the filtered orders**
+    with st.sidebar.expander("📤 Export Data"):
+        name = st.selectbox("Table", list(tables), key=f"{key}_export_table")
+        fmt = st.selectbox("Format", available_formats(), key=f"{key}_export_format")
+        df = tables[name]
+        extension, mimetype = EXPORT_FORMATS[fmt]
+        file_name = name.lower().replace(" ", "_") + extension
+
+        # 🔹 The export only runs when the button is clicked, outside the script thread
+        st.download_button(
+            f"⬇️ Download ({len(df):,} rows)",
+            data=lambda: export_to_file(df, fmt),
+            file_name=file_name,
+            mime=mimetype,
+            key=f"{key}_export_button",
+            on_click="ignore",
+        )
@@ -0,0 +1,208 @@
+import codecs
+import io
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 🧹 **Validation and quarantine, run once at ingest by the dataset registry**
+# Column names are matched case-insensitively to the schema, values are parsed and checked with
+# vectorized masks, and every failing row is moved to a quarantine table with its reasons.
+# Pages only ever see rows that passed. Columns only some pages use (map coordinates, profit, market,
+# segment) are optional and nullable: a bad value there is cleared instead of quarantining the row, and
+# the pages that need the column check it and mask its nulls themselves (require_columns, not_null).
+TEXT, NUMBER, DAYS, DATETIME = "text", "number", "days", "datetime"
+
+# column -> (kind, required column, nulls allowed)
+SCHEMA = {
+    "Type": (TEXT, True, False),
+    "Days for shipping (real)": (DAYS, True, False),
+    "Days for shipment (scheduled)": (DAYS, True, False),
+    "Benefit per order": (NUMBER, False, False),
+    "Sales per customer": (NUMBER, False, False),
+    "Delivery Status": (TEXT, False, True),
+    "Late_delivery_risk": (NUMBER, False, True),
+    "Category Name": (TEXT, True, False),
+    "Customer Segment": (TEXT, False, True),
+    "Department Name": (TEXT, True, False),
+    "Latitude": (NUMBER, False, True),
+    "Longitude": (NUMBER, False, True),
+    "Market": (TEXT, False, True),
+    "Order Country": (TEXT, False, True),
+    "Order Item Profit Ratio": (NUMBER, False, False),
+    "Sales": (NUMBER, False, True),
+    "Order Item Total": (NUMBER, False, False),
+    "Order Profit Per Order": (NUMBER, False, True),
+    "Order Region": (TEXT, True, False),
+    "Order Status": (TEXT, False, True),
+    "Product Name": (TEXT, True, False),
+    "Shipping date (DateOrders)": (DATETIME, True, False),
+    "Shipping Mode": (TEXT, True, False),
+}
+# Inclusive value ranges checked after parsing
+RANGES = {
+    "Latitude": (-90.0, 90.0),
+    "Longitude": (-180.0, 180.0),
+    "Late_delivery_risk": (0, 1),
+}
+REASONS_COLUMN = "Quarantine Reasons"
+# C0/C1 control characters and U+FFFD never appear in valid text: they come from a wrong decoding
+# (cp1252 is tried before Latin-1, so Windows smart quotes and dashes are not read as C1 controls)
+_BAD_TEXT = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufffd]")
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def _decodes(data, encoding, chunk_size):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    view = memoryview(data)
+    try:
+        for start in range(0, len(view), chunk_size):
+            decoder.decode(view[start:start + chunk_size])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_encoding(data, chunk_size=1 << 20):
+    # 🔹 The first of UTF-8, cp1252 and Latin-1 that decodes the whole file (checked in chunks, no
+    # second copy). Latin-1 decodes anything: it is left for the bytes cp1252 does not define.
+    for encoding in ("utf-8", "cp1252"):
+        if _decodes(data, encoding, chunk_size):
+            return encoding
+    return "latin-1"
+
+
+def read_orders_csv(data):
+    encoding = detect_encoding(data)
+    df = pd.read_csv(io.BytesIO(data), encoding=encoding)
+    df.attrs["encoding"] = encoding
+    return df
+
+
+def canonical_columns(df):
+    # 📌 "shipping date (DateOrders)", " Sales " ... -> schema names; returns the renames applied
+    by_key = {name.casefold(): name for name in SCHEMA}
+    renames = {}
+    for col in df.columns:
+        target = by_key.get(str(col).strip().casefold())
+        if target is not None and col != target and target not in df.columns and target not in renames.values():
+            renames[col] = target
+    return renames
+
+
+def _bad_text_mask(series):
+    # Checked on the distinct values only, then broadcast back to the rows through the codes
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return np.zeros(len(series), dtype=bool)
+    bad = np.array([bool(_BAD_TEXT.search(str(value))) for value in uniques] + [False])
+    return bad[codes]
+
+
+def validate_orders(df):
+    # ✅ Returns (clean frame, quarantine frame, report)
+    renames = canonical_columns(df)
+    df = df.rename(columns=renames)
+    missing = [col for col, (_, required, _) in SCHEMA.items() if required and col not in df.columns]
+    if missing:
+        raise ValidationError(f"Missing required columns in the dataset: {', '.join(missing)}")
+
+    raw = df
+    df = df.copy(deep=False)
+    reasons = np.full(len(df), "", dtype=object)
+    failed = np.zeros(len(df), dtype=bool)
+    counts = {}
+    cleared = {}
+
+    def flag(mask, reason, clear=None):
+        mask = np.asarray(mask, dtype=bool)
+        n = int(mask.sum())
+        if not n:
+            return
+        if clear is not None:
+            # 🔹 Nullable column: the bad value is cleared, the row stays for the pages not using it
+            df[clear] = df[clear].mask(mask)
+            cleared[reason] = n
+            return
+        reasons[mask] += reason + "; "
+        failed[mask] = True
+        counts[reason] = n
+
+    for col, (kind, _, nullable) in SCHEMA.items():
+        if col not in df.columns:
+            continue
+        clear = col if nullable else None
+        present = df[col].notna().to_numpy()
+        if kind == DATETIME:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+            parsed = df[col].notna().to_numpy()
+            flag(present & ~parsed, f"invalid date in {col}", clear)
+        elif kind in (NUMBER, DAYS):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            parsed = df[col].notna().to_numpy() & np.isfinite(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+            flag(present & ~parsed, f"non-numeric {col}", clear)
+            if kind == DAYS:
+                flag(parsed & (df[col].to_numpy(dtype=np.float64, na_value=np.nan) < 0), f"negative {col}", clear)
+            if col in RANGES:
+                low, high = RANGES[col]
+                values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                flag(parsed & ((values < low) | (values > high)), f"{col} out of range", clear)
+        else:
+            flag(present & _bad_text_mask(df[col]), f"invalid text encoding in {col}", clear)
+        if not nullable:
+            flag(~present, f"missing {col}")
+
+    quarantine = raw[failed].copy()
+    quarantine[REASONS_COLUMN] = [r.rstrip("; ") for r in reasons[failed]]
+    clean = df[~failed].reset_index(drop=True)
+
+    # 🔹 Columns that had to be coerced to float only because of bad rows go back to integers
+    for col, (kind, _, _) in SCHEMA.items():
+        if kind == DAYS and col in clean.columns and len(clean) and (clean[col] % 1 == 0).all():
+            clean[col] = clean[col].astype(np.int64)
+
+    report = {
+        "rows": int(len(raw)),
+        "valid_rows": int(len(clean)),
+        "quarantined_rows": int(failed.sum()),
+        "reasons": counts,
+        "cleared_values": cleared,
+        "renamed_columns": renames,
+        "missing_optional_columns": [col for col, (_, required, _) in SCHEMA.items() if not required and col not in raw.columns],
+        "encoding": raw.attrs.get("encoding"),
+    }
+    return clean, quarantine, report
+
+
+def require_columns(df, columns):
+    # ✅ Page-level check for the optional columns a page cannot work without
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        st.error(f"Missing required columns in the dataset: {', '.join(missing)}")
+        st.stop()
+
+
+def show_quality_panel(df):
+    # 📌 Sidebar summary of the ingest validation, with the quarantined rows for download
+    from dataset_registry import open_quarantine, validation_report
+
+    report = validation_report(df.attrs["dataset_id"])
+    if not report:
+        return
+    with st.sidebar.expander(f"🧹 Data Quality ({report['quarantined_rows']:,} quarantined)"):
+        st.caption(f"{report['valid_rows']:,} of {report['rows']:,} rows passed validation · encoding {report['encoding']}")
+        for reason, n in report["reasons"].items():
+            st.markdown(f"- {reason}: **{n:,}**")
+        for reason, n in report.get("cleared_values", {}).items():
+            st.markdown(f"- {reason} (value cleared, row kept): **{n:,}**")
+        if report["renamed_columns"]:
+            st.caption("Renamed columns: " + ", ".join(f"`{a}` → `{b}`" for a, b in report["renamed_columns"].items()))
+        if report["quarantined_rows"]:
+            quarantine = open_quarantine(df.attrs["dataset_id"])
+            st.download_button("⬇️ Quarantined rows (CSV)", data=lambda: quarantine.to_csv(index=False).encode("utf-8"),
+                               file_name="quarantine.csv", mime="text/csv", on_click="ignore",
+                               key=f"quarantine_{df.attrs['dataset_id']}")
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import streamlit as st
+from data_validation import ValidationError, read_orders_csv, validate_orders
+from date_index import DATE_COLUMN, DateIndex
+from delay_kernels import add_delay_columns
+
+# 📂 **Shared dataset registry**
+# Every uploaded CSV is parsed once, normalized, and stored column by column as `.npy`
+# files under DATA_DIR/<dataset id>/. Each Streamlit process maps those files read-only,
+# so replicas on the same host share one copy of the data through the page cache.
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", os.path.join(tempfile.gettempdir(), "delivery_delay_datasets"))
+MANIFEST = "manifest.json"
+QUARANTINE_DIR = "quarantine"
+# Bumped whenever normalize_orders changes, so stale published datasets are not reused
+INGEST_VERSION = "5"
+# 📂 Optional local CSV served when nothing is uploaded (load tests, scheduled reports)
+DEFAULT_DATASET_PATH = os.environ.get("DASHBOARD_DATASET_PATH")
+
+# file id -> dataset id, so reruns do not re-hash the same upload
+_dataset_ids = {}
+
+
+def dataset_id_for(data):
+    return hashlib.sha256(INGEST_VERSION.encode() + data).hexdigest()[:20]
+
+
+def dataset_path(dataset_id):
+    return os.path.join(DATA_DIR, dataset_id)
+
+
+def ingest_orders(df):
+    # 🧹 **Validation first: schema, ranges and encodings; failing rows go to quarantine**
+    # The date column is matched case-insensitively and parsed in place by the validation.
+    clean, quarantine, report = validate_orders(df)
+
+    # ⏳ **Delay, Delay Category and Profit Margin are derived here once, not on every rerun**
+    clean = add_delay_columns(clean)
+
+    # 📅 **Stored sorted by shipping date: every date range is then one contiguous slice (date_index)**
+    return _sorted_by_date(clean), quarantine, report
+
+
+def _sorted_by_date(df):
+    # 🔹 Reordered column by column in place: each old column is released as soon as its sorted copy
+    # replaces it, so the peak is one extra column instead of a second full frame (sort_values)
+    dates = df[DATE_COLUMN]
+    if not dates.is_monotonic_increasing:
+        order = np.argsort(dates.to_numpy(), kind="stable")
+        for i in range(df.shape[1]):
+            df.isetitem(i, df.iloc[:, i].array.take(order))
+    df.index = pd.RangeIndex(len(df))
+    return df
+
+
+def normalize_orders(df):
+    return ingest_orders(df)[0]
+
+
+def _write_columns(folder, df, extra=None):
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {"name": col, "file": f"{i:03d}.npy"}
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series) or series.dtype.kind == "M":
+            # Numbers, booleans and naive timestamps are stored as raw NumPy arrays
+            entry["kind"] = "array"
+            values = series.to_numpy()
+        else:
+            # 🔹 Text columns are stored as categorical codes + a small list of categories
+            categorical = series.array if isinstance(series.dtype, pd.CategoricalDtype) else pd.Categorical(series)
+            entry["kind"] = "category"
+            entry["categories"] = categorical.categories.tolist()
+            entry["ordered"] = bool(categorical.ordered)
+            values = categorical.codes
+        np.save(os.path.join(folder, entry["file"]), values)
+        columns.append(entry)
+
+    with open(os.path.join(folder, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(dict(extra or {}, rows=len(df), columns=columns), f)
+
+
+def publish(dataset_id, df, quarantine=None, report=None):
+    final_dir = dataset_path(dataset_id)
+    if os.path.exists(os.path.join(final_dir, MANIFEST)):
+        return final_dir
+
+    # 🔹 Write into a private temp dir, then rename it into place so readers never see half a dataset
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{dataset_id}-", dir=DATA_DIR)
+    if quarantine is not None and len(quarantine):
+        # Raw values of the rejected rows, kept as text for inspection and download
+        os.makedirs(os.path.join(tmp_dir, QUARANTINE_DIR))
+        _write_columns(os.path.join(tmp_dir, QUARANTINE_DIR), quarantine.astype("string"))
+    _write_columns(tmp_dir, df, {"validation": report} if report else None)
+
+    try:
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        # Another process published the same dataset first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return final_dir
+
+
+def _open_columns(folder):
+    with open(os.path.join(folder, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    data = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(folder, entry["file"]), mmap_mode="r")
+        if entry["kind"] == "category":
+            data[entry["name"]] = pd.Categorical.from_codes(
+                values, categories=entry["categories"], ordered=entry.get("ordered", False), validate=False,
+            )
+        else:
+            data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def open_dataset(dataset_id):
+    return _open_columns(dataset_path(dataset_id))
+
+
+def open_quarantine(dataset_id):
+    folder = os.path.join(dataset_path(dataset_id), QUARANTINE_DIR)
+    if not os.path.exists(os.path.join(folder, MANIFEST)):
+        return pd.DataFrame()
+    return _open_columns(folder)
+
+
+@st.cache_resource(show_spinner=False)
+def validation_report(dataset_id):
+    with open(os.path.join(dataset_path(dataset_id), MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f).get("validation")
+
+
+@st.cache_resource(show_spinner=False)
+def _mapped_dataset(dataset_id):
+    # One mapping per process and dataset, shared by every session of this replica
+    return open_dataset(dataset_id)
+
+
+@st.cache_resource(show_spinner=False)
+def dataset_date_index(dataset_id):
+    # Built over the mapped date column (no copy), shared like the mapping itself
+    return DateIndex.build(_mapped_dataset(dataset_id)[DATE_COLUMN])
+
+
+class LocalDataset:
+    # Same interface as Streamlit's UploadedFile, for a CSV on disk
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.path = path
+        self.name = os.path.basename(path)
+        self.file_id = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def default_dataset():
+    if DEFAULT_DATASET_PATH and os.path.exists(DEFAULT_DATASET_PATH):
+        return LocalDataset(DEFAULT_DATASET_PATH)
+    return None
+
+
+def load_dataset(uploaded_file):
+    file_id = getattr(uploaded_file, "file_id", None)
+    dataset_id = _dataset_ids.get(file_id)
+
+    if dataset_id is None:
+        data = uploaded_file.getvalue()
+        dataset_id = dataset_id_for(data)
+        if not os.path.exists(os.path.join(dataset_path(dataset_id), MANIFEST)):
+            try:
+                publish(dataset_id, *ingest_orders(read_orders_csv(data)))
+            except ValidationError as e:
+                st.error(f"⚠️ {e}")
+                st.stop()
+        if file_id is not None:
+            _dataset_ids[file_id] = dataset_id
+
+    # ✅ Shallow copy: pages may add or replace columns without touching the shared mapping
+    df = _mapped_dataset(dataset_id).copy(deep=False)
+    df.attrs["dataset_id"] = dataset_id
+    df.attrs["source"] = getattr(uploaded_file, "name", None)
+    return df
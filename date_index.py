@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 📅 **Sorted index over the shipping date**
+# Datasets are stored sorted by shipping date (dataset_registry), so any date range is a contiguous
+# block of rows found with two binary searches. One range is sliced with `iloc[start:stop]` (a view,
+# no copy); several ranges are gathered once. Ranges are half-open [start, end) timestamp strings.
+DATE_COLUMN = "Shipping date (DateOrders)"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+PERIODS = ["Years", "Quarter", "Custom range", "Last N days"]
+DEFAULT_LAST_DAYS = 90
+
+
+def _stamp(value):
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+
+def date_range(start, end):
+    return [_stamp(start), _stamp(end)]
+
+
+def year_ranges(years):
+    # 🔹 Consecutive years are merged into one range: 2016 + 2017 is a single slice
+    ranges = []
+    for year in sorted({int(y) for y in years}):
+        if ranges and ranges[-1][1] == year:
+            ranges[-1][1] = year + 1
+        else:
+            ranges.append([year, year + 1])
+    return [date_range(f"{start}-01-01", f"{end}-01-01") for start, end in ranges]
+
+
+def quarter_range(year, quarter):
+    start = pd.Timestamp(year=int(year), month=3 * int(quarter) - 2, day=1)
+    return date_range(start, start + pd.DateOffset(months=3))
+
+
+def last_days_range(last_date, days):
+    # 🔹 The last N calendar days up to and including the day of `last_date`
+    end = pd.Timestamp(last_date).normalize() + pd.Timedelta(days=1)
+    return date_range(end - pd.Timedelta(days=int(days)), end)
+
+
+def intersect_ranges(a, b):
+    ranges = []
+    for start_a, end_a in a:
+        for start_b, end_b in b:
+            start, end = max(start_a, start_b), min(end_a, end_b)
+            if start < end:
+                ranges.append([start, end])
+    return ranges
+
+
+def describe_ranges(ranges):
+    return ", ".join(f"{start[:10]} → {(pd.Timestamp(end) - pd.Timedelta(seconds=1)):%Y-%m-%d}"
+                     for start, end in ranges)
+
+
+class DateIndex:
+    def __init__(self, dates):
+        self.values = np.asarray(dates, dtype="datetime64[ns]")
+
+    @classmethod
+    def build(cls, dates):
+        # ✅ Only a sorted column can be sliced; callers fall back to a mask otherwise
+        dates = pd.Series(dates)
+        return cls(dates.to_numpy()) if dates.is_monotonic_increasing else None
+
+    def __len__(self):
+        return len(self.values)
+
+    def first(self):
+        return pd.Timestamp(self.values[0]) if len(self) else None
+
+    def last(self):
+        # NaT sorts last: the last valid date is found by binary search too
+        stop = np.searchsorted(self.values, np.datetime64("NaT"), side="left")
+        return pd.Timestamp(self.values[stop - 1]) if stop else None
+
+    def slice(self, start, end):
+        start, end = np.searchsorted(self.values, np.array([start, end], dtype="datetime64[ns]"), side="left")
+        return slice(int(start), int(end))
+
+    def slices(self, ranges):
+        return [s for s in (self.slice(start, end) for start, end in sorted(ranges)) if s.stop > s.start]
+
+    def years(self):
+        # 🔹 One binary search per candidate year instead of `dt.year.unique()` over every row
+        first, last = self.first(), self.last()
+        if first is None:
+            return []
+        return [year for year in range(first.year, last.year + 1)
+                if self.slices(year_ranges([year]))]
+
+    def rows(self, ranges):
+        # 📌 A slice for one range (or none), sorted row positions for several
+        blocks = self.slices(ranges)
+        if len(blocks) == 1:
+            return blocks[0]
+        if not blocks:
+            return slice(0, 0)
+        return np.concatenate([np.arange(s.start, s.stop) for s in blocks])
+
+    def take(self, df, ranges):
+        return df.iloc[self.rows(ranges)] if ranges else df
+
+
+def range_mask(dates, ranges):
+    # 🔹 Fallback for frames that are not sorted by date
+    values = np.asarray(dates, dtype="datetime64[ns]")
+    mask = np.zeros(len(values), dtype=bool)
+    for start, end in ranges:
+        mask |= (values >= np.datetime64(start, "ns")) & (values < np.datetime64(end, "ns"))
+    return mask
+
+
+def show_date_filter(index, key):
+    # 📆 Sidebar period picker: years, one quarter, a custom range or the last N days.
+    # Returns the selected date ranges, [] when every date is kept.
+    if index is None or index.first() is None:
+        return []
+    period = st.sidebar.radio("Period", PERIODS, horizontal=True, key=f"{key}_period")
+    first, last = index.first(), index.last()
+
+    if period == "Years":
+        available_years = index.years()
+        selected_years = st.sidebar.multiselect("Select Year", available_years, default=available_years)
+        if not selected_years or len(selected_years) == len(available_years):
+            return []
+        return year_ranges(selected_years)
+
+    if period == "Quarter":
+        quarters = [(year, q) for year in index.years() for q in range(1, 5)
+                    if index.slices([quarter_range(year, q)])]
+        year, quarter = st.sidebar.selectbox("Quarter", quarters, index=len(quarters) - 1,
+                                             format_func=lambda yq: f"{yq[0]} Q{yq[1]}", key=f"{key}_quarter")
+        return [quarter_range(year, quarter)]
+
+    if period == "Custom range":
+        start, end = st.sidebar.slider("Date range", min_value=first.date(), max_value=last.date(),
+                                       value=(first.date(), last.date()), key=f"{key}_range")
+        return [date_range(start, pd.Timestamp(end) + pd.Timedelta(days=1))]
+
+    span = (last.normalize() - first.normalize()).days + 1
+    days = st.sidebar.number_input("Last N days", min_value=1, max_value=span,
+                                   value=min(DEFAULT_LAST_DAYS, span), step=1, key=f"{key}_days")
+    return [last_days_range(last, days)]
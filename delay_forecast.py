@@ -0,0 +1,240 @@
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from dataset_registry import _mapped_dataset, dataset_path
+
+# 🔮 **Weekly delay forecasts per Shipping Mode x Order Region**
+# Damped-trend exponential smoothing (Holt), run for every series and every candidate
+# (alpha, beta) at once: the only Python loop is over weeks, each step is one NumPy update
+# over an array of shape (candidates, metrics, series). The best candidate per series is the
+# one with the lowest one-step-ahead error.
+FORECAST_VERSION = "1"
+SERIES_KEYS = ["Shipping Mode", "Order Region"]
+FORECAST_METRICS = ["Delay", "Days for shipping (real)", "Days for shipment (scheduled)"]
+PERIOD_DAYS = 7
+ALPHAS = [0.1, 0.2, 0.3, 0.5, 0.8]
+BETAS = [0.0, 0.05, 0.1, 0.2]
+DAMPING = 0.9
+MAX_HORIZON = 12
+
+# source name -> last model, so a re-upload that only appends orders is refreshed, not refitted
+_latest_by_source = {}
+_latest_lock = threading.Lock()
+
+
+def weekly_sums(df):
+    # 📌 Sums and counts per (metric, series, week), from one bincount per metric
+    dates = df["Shipping date (DateOrders)"].to_numpy().astype("datetime64[D]")
+    valid = ~np.isnat(dates)
+    for key in SERIES_KEYS:
+        valid &= df[key].notna().to_numpy()
+    # 1970-01-01 was a Thursday: +3 makes weeks start on Monday
+    week = (dates[valid].astype(np.int64) + 3) // PERIOD_DAYS
+
+    codes = [pd.factorize(df[key].to_numpy()[valid], sort=True) for key in SERIES_KEYS]
+    combined = codes[0][0].astype(np.int64)
+    for key_codes, uniques in codes[1:]:
+        combined = combined * len(uniques) + key_codes
+    series_ids, series = np.unique(combined, return_inverse=True)
+    keys = pd.DataFrame({
+        key: np.asarray(uniques, dtype=object)[(series_ids // _stride(codes, i)) % len(uniques)]
+        for i, (key, (_, uniques)) in enumerate(zip(SERIES_KEYS, codes))
+    })
+
+    first_week = int(week.min()) if len(week) else 0
+    n_weeks = int(week.max()) - first_week + 1 if len(week) else 0
+    flat = series * n_weeks + (week - first_week)
+    size = len(keys) * n_weeks
+
+    sums = np.zeros((len(FORECAST_METRICS), len(keys), n_weeks))
+    counts = np.zeros((len(FORECAST_METRICS), len(keys), n_weeks))
+    for m, metric in enumerate(FORECAST_METRICS):
+        values = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype=np.float64)[valid]
+        seen = np.isfinite(values)
+        sums[m] = np.bincount(flat[seen], weights=values[seen], minlength=size).reshape(len(keys), n_weeks)
+        counts[m] = np.bincount(flat[seen], minlength=size).reshape(len(keys), n_weeks)
+    return keys, first_week, sums, counts
+
+
+def _stride(codes, i):
+    stride = 1
+    for _, uniques in codes[i + 1:]:
+        stride *= len(uniques)
+    return stride
+
+
+def smooth(observed, alpha, beta, level, trend):
+    # ✅ Advances the smoothing state over `observed` (..., weeks), NaN weeks keep the damped trend
+    sse = np.zeros(level.shape)
+    errors = np.zeros(level.shape)
+    for t in range(observed.shape[-1]):
+        y = observed[..., t]
+        seen = np.isfinite(y)
+        started = np.isfinite(level)
+        predicted = level + DAMPING * trend
+        error = np.where(seen & started, y - predicted, 0.0)
+        sse += error * error
+        errors += seen & started
+        level = np.where(started, predicted + alpha * error, np.where(seen, y, level))
+        trend = np.where(started, DAMPING * trend + alpha * beta * error, trend)
+    return level, trend, sse, errors
+
+
+class ForecastModel:
+    def __init__(self, keys, first_week, sums, counts, alpha, beta, level, trend, prev_level, prev_trend):
+        self.keys = keys
+        self.first_week = first_week
+        self.sums = sums
+        self.counts = counts
+        self.alpha = alpha
+        self.beta = beta
+        self.level = level
+        self.trend = trend
+        # State before the last week, which may still be filling up when the data is refreshed
+        self.prev_level = prev_level
+        self.prev_trend = prev_trend
+
+    @property
+    def n_weeks(self):
+        return self.sums.shape[-1]
+
+    def history(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.sums / self.counts
+
+    def week_start(self, week):
+        return pd.Timestamp("1970-01-01") + pd.Timedelta(days=int(week) * PERIOD_DAYS - 3)
+
+    def forecast(self, horizon=MAX_HORIZON):
+        # level + trend * (phi + phi^2 + ... + phi^h) for h = 1..horizon -> (metrics, series, horizon)
+        damping = np.cumsum(DAMPING ** np.arange(1, horizon + 1))
+        return self.level[..., None] + self.trend[..., None] * damping
+
+
+def fit(keys, first_week, sums, counts):
+    # 🔹 Grid search over (alpha, beta), vectorized: candidates are the leading axis of the state
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = sums / counts
+    grid_alpha, grid_beta = (g.ravel() for g in np.meshgrid(ALPHAS, BETAS, indexing="ij"))
+    shape = (len(grid_alpha),) + observed.shape[:-1]
+    alpha = np.broadcast_to(grid_alpha[:, None, None], shape)
+    beta = np.broadcast_to(grid_beta[:, None, None], shape)
+
+    start_level, start_trend = np.full(shape, np.nan), np.zeros(shape)
+    prev_level, prev_trend, sse, errors = smooth(observed[..., :-1], alpha, beta, start_level, start_trend)
+    level, trend, last_sse, last_errors = smooth(observed[..., -1:], alpha, beta, prev_level, prev_trend)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(errors + last_errors > 0, (sse + last_sse) / (errors + last_errors), np.inf)
+    best = np.argmin(score, axis=0)[None]
+
+    def pick(values):
+        return np.take_along_axis(values, best, axis=0)[0]
+
+    return ForecastModel(keys, first_week, sums, counts, pick(alpha), pick(beta), pick(level), pick(trend),
+                         pick(prev_level), pick(prev_trend))
+
+
+def refresh(model, keys, first_week, sums, counts):
+    # ✅ Incremental update: when the new data only adds weeks (or completes the last one), the fitted
+    # parameters are kept and the state is advanced over the new weeks instead of refitting everything
+    old_weeks = model.n_weeks - 1
+    same_history = (
+        model.keys.equals(keys)
+        and model.first_week == first_week
+        and sums.shape[-1] >= model.n_weeks
+        and np.array_equal(model.counts[..., :old_weeks], counts[..., :old_weeks])
+        and np.allclose(model.sums[..., :old_weeks], sums[..., :old_weeks])
+    )
+    if not same_history:
+        return fit(keys, first_week, sums, counts)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = sums[..., old_weeks:] / counts[..., old_weeks:]
+    prev_level, prev_trend, _, _ = smooth(observed[..., :-1], model.alpha, model.beta, model.prev_level, model.prev_trend)
+    level, trend, _, _ = smooth(observed[..., -1:], model.alpha, model.beta, prev_level, prev_trend)
+    return ForecastModel(keys, first_week, sums, counts, model.alpha, model.beta, level, trend, prev_level, prev_trend)
+
+
+# 💾 **Persistence next to the published dataset, so every replica and restart reads the same fit**
+def _model_path(dataset_id):
+    return os.path.join(dataset_path(dataset_id), f"forecast-v{FORECAST_VERSION}.npz")
+
+
+def save_model(dataset_id, model):
+    folder = dataset_path(dataset_id)
+    fd, tmp_path = tempfile.mkstemp(prefix=".forecast-", suffix=".npz", dir=folder)
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            keys=model.keys[SERIES_KEYS].to_numpy(dtype=str),
+            first_week=model.first_week,
+            **{name: getattr(model, name) for name in
+               ("sums", "counts", "alpha", "beta", "level", "trend", "prev_level", "prev_trend")},
+        )
+    os.replace(tmp_path, _model_path(dataset_id))
+
+
+def load_model(dataset_id):
+    try:
+        stored = np.load(_model_path(dataset_id))
+    except OSError:
+        return None
+    with stored:
+        keys = pd.DataFrame(stored["keys"].astype(object), columns=SERIES_KEYS)
+        return ForecastModel(keys, int(stored["first_week"]), *(stored[name] for name in
+                             ("sums", "counts", "alpha", "beta", "level", "trend", "prev_level", "prev_trend")))
+
+
+@st.cache_resource(show_spinner=False)
+def _forecast_model(dataset_id, source):
+    model = load_model(dataset_id)
+    if model is None:
+        keys, first_week, sums, counts = weekly_sums(_mapped_dataset(dataset_id))
+        with _latest_lock:
+            previous = _latest_by_source.get(source)
+        model = refresh(previous, keys, first_week, sums, counts) if previous else fit(keys, first_week, sums, counts)
+        save_model(dataset_id, model)
+    with _latest_lock:
+        _latest_by_source[source] = model
+    return model
+
+
+def get_forecast_model(df):
+    # Pages only read the model: it is fitted once per dataset version
+    return _forecast_model(df.attrs["dataset_id"], df.attrs.get("source"))
+
+
+def forecast_table(model, horizon, metric="Delay"):
+    # 📌 One row per (series, week ahead), ready for plotting and export
+    m = FORECAST_METRICS.index(metric)
+    values = model.forecast(horizon)[m]
+    last_week = model.first_week + model.n_weeks - 1
+    table = model.keys.loc[model.keys.index.repeat(horizon)].reset_index(drop=True)
+    table["Week Ahead"] = np.tile(np.arange(1, horizon + 1), len(model.keys))
+    table["Week"] = [model.week_start(last_week + h) for h in table["Week Ahead"]]
+    table[f"Forecast {metric}"] = values.ravel()
+    table["alpha"] = np.repeat(model.alpha[m], horizon)
+    table["beta"] = np.repeat(model.beta[m], horizon)
+    return table
+
+
+def combined_series(model, series_mask, horizon, metric="Delay"):
+    # 🔹 History and forecast of the selected series combined, weighted by their order counts
+    m = FORECAST_METRICS.index(metric)
+    sums = model.sums[m][series_mask].sum(axis=0)
+    counts = model.counts[m][series_mask].sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        history = sums / counts
+    weeks = [model.week_start(model.first_week + w) for w in range(model.n_weeks)]
+
+    # Recent volume (last 8 weeks) weights every series' forecast
+    weights = model.counts[m][series_mask][:, -8:].sum(axis=1)
+    values = model.forecast(horizon)[m][series_mask]
+    usable = np.isfinite(values).all(axis=1) & (weights > 0)
+    forecast = (values[usable] * weights[usable, None]).sum(axis=0) / weights[usable].sum() if usable.any() else np.full(horizon, np.nan)
+    last_week = model.first_week + model.n_weeks - 1
+    future = [model.week_start(last_week + h) for h in range(1, horizon + 1)]
+    return pd.Series(history, index=weeks), pd.Series(forecast, index=future)
@@ -0,0 +1,131 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+from chart_labels import NODE_SEP, treemap_nodes
+
+# 🌳 **Department → Category → Product (→ Order Region) delay hierarchy**
+# One backend aggregate at the deepest level per selection; every node above it is rolled up from that
+# table and cached with it. The treemap only receives the focused node plus VISIBLE_DEPTH levels below,
+# so the figure stays small however many products there are; deeper levels are sliced out when a node
+# is picked in the drill-down selectbox (Streamlit sends no selection events for treemap clicks).
+HIERARCHY = ["Department Name", "Category Name", "Product Name"]
+REGION_LEVEL = "Order Region"
+VISIBLE_DEPTH = 2
+
+
+def hierarchy_levels(by_region=False):
+    return HIERARCHY + ([REGION_LEVEL] if by_region else [])
+
+
+def hierarchy_nodes(backend, selection, levels):
+    # ✅ Nodes sorted by id: the subtree of any node is then one contiguous slice of the table
+    def compute():
+        leaves = backend.aggregate(selection, list(levels), {
+            "total_delay": ("Delay", "sum"),
+            "orders": ("Delay", "count"),
+        })
+        leaves["avg_delay"] = leaves["total_delay"] / leaves["orders"]
+        # 🔹 Early shipments can make a total negative: rectangles are sized by the positive part only
+        leaves["size"] = leaves["total_delay"].clip(lower=0)
+        nodes = treemap_nodes(leaves, list(levels), "total_delay", "avg_delay", weight="orders", size="size")
+        return nodes.sort_values("id", ignore_index=True)
+
+    return backend.derive("delay_hierarchy", selection, compute, levels)
+
+
+def visible_nodes(nodes, path, depth=VISIBLE_DEPTH):
+    # 🔹 Two binary searches on the sorted ids instead of a scan: focus node + `depth` levels below it
+    if not path:
+        return nodes[nodes["depth"] <= depth]
+    focus = NODE_SEP.join(path)
+    ids = nodes["id"].to_numpy()
+    start = np.searchsorted(ids, focus, side="left")
+    stop = np.searchsorted(ids, focus + NODE_SEP + "\U0010ffff", side="right")
+    subtree = nodes.iloc[start:stop]
+    subtree = subtree[subtree["depth"] <= len(path) + depth].copy()
+    if len(subtree) == 0 or subtree["id"].iat[0] != focus:
+        return subtree.iloc[:0]
+    subtree["parent"] = subtree["parent"].where(subtree["id"] != focus, "")  # the focus becomes the root
+    return subtree
+
+
+def node_path(node_id):
+    return tuple(node_id.split(NODE_SEP)) if node_id else ()
+
+
+def child_nodes(nodes, path):
+    # The nodes one level below the focus: the choices of the drill-down selectbox
+    subtree = visible_nodes(nodes, path, depth=1)
+    return subtree[subtree["depth"] == len(path) + 1]
+
+
+def build_hierarchy_treemap(nodes):
+    fig = go.Figure(go.Treemap(
+        ids=nodes["id"],
+        parents=nodes["parent"],
+        labels=nodes["label"],
+        values=nodes["size"],  # 🔹 Size based on total accumulated delay
+        branchvalues="total",
+        marker=dict(
+            colors=nodes["color"],  # 🔹 Color based on average delay
+            colorscale="RdBu_r",  # 🔹 Aesthetic color scale (Red-Blue reverse)
+            showscale=True,
+            line=dict(width=1.5, color="black"),  # 🔹 Add black borders
+            colorbar=dict(
+                title="Average Delay (days)",
+                tickvals=[nodes["color"].min(), nodes["color"].max()],
+                ticktext=["Low", "High"],
+            ),
+        ),
+        text=nodes["text"],  # 🔹 Name + total delay + percentage, preformatted
+        texttemplate="%{text}",
+        hovertext=nodes["hover"],
+        hovertemplate="%{hovertext}<extra></extra>",
+        maxdepth=VISIBLE_DEPTH + 1,
+    ))
+    fig.update_layout(margin=dict(t=40, l=10, r=10, b=10))
+    return fig
+
+
+def _drill(select_key, path_key):
+    # A node picked in the selectbox becomes the focus
+    node_id = st.session_state[select_key]
+    if node_id:
+        st.session_state[path_key] = node_path(node_id)
+
+
+def show_hierarchy_treemap(backend, selection, levels, key):
+    # 📊 Drill-down treemap: the drill path lives in session state, one level is loaded per pick
+    path_key = f"{key}_path"
+    nodes = hierarchy_nodes(backend, selection, tuple(levels))
+    path = st.session_state.get(path_key, ())
+    visible = visible_nodes(nodes, path)
+    if path and visible.empty:  # the focused node was filtered out
+        path = st.session_state[path_key] = ()
+        visible = visible_nodes(nodes, path)
+    if path and len(path) >= len(levels):  # already at the deepest level
+        path = st.session_state[path_key] = path[:-1]
+        visible = visible_nodes(nodes, path)
+
+    # 🔹 Breadcrumb back to any level above the focus
+    crumbs = ["All"] + [" › ".join(path[:i + 1]) for i in range(len(path))]
+    target = st.radio("Level", range(len(crumbs)), index=len(path), format_func=crumbs.__getitem__,
+                      horizontal=True, key=f"{key}_crumbs_{NODE_SEP.join(path)}", label_visibility="collapsed")
+    if target != len(path):
+        st.session_state[path_key] = path[:target]
+        st.rerun()
+
+    # 🔹 Drill one level down: the deepest level is never focused (a leaf has nothing below it)
+    if len(path) < len(levels) - 1:
+        children = child_nodes(nodes, path)
+        labels = dict(zip(children["id"], children["label"]))
+        select_key = f"{key}_drill_{NODE_SEP.join(path)}"
+        st.selectbox(f"Drill into {levels[len(path)]}", [None] + list(labels),
+                     format_func=lambda node_id: "—" if node_id is None else labels[node_id],
+                     key=select_key, on_change=_drill, args=(select_key, path_key))
+
+    st.plotly_chart(build_hierarchy_treemap(visible), use_container_width=True)
+    st.caption(f"Showing {len(visible):,} of {len(nodes):,} nodes · "
+               f"{levels[len(path)] if len(path) < len(levels) else levels[-1]} level · "
+               "shares are of the whole selection's total delay")
+    return nodes, visible
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# ⏳ **Delay metrics computed once at ingest, with NumPy kernels writing into typed buffers**
+DELAY_CATEGORIES = ["Low", "Medium", "High"]
+
+
+def delay_days(real, scheduled):
+    # 🔹 int16 when both columns are whole numbers without gaps, float32 (with NaN) otherwise
+    real = np.asarray(real)
+    scheduled = np.asarray(scheduled)
+    if real.dtype.kind in "iu" and scheduled.dtype.kind in "iu":
+        out = np.empty(len(real), dtype=np.int16)
+    else:
+        out = np.empty(len(real), dtype=np.float32)
+    np.subtract(real, scheduled, out=out, casting="unsafe")
+    return out
+
+
+def delay_category_codes(delay):
+    # 🔹 Same bins as pd.cut(bins=[-inf, -1, 1, inf]): Low <= -1 < Medium <= 1 < High, -1 for missing
+    codes = np.greater(delay, -1).astype(np.int8)
+    codes += np.greater(delay, 1)
+    if delay.dtype.kind == "f":
+        codes[np.isnan(delay)] = -1
+    return codes
+
+
+def profit_margin(profit, sales):
+    # 🔹 Profit / Sales * 100, NaN where there are no sales instead of +/- inf
+    profit = np.asarray(profit, dtype=np.float64)
+    sales = np.asarray(sales, dtype=np.float64)
+    out = np.full(len(sales), np.nan)
+    np.divide(profit, sales, out=out, where=sales != 0)
+    np.multiply(out, 100, out=out)
+    return out
+
+
+def add_delay_columns(df):
+    # ✅ Called once by the dataset registry, before the columns are published
+    delay = delay_days(df["Days for shipping (real)"], df["Days for shipment (scheduled)"])
+    df["Delay"] = delay
+    df["Delay Category"] = pd.Categorical.from_codes(delay_category_codes(delay), categories=DELAY_CATEGORIES)
+    if "Order Profit Per Order" in df.columns and "Sales" in df.columns:
+        df["Profit Margin"] = profit_margin(df["Order Profit Per Order"], df["Sales"])
+    return df
+
+
+# 📌 **Per-filter views: min-max normalization into a buffer reused across reruns**
+def reusable_buffer(store, key, size, dtype=np.float32):
+    buffer = store.get(key)
+    if buffer is None or len(buffer) < size or buffer.dtype != dtype:
+        buffer = np.empty(max(size, 1), dtype=dtype)
+        store[key] = buffer
+    return buffer[:size]
+
+
+def normalize(values, out):
+    # 🔹 (x - min) / (max - min) written into `out`, 0.5 everywhere when there is no spread
+    values = np.asarray(values)
+    if len(values) == 0:
+        return out
+    low = np.nanmin(values)
+    high = np.nanmax(values)
+    if high == low:
+        out.fill(0.5)
+        return out
+    np.subtract(values, low, out=out, casting="unsafe")
+    np.divide(out, high - low, out=out)
+    return out
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+
+# 🗺️ **Grid index over Latitude/Longitude**
+# Rows are bucketed into CELL_DEG x CELL_DEG cells and sorted by cell id, so every cell is a
+# contiguous slice of `order`. A bounding box only touches the slices of the cells it covers.
+CELL_DEG = 1.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def haversine_km_scalar(lat1, lon1, lat2, lon2):
+    # Plain-float version, registered as a SQLite function by the query backend
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    return float(haversine_km(lat1, lon1, lat2, lon2))
+
+
+def lon_ranges(west, east):
+    # 🔹 Map bounds can run past +/-180 when zoomed out: split them into ranges inside [-180, 180]
+    if east - west >= 360:
+        return [(-180.0, 180.0)]
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    if west <= east:
+        return [(west, east)]
+    return [(west, 180.0), (-180.0, east)]
+
+
+def area_bounds(area):
+    # ✅ (south, north, lon ranges) covering a {"bbox": ...} or {"center": ..., "radius_km": ...} area
+    if "bbox" in area:
+        south, west, north, east = area["bbox"]
+        return max(south, -90.0), min(north, 90.0), lon_ranges(west, east)
+
+    # 🔹 Exact bounding box of a spherical cap of angular radius d: lat +/- d, lon +/- asin(sin d / cos lat)
+    lat, lon = area["center"]
+    d = area["radius_km"] / EARTH_RADIUS_KM
+    south, north = max(lat - math.degrees(d), -90.0), min(lat + math.degrees(d), 90.0)
+    cos_lat = math.cos(math.radians(lat))
+    if south == -90.0 or north == 90.0 or math.sin(d) >= cos_lat:
+        return south, north, [(-180.0, 180.0)]
+    dlon = math.degrees(math.asin(math.sin(d) / cos_lat))
+    return south, north, lon_ranges(lon - dlon, lon + dlon)
+
+
+def describe_area(area):
+    if "bbox" in area:
+        south, west, north, east = area["bbox"]
+        return f"lat {south:.2f} to {north:.2f}, lon {west:.2f} to {east:.2f}"
+    lat, lon = area["center"]
+    return f"{area['radius_km']:g} km around ({lat:.2f}, {lon:.2f})"
+
+
+class GeoIndex:
+    def __init__(self, lat, lon, cell_deg=CELL_DEG):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.n_rows = int(math.ceil(180 / cell_deg))
+        self.n_cols = int(math.ceil(360 / cell_deg))
+
+        valid = np.flatnonzero(np.isfinite(self.lat) & np.isfinite(self.lon))
+        cells = self._cell_row(self.lat[valid]) * self.n_cols + self._cell_col(self.lon[valid])
+        order = np.argsort(cells, kind="stable")
+        self.order = valid[order]
+        self.starts = np.searchsorted(cells[order], np.arange(self.n_rows * self.n_cols + 1))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell_row(self, lat):
+        return np.clip(((np.asarray(lat) + 90) // self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cell_col(self, lon):
+        return np.clip(((np.asarray(lon) + 180) // self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+
+    def _candidates(self, south, north, ranges):
+        r0, r1 = self._cell_row(south), self._cell_row(north)
+        slices = []
+        for west, east in ranges:
+            c0, c1 = self._cell_col(west), self._cell_col(east)
+            for r in range(int(r0), int(r1) + 1):
+                first = self.starts[r * self.n_cols + c0]
+                last = self.starts[r * self.n_cols + c1 + 1]
+                if last > first:
+                    slices.append(self.order[first:last])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def query_rows(self, area):
+        # 📌 Sorted row positions inside the area; only the covered cells are scanned
+        south, north, ranges = area_bounds(area)
+        rows = self._candidates(south, north, ranges)
+        lat, lon = self.lat[rows], self.lon[rows]
+        keep = (lat >= south) & (lat <= north)
+        keep &= np.logical_or.reduce([(lon >= west) & (lon <= east) for west, east in ranges])
+        if "center" in area:
+            center_lat, center_lon = area["center"]
+            keep &= haversine_km(center_lat, center_lon, lat, lon) <= area["radius_km"]
+        return np.sort(rows[keep])
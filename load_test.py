@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 🚦 **Load test: N simulated analysts replaying navigation and filter changes against `dashboard000`**
+# Every session is a headless Streamlit AppTest in this process, so the numbers describe one server
+# process serving N concurrent sessions. Usage:
+#   python load_test.py --sessions 8 --rows 200000 --output load_report.json [--scenario steps.json]
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 📌 **Scenario steps**
+#   {"page": "<navigation entry>"}
+#   {"multiselect": "<label>", "value": [...]} | {"multiselect": "<label>", "sample": k} | {"multiselect": "<label>", "all": true}
+#   {"selectbox": "<label>", "value": ...}  |  {"slider": "<label>", "value": ...}
+DEFAULT_SCENARIO = [
+    {"page": "Region & Mode"},
+    {"multiselect": "Select Year", "sample": 1},
+    {"multiselect": "Market", "sample": 2},
+    {"multiselect": "Shipping Mode", "value": ["Standard Class"]},
+    {"multiselect": "Market", "all": True},
+    {"page": "Product Categories & Delays"},
+    {"multiselect": "Select Department", "sample": 2},
+    {"page": "Shipping Delays & Profitability"},
+    {"multiselect": "Type", "sample": 2},
+    {"page": "Region & Mode"},
+]
+
+
+def find_widget(at, kind, label):
+    for widget in getattr(at.sidebar, kind):
+        if widget.label == label:
+            return widget
+    return None
+
+
+def apply_step(at, step, rng):
+    # ✅ Sets the widget described by `step`; returns a short action name, or None if the widget is absent
+    if "page" in step:
+        at.sidebar.radio[0].set_value(step["page"])
+        return f"page:{step['page']}"
+
+    for kind in ("multiselect", "selectbox", "slider"):
+        if kind in step:
+            widget = find_widget(at, kind, step[kind])
+            if widget is None:
+                return None
+            if kind == "multiselect" and step.get("all"):
+                widget.set_value(list(widget.options))
+            elif kind == "multiselect" and "sample" in step:
+                widget.set_value(rng.sample(list(widget.options), min(step["sample"], len(widget.options))))
+            else:
+                widget.set_value(step["value"])
+            return f"{kind}:{step[kind]}"
+    raise ValueError(f"Unknown scenario step: {step}")
+
+
+def run_session(session_id, steps, seed, think_time, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(APP_DIR, "dashboard000.py"), default_timeout=timeout)
+    page = "Home"
+    samples = []
+
+    def timed_run(action):
+        start = time.perf_counter()
+        at.run()
+        samples.append({
+            "session": session_id,
+            "action": action,
+            "page": page,
+            "latency_s": time.perf_counter() - start,
+            "errors": [str(e.value) for e in at.exception],
+        })
+
+    timed_run("open")
+    for step in steps:
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+        action = apply_step(at, step, rng)
+        if action is None:
+            continue
+        if "page" in step:
+            page = step["page"]
+        timed_run(action)
+    return samples
+
+
+def latency_stats(latencies):
+    values = np.asarray(latencies)
+    if len(values) == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "mean_s": float(values.mean()),
+        "p50_s": float(p50),
+        "p95_s": float(p95),
+        "p99_s": float(p99),
+        "max_s": float(values.max()),
+    }
+
+
+def run_load_test(sessions, scenarios, think_time=0.0, seed=0, timeout=600):
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        futures = [
+            pool.submit(run_session, i, scenarios[i % len(scenarios)], seed + i, think_time, timeout)
+            for i in range(sessions)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+    wall = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu_user = usage_after.ru_utime - usage_before.ru_utime
+    cpu_system = usage_after.ru_stime - usage_before.ru_stime
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_rss_mb = usage_after.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+    by_page = {}
+    for sample in samples:
+        by_page.setdefault(sample["page"], []).append(sample["latency_s"])
+
+    return {
+        "sessions": sessions,
+        "reruns": len(samples),
+        "failed_reruns": sum(1 for sample in samples if sample["errors"]),
+        "errors": sorted({error for sample in samples for error in sample["errors"]}),
+        "wall_s": wall,
+        "throughput_reruns_per_s": len(samples) / wall if wall else None,
+        "latency": latency_stats([sample["latency_s"] for sample in samples]),
+        "latency_by_page": {name: latency_stats(values) for name, values in sorted(by_page.items())},
+        "cpu": {
+            "user_s": cpu_user,
+            "system_s": cpu_system,
+            "utilization": (cpu_user + cpu_system) / wall if wall else None,
+        },
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def load_scenarios(path):
+    # A recorded file holds either one list of steps, or {"sessions": [[steps], [steps], ...]}
+    if path is None:
+        return [DEFAULT_SCENARIO]
+    with open(path, "r", encoding="utf-8") as f:
+        recorded = json.load(f)
+    return recorded["sessions"] if isinstance(recorded, dict) else [recorded]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay analyst sessions against dashboard000 and report rerun latency.")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated sessions")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows of synthetic orders (ignored with --dataset)")
+    parser.add_argument("--dataset", help="existing orders CSV instead of synthetic data")
+    parser.add_argument("--scenario", help="JSON file with recorded steps")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between steps, in seconds")
+    parser.add_argument("--backend", help="query backend (pandas, sqlite, duckdb)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600, help="per-rerun timeout, in seconds")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    import synthetic_orders
+
+    with tempfile.TemporaryDirectory(prefix="dashboard-load-") as workdir:
+        # 🔧 The app reads these when its modules are first imported by AppTest
+        dataset = args.dataset or synthetic_orders.write_orders_csv(os.path.join(workdir, "orders.csv"), args.rows, args.seed)
+        os.environ["DASHBOARD_DATASET_PATH"] = os.path.abspath(dataset)
+        os.environ.setdefault("DASHBOARD_DATA_DIR", os.path.join(workdir, "datasets"))
+        if "DASHBOARD_GEOJSON_PATH" not in os.environ:
+            os.environ["DASHBOARD_GEOJSON_PATH"] = synthetic_orders.write_country_geojson(
+                os.path.join(workdir, "countries.geo.json"), os.path.join(APP_DIR, "country_translation.json")
+            )
+        if args.backend:
+            os.environ["DASHBOARD_QUERY_BACKEND"] = args.backend
+        os.chdir(APP_DIR)
+
+        report = run_load_test(args.sessions, load_scenarios(args.scenario), args.think_time, args.seed, args.timeout)
+        report["dataset"] = {"path": args.dataset or "synthetic", "rows": None if args.dataset else args.rows}
+        report["backend"] = os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# ⏱️ **Performance regression check for the compute parts of the Delivery Delays, Product Categories and
+# Profitability pages (dashboard002/003/004)**
+# Every stage runs on fixed synthetic datasets with a cold result cache: the best of --repeats timed runs,
+# then one run under tracemalloc for the peak memory. Results are compared with the baselines stored in
+# perf_baselines.json. The check is the pytest suite, one test per (dataset, stage), with the diff table
+# in the terminal summary. It is opt-in (the numbers belong to the machine that recorded them), a plain
+# `pytest` run deselects it; this module also runs it from the command line and refreshes the baselines:
+#   python -m pytest -m perf tests/test_perf_regression.py   # the check (or DASHBOARD_PERF_TESTS=1)
+#   python perf_regression.py                        # same comparison, exit status 1 on a regression
+#   python perf_regression.py --update               # record new baselines (after an intended change)
+#   python perf_regression.py --dataset small --tolerance 0.5 --output perf_report.json
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_PATH = os.path.join(APP_DIR, "perf_baselines.json")
+# name -> (rows, seed)
+DATASETS = {
+    "small": (20_000, 0),
+    "large": (200_000, 1),
+}
+# Relative slowdown / memory growth allowed before a stage fails
+TIME_TOLERANCE = float(os.environ.get("DASHBOARD_PERF_TOLERANCE", "0.25"))
+MEMORY_TOLERANCE = float(os.environ.get("DASHBOARD_PERF_MEMORY_TOLERANCE", "0.15"))
+# Differences below these are noise, whatever the ratio
+MIN_TIME_DELTA_S = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+# Each stage is repeated until it has run for at least this long
+MIN_MEASURE_S = 0.5
+# Baselines follow the machine speed (calibration) by at most this factor either way: the calibration
+# is noisy too, an unbounded factor would widen the time tolerance along with it
+MAX_SPEED_SCALE = float(os.environ.get("DASHBOARD_PERF_MAX_SPEED_SCALE", "1.1"))
+
+
+# 📌 **Context shared by the stages: one published dataset, its backend and the default page selections**
+class StageContext:
+    def __init__(self, name, rows, seed, backend_name):
+        import synthetic_orders
+        from dashboard002 import load_country_translation
+        from dashboard004 import PROFIT_COLUMNS
+        from dataset_registry import dataset_id_for, ingest_orders, open_dataset, publish
+        from query_backend import create_backend, make_selection
+
+        raw = synthetic_orders.make_orders(rows, seed)
+        self.data = raw.to_csv(index=False).encode("latin-1")
+        self.dataset_id = dataset_id_for(self.data)
+        publish(self.dataset_id, *ingest_orders(raw))
+        self.df = open_dataset(self.dataset_id)
+        self.df.attrs["dataset_id"] = self.dataset_id
+        self.inner = create_backend(backend_name, self.dataset_id, self.df)
+        self.country_translation = load_country_translation() or {}
+
+        # 🔹 What the pages query on first load: every date (no period filter) and every value of the
+        # small sidebar filters; plus the last quarter, a slice of the date-sorted rows
+        from date_index import DATE_COLUMN, DateIndex, quarter_range
+        last = DateIndex.build(self.df[DATE_COLUMN]).last()
+        filters = ["Type", "Category Name", "Department Name", "Market", "Order Region", "Product Name", "Shipping Mode"]
+        columns = {col: list(self.df[col].unique()) for col in filters if self.df[col].nunique() < 15}
+        self.selection = make_selection(columns=columns)
+        self.profit_selection = make_selection(columns=columns, not_null=PROFIT_COLUMNS, positive=["Days for shipment (scheduled)"])
+        self.quarter_selection = make_selection(columns=columns, dates=[quarter_range(last.year, last.quarter)])
+        self.name = name
+
+    def backend(self):
+        # ✅ Cold cache for every run: the stages measure the computation, not a cache hit
+        from query_backend import PandasBackend
+        from result_cache import CachedBackend, ResultCache
+
+        if isinstance(self.inner, PandasBackend):
+            self.inner._last = (None, None)  # forget the last filtered frame too
+        return CachedBackend(self.inner, self.dataset_id, ResultCache(disk_dir=None))
+
+    def rows(self, selection):
+        from query_backend import PandasBackend
+
+        rows = self.inner if isinstance(self.inner, PandasBackend) else PandasBackend(self.df)
+        return rows.select(selection)
+
+
+# 📊 **Stages** (each one is what a page computes on a rerun, without the Streamlit rendering)
+def stage_ingest(ctx, backend):
+    from data_validation import read_orders_csv
+    from dataset_registry import ingest_orders
+    ingest_orders(read_orders_csv(ctx.data))
+
+
+def stage_delivery_rows(ctx, backend):
+    import dashboard002 as page
+    from delay_kernels import normalize
+    df = ctx.rows(ctx.selection)
+    norm_delay = normalize(df["Delay"].to_numpy(), out=np.empty(len(df)))
+    colormap = page.delay_colormap(float(df["Delay"].min()), float(df["Delay"].max()), "")
+    page.build_heatmap(page.heat_points(df, norm_delay), colormap)
+
+
+def stage_quarter_rows(ctx, backend):
+    import dashboard002 as page
+    from delay_kernels import normalize
+    df = ctx.rows(ctx.quarter_selection)
+    norm_delay = normalize(df["Delay"].to_numpy(), out=np.empty(len(df)))
+    colormap = page.delay_colormap(float(df["Delay"].min()), float(df["Delay"].max()), "")
+    page.build_heatmap(page.heat_points(df, norm_delay), colormap)
+
+
+def stage_country_delays(ctx, backend):
+    import dashboard002 as page
+    page.query_country_delays(backend, ctx.selection, ctx.country_translation)
+
+
+def stage_delay_counts(ctx, backend):
+    import dashboard002 as page
+    page.build_delay_count_chart(backend, ctx.selection)
+
+
+def stage_delay_trend(ctx, backend):
+    import dashboard002 as page
+    page.build_delay_trend_chart(backend, ctx.selection)
+
+
+def stage_delivery_kpi(ctx, backend):
+    import dashboard002 as page
+    page.format_delivery_kpi(page.compute_delivery_kpi(backend, ctx.selection))
+
+
+def stage_hierarchy(ctx, backend):
+    from delay_hierarchy import build_hierarchy_treemap, hierarchy_levels, hierarchy_nodes, visible_nodes
+    nodes = hierarchy_nodes(backend, ctx.selection, tuple(hierarchy_levels()))
+    build_hierarchy_treemap(visible_nodes(nodes, ()))
+
+
+def stage_top_products(ctx, backend):
+    import dashboard003 as page
+    page.build_top_products_chart(backend, ctx.selection)
+
+
+def stage_bubble(ctx, backend):
+    import dashboard004 as page
+    page.build_bubble_chart(backend, ctx.profit_selection)
+
+
+def stage_segment_type(ctx, backend):
+    import dashboard004 as page
+    page.build_segment_type_chart(backend, ctx.profit_selection)
+
+
+def stage_correlations(ctx, backend):
+    import dashboard004 as page
+    df = ctx.rows(ctx.profit_selection)
+    page.compute_correlation_kpi(df.assign(**{"Delay Ratio": df["Delay"]}))
+
+
+STAGES = {
+    "ingest": stage_ingest,
+    "002.rows_heatmap": stage_delivery_rows,
+    "002.quarter_heatmap": stage_quarter_rows,
+    "002.country_delays": stage_country_delays,
+    "002.delay_counts": stage_delay_counts,
+    "002.delay_trend": stage_delay_trend,
+    "002.kpi": stage_delivery_kpi,
+    "003.hierarchy_treemap": stage_hierarchy,
+    "003.top_products": stage_top_products,
+    "004.bubble": stage_bubble,
+    "004.segment_type": stage_segment_type,
+    "004.correlations": stage_correlations,
+}
+
+
+def measure(ctx, stage, repeats, min_time=MIN_MEASURE_S):
+    # Best wall time of at least `repeats` runs (and at least `min_time` seconds of runs), then the
+    # tracemalloc peak of one more run. The minimum is the least noisy estimate on a shared machine:
+    # interference only ever makes a run slower.
+    stage(ctx, ctx.backend())  # warm-up: imports, first-touch of the mapped columns
+    times = []
+    while len(times) < repeats or sum(times) < min_time:
+        backend = ctx.backend()
+        start = time.perf_counter()
+        stage(ctx, backend)
+        times.append(time.perf_counter() - start)
+
+    backend = ctx.backend()
+    tracemalloc.start()
+    stage(ctx, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(float(np.min(times)), 6), "peak_mb": round(peak / (1024 * 1024), 3)}
+
+
+def calibrate(repeats=5, min_time=0.1):
+    # 🔹 Fixed NumPy + pandas workload timed like a stage. It runs before every stage, interleaved with
+    # them, and the median over the run says how fast this machine is now compared with the baselines
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500_000)
+    keys = pd.Series(rng.integers(0, 1_000, len(values)))
+
+    def workload():
+        np.sort(values)
+        pd.DataFrame({"key": keys, "value": values}).groupby("key")["value"].agg(["sum", "mean"])
+
+    times = []
+    while len(times) < repeats or sum(times) < min_time:
+        start = time.perf_counter()
+        workload()
+        times.append(time.perf_counter() - start)
+    return round(float(np.min(times)), 6)
+
+
+def environment():
+    import pandas as pd
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def speed_factor(calibration_s, entry):
+    # ✅ Calibration now over the one stored with the baselines, clamped to MAX_SPEED_SCALE
+    if not calibration_s or not entry.get("calibration_s"):
+        return 1.0
+    return min(max(calibration_s / entry["calibration_s"], 1 / MAX_SPEED_SCALE), MAX_SPEED_SCALE)
+
+
+def _change(current, baseline):
+    return (current - baseline) / baseline if baseline else None
+
+
+def compare(results, baselines, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE, calibration_s=None):
+    # ✅ One row per (dataset, stage): the numbers, their relative change and a status.
+    # Baseline times are scaled by the calibration time now over the one recorded with them.
+    rows = []
+    for dataset, stages in results.items():
+        entry = baselines.get("datasets", {}).get(dataset, {})
+        stored = entry.get("stages", {})
+        speed = speed_factor(calibration_s, entry)
+        for stage, current in stages.items():
+            baseline = stored.get(stage)
+            row = {"dataset": dataset, "stage": stage, "seconds": current["seconds"], "peak_mb": current["peak_mb"]}
+            if baseline is None:
+                rows.append(dict(row, status="new"))
+                continue
+            expected = baseline["seconds"] * speed
+            time_change = _change(current["seconds"], expected)
+            memory_change = _change(current["peak_mb"], baseline["peak_mb"])
+            slower = (time_change is not None and time_change > time_tolerance
+                      and current["seconds"] - expected > MIN_TIME_DELTA_S)
+            bigger = (memory_change is not None and memory_change > memory_tolerance
+                      and current["peak_mb"] - baseline["peak_mb"] > MIN_MEMORY_DELTA_MB)
+            status = "REGRESSION" if slower or bigger else "faster" if time_change is not None and time_change < -time_tolerance else "ok"
+            rows.append(dict(
+                row,
+                baseline_seconds=expected,
+                baseline_peak_mb=baseline["peak_mb"],
+                time_change=time_change,
+                memory_change=memory_change,
+                speed=speed,
+                status=status,
+            ))
+    return rows
+
+
+def format_table(rows):
+    def pct(value):
+        return "" if value is None else f"{value * 100:+.1f}%"
+
+    def num(value, fmt):
+        return "" if value is None else format(value, fmt)
+
+    header = ["dataset", "stage", "expected ms", "ms", "Δ time", "base MB", "MB", "Δ mem", "status"]
+    lines = [[
+        row["dataset"], row["stage"],
+        num(row["baseline_seconds"] * 1000 if "baseline_seconds" in row else None, ".1f"), f"{row['seconds'] * 1000:.1f}",
+        pct(row.get("time_change")),
+        num(row.get("baseline_peak_mb"), ".1f"), f"{row['peak_mb']:.1f}", pct(row.get("memory_change")),
+        row["status"],
+    ] for row in rows]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *lines)]
+    return "\n".join(
+        "  ".join(str(cell).ljust(width) if i < 2 else str(cell).rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in [header, ["-" * width for width in widths]] + lines
+    )
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def workspace():
+    # 🔧 Datasets and database files of the run go to a temporary folder (the stages' result caches
+    # are in memory); the pages' relative paths (country_translation.json) resolve from APP_DIR
+    import dataset_registry
+    import query_backend
+    saved = dataset_registry.DATA_DIR, query_backend.DATA_DIR, os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="dashboard-perf-") as workdir:
+        dataset_registry.DATA_DIR = query_backend.DATA_DIR = os.path.join(workdir, "datasets")
+        os.chdir(APP_DIR)
+        try:
+            yield workdir
+        finally:
+            dataset_registry.DATA_DIR, query_backend.DATA_DIR = saved[:2]
+            os.chdir(saved[2])
+
+
+class PerfRun:
+    # ✅ One run of the check, shared by the pytest suite (tests/test_perf_regression.py) and the command
+    # line: stage contexts, measurements interleaved with calibration samples, comparison rows
+    def __init__(self, baselines, backend_name="pandas", repeats=5,
+                 time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+        self.baselines = baselines
+        self.backend_name = backend_name
+        self.repeats = repeats
+        self.time_tolerance = time_tolerance
+        self.memory_tolerance = memory_tolerance
+        self.contexts = {}
+        self.results = {}
+        self.calibration = []
+
+    def context(self, dataset):
+        if dataset not in self.contexts:
+            rows, seed = DATASETS[dataset]
+            self.contexts[dataset] = StageContext(dataset, rows, seed, self.backend_name)
+        return self.contexts[dataset]
+
+    def calibration_s(self):
+        # Median of the samples taken between the stages: one slow or fast moment moves it little
+        return float(np.median(self.calibration)) if self.calibration else None
+
+    def measure(self, dataset, stage):
+        # 🔹 Measuring a stage again keeps the best of both measurements
+        self.calibration.append(calibrate())
+        current = measure(self.context(dataset), STAGES[stage], self.repeats)
+        previous = self.results.setdefault(dataset, {}).get(stage)
+        if previous is not None:
+            current = {key: min(value, previous[key]) for key, value in current.items()}
+        self.results[dataset][stage] = current
+        print(f"{'🔁' if previous else '⏱️'} {dataset} {stage}: {current['seconds'] * 1000:.1f} ms", file=sys.stderr, flush=True)
+        return current
+
+    def rows(self, results=None):
+        return compare(results or self.results, self.baselines, self.time_tolerance, self.memory_tolerance,
+                       self.calibration_s())
+
+    def row(self, dataset, stage):
+        return self.rows({dataset: {stage: self.results[dataset][stage]}})[0]
+
+    def check(self, dataset, stage):
+        # A stage over the tolerance is measured once more before failing: a one-off stall of the
+        # machine should not fail the check, a real regression shows up in both measurements
+        self.measure(dataset, stage)
+        if self.row(dataset, stage)["status"] == "REGRESSION":
+            self.measure(dataset, stage)
+        return self.row(dataset, stage)
+
+    def warnings(self):
+        messages = []
+        if self.baselines.get("environment") and self.baselines["environment"] != environment():
+            messages.append("⚠️ Baselines were recorded on a different environment: "
+                            + json.dumps(self.baselines["environment"]))
+        calibration_s = self.calibration_s()
+        for name, entry in self.baselines.get("datasets", {}).items():
+            if name in self.results and calibration_s and entry.get("calibration_s"):
+                raw = calibration_s / entry["calibration_s"]
+                if not 1 / MAX_SPEED_SCALE <= raw <= MAX_SPEED_SCALE:
+                    messages.append(f"⚠️ {name}: the machine runs the calibration ×{raw:.2f} vs the baselines, beyond "
+                                    f"the ×{MAX_SPEED_SCALE:g} clamp: rerun on a quiet machine or record new baselines")
+        return messages
+
+    def summary(self):
+        rows = self.rows()
+        speeds = sorted({f"{row['dataset']} ×{row['speed']:.2f}" for row in rows if "speed" in row})
+        return (f"Calibration {self.calibration_s() * 1000:.1f} ms (median of {len(self.calibration)}) · baselines "
+                f"scaled by speed (at most ×{MAX_SPEED_SCALE:g}): {', '.join(speeds) or 'n/a'}\n" + format_table(rows))
+
+    def update_baselines(self):
+        # 🔹 Only the measured datasets/stages are replaced, the others keep their stored numbers
+        baselines, calibration_s = self.baselines, self.calibration_s()
+        baselines["environment"] = environment()
+        baselines["backend"] = self.backend_name
+        baselines["repeats"] = self.repeats
+        for name, measured in self.results.items():
+            entry = baselines.setdefault("datasets", {}).setdefault(name, {})
+            entry["rows"], entry["seed"] = DATASETS[name]
+            if entry.get("calibration_s"):
+                # Stages not measured this time are rescaled to the new calibration
+                for stage, stored in entry.get("stages", {}).items():
+                    if stage not in measured:
+                        stored["seconds"] *= speed_factor(calibration_s, entry)
+            entry["calibration_s"] = calibration_s
+            entry.setdefault("stages", {}).update(measured)
+        return baselines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the page computations and compare them with the stored baselines.")
+    parser.add_argument("--dataset", action="append", choices=sorted(DATASETS), help="dataset(s) to run (default: all)")
+    parser.add_argument("--stage", action="append", choices=list(STAGES), help="stage(s) to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="allowed relative memory growth")
+    parser.add_argument("--backend", default="pandas", help="query backend (pandas, sqlite, duckdb)")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--update", action="store_true", help="store the measured numbers as the new baselines")
+    parser.add_argument("--output", help="also write the comparison as JSON here")
+    args = parser.parse_args(argv)
+
+    datasets = args.dataset or list(DATASETS)
+    stages = args.stage or list(STAGES)
+    run = PerfRun(load_baselines(args.baselines), args.backend, args.repeats, args.tolerance, args.memory_tolerance)
+
+    with workspace():
+        for name in datasets:
+            for stage in stages:
+                run.measure(name, stage)
+        if args.update:
+            # 🔹 New baselines keep the best of two passes: a stall while recording would otherwise
+            # hide every later regression of that stage
+            suspects = [(name, stage) for name in datasets for stage in stages]
+        else:
+            # Suspects are measured again at the end of the run, away from whatever slowed them down
+            suspects = [(row["dataset"], row["stage"]) for row in run.rows() if row["status"] == "REGRESSION"]
+        for name, stage in suspects:
+            run.measure(name, stage)
+
+    for message in run.warnings():
+        print(message, file=sys.stderr)
+    print(run.summary())
+    rows = run.rows()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "backend": args.backend, "calibration_s": run.calibration_s(),
+                       "rows": rows}, f, indent=2)
+
+    if args.update:
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(run.update_baselines(), f, indent=2)
+            f.write("\n")
+        print(f"📌 Baselines written to {args.baselines}", file=sys.stderr)
+        return rows
+
+    regressions = [row for row in rows if row["status"] == "REGRESSION"]
+    if regressions:
+        print(f"❌ {len(regressions)} stage(s) regressed beyond the tolerance", file=sys.stderr)
+        raise SystemExit(1)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from dataset_registry import DATA_DIR, open_dataset
+from date_index import DATE_COLUMN, DateIndex, date_range, intersect_ranges, range_mask, year_ranges
+from geo_index import EARTH_RADIUS_KM, GeoIndex, area_bounds, haversine_km_scalar
+from result_cache import CachedBackend
+
+# 📦 **DuckDB is optional: the SQLite backend only needs the standard library**
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# 🔧 **Query backend used by the pages: "pandas" (default), "sqlite" or "duckdb"**
+QUERY_BACKEND = os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas")
+TABLE = "orders"
+INDEXED_COLUMNS = ["Shipping date (DateOrders)", "Shipping Year", "Market", "Order Region", "Customer Segment", "Latitude"]
+SQL_FUNCTIONS = {"mean": "AVG", "sum": "SUM", "count": "COUNT", "min": "MIN", "max": "MAX"}
+
+
+# 📌 **Date keys shared by every backend (materialized in the database files)**
+# Delay, Delay Category and Profit Margin already come from ingest (delay_kernels).
+def add_derived_columns(df):
+    df = df.copy(deep=False)
+    df["Shipping Year"] = df["Shipping date (DateOrders)"].dt.year
+    df["Shipping Month"] = df["Shipping date (DateOrders)"].dt.to_period("M").astype(str).where(
+        df["Shipping date (DateOrders)"].notna()
+    )
+    return df
+
+
+# 📌 **Selections**
+# A selection is the filter state of a page:
+#   {"dates": [[start, end], ...], "columns": {column: [values]}, "not_null": [columns], "positive": [columns],
+#    "area": None | {"bbox": [south, west, north, east]} | {"center": [lat, lon], "radius_km": r}}
+# Years are stored as half-open shipping-date ranges, like any other period (date_index).
+def make_selection(years=None, columns=None, not_null=None, positive=None, area=None, dates=None):
+    ranges = year_ranges(years) if years else []
+    if dates:
+        dates = [date_range(start, end) for start, end in dates]
+        # 🔹 Years and dates together keep their overlap; an empty range when they do not meet
+        ranges = (intersect_ranges(ranges, dates) or [[dates[0][0], dates[0][0]]]) if ranges else dates
+    return {
+        "dates": ranges,
+        "columns": {col: [_plain(v) for v in values] for col, values in (columns or {}).items()},
+        "not_null": list(not_null or []),
+        "positive": list(positive or []),
+        "area": area,
+    }
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _intersect_rows(rows, positions):
+    # 🔹 Both sides are sorted: a date slice is cut out of the positions with two binary searches
+    if rows is None:
+        return positions
+    if isinstance(rows, slice):
+        return positions[np.searchsorted(positions, rows.start):np.searchsorted(positions, rows.stop)]
+    return np.intersect1d(rows, positions, assume_unique=True)
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, df):
+        self.df = add_derived_columns(df)
+        self._lock = threading.Lock()
+        self._last = (None, None)
+        self._geo_index = None
+        self.date_index = DateIndex.build(self.df[DATE_COLUMN])
+
+    def geo_index(self):
+        # 🗺️ Built on the first map query, then shared by every session of this process
+        with self._lock:
+            if self._geo_index is None:
+                self._geo_index = GeoIndex(
+                    pd.to_numeric(self.df["Latitude"], errors="coerce"),
+                    pd.to_numeric(self.df["Longitude"], errors="coerce"),
+                )
+            return self._geo_index
+
+    def select(self, selection):
+        # 🔹 The last filtered frame is kept, the charts of one rerun share the same selection
+        key = repr(selection)
+        with self._lock:
+            if self._last[0] == key:
+                return self._last[1]
+
+        # 📅 The date ranges are sliced out first (binary search on the sorted dates), the other
+        # filters only scan the rows inside them
+        df, rows = self.df, None
+        if selection["dates"] and self.date_index is not None:
+            rows = self.date_index.rows(selection["dates"])
+        # 🗺️ The grid index returns row positions, intersected with the date rows instead of
+        # building a mask over the whole dataset
+        if selection["area"]:
+            rows = _intersect_rows(rows, self.geo_index().query_rows(selection["area"]))
+        if rows is not None:
+            df = df.iloc[rows]
+        mask = np.ones(len(df), dtype=bool)
+        if selection["dates"] and self.date_index is None:
+            mask &= range_mask(df[DATE_COLUMN], selection["dates"])
+        for col, values in selection["columns"].items():
+            mask &= df[col].isin(values).to_numpy()
+        for col in selection["not_null"]:
+            mask &= df[col].notna().to_numpy()
+        for col in selection["positive"]:
+            mask &= (df[col] > 0).to_numpy()
+        # ✅ Nothing else filtered: the date slice itself is returned, a view on the shared columns
+        filtered = df if mask.all() else df[mask]
+
+        with self._lock:
+            self._last = (key, filtered)
+        return filtered
+
+    def aggregate(self, selection, by, metrics):
+        df = self.select(selection)
+        # 🔹 Narrow ingest dtypes (int16 Delay) are widened before summing so totals cannot overflow
+        widen = {col: "int64" for col, func in metrics.values() if func == "sum" and df[col].dtype.kind in "iu"}
+        if widen:
+            df = df.astype(widen)
+        if not by:
+            return pd.DataFrame({name: [df[col].agg(func)] for name, (col, func) in metrics.items()})
+        return df.groupby(by, observed=True).agg(**metrics).reset_index()
+
+
+class SQLBackend:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def _connect(self):
+        # Read-only connection per query: safe across threads and replicas
+        if self.name == "duckdb":
+            return duckdb.connect(self.path, read_only=True)
+        con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        con.create_function("haversine_km", 4, haversine_km_scalar, deterministic=True)
+        return con
+
+    def _where(self, selection, by):
+        clauses, params = [], []
+        if selection["dates"]:
+            # 🔹 Range scans on the indexed, sorted date column
+            clauses.append("(" + " OR ".join([f"({_quote(DATE_COLUMN)} >= ? AND {_quote(DATE_COLUMN)} < ?)"]
+                                             * len(selection["dates"])) + ")")
+            params += [bound for date_range in selection["dates"] for bound in date_range]
+        for col, values in selection["columns"].items():
+            clauses.append(f'{_quote(col)} IN ({", ".join("?" * len(values))})')
+            params += values
+        for col in list(selection["not_null"]) + list(by):
+            clauses.append(f"{_quote(col)} IS NOT NULL")
+        for col in selection["positive"]:
+            clauses.append(f"{_quote(col)} > 0")
+        if selection["area"]:
+            area_sql, area_params = self._area(selection["area"])
+            clauses.append(area_sql)
+            params += area_params
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _area(self, area):
+        # 🔹 Bounding box first (uses the stored lat/lon order), exact great-circle test for radius areas
+        south, north, ranges = area_bounds(area)
+        sql = '"Latitude" BETWEEN ? AND ? AND (' + " OR ".join(['"Longitude" BETWEEN ? AND ?'] * len(ranges)) + ")"
+        params = [south, north] + [bound for lon_range in ranges for bound in lon_range]
+        if "center" in area:
+            lat, lon = area["center"]
+            if self.name == "duckdb":
+                sql += (
+                    f' AND 2 * {EARTH_RADIUS_KM} * asin(sqrt(pow(sin(radians("Latitude" - ?) / 2), 2)'
+                    ' + cos(radians(?)) * cos(radians("Latitude")) * pow(sin(radians("Longitude" - ?) / 2), 2))) <= ?'
+                )
+                params += [lat, lat, lon, area["radius_km"]]
+            else:
+                sql += ' AND haversine_km(?, ?, "Latitude", "Longitude") <= ?'
+                params += [lat, lon, area["radius_km"]]
+        return sql, params
+
+    def aggregate(self, selection, by, metrics):
+        where, params = self._where(selection, by)
+        select = [_quote(col) for col in by] + [
+            f"{SQL_FUNCTIONS[func]}({_quote(col)}) AS {_quote(name)}" for name, (col, func) in metrics.items()
+        ]
+        sql = f"SELECT {', '.join(select)} FROM {TABLE}{where}"
+        if by:
+            keys = ", ".join(_quote(col) for col in by)
+            sql += f" GROUP BY {keys} ORDER BY {keys}"
+
+        con = self._connect()
+        try:
+            if self.name == "duckdb":
+                return con.execute(sql, params).df()
+            return pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_database(name, dataset_id, df):
+    path = os.path.join(DATA_DIR, f"{dataset_id}.{name}")
+    if os.path.exists(path):
+        return path
+
+    # 🔹 Rows are loaded sorted by shipping date, which keeps the date zone maps / index tight
+    df = add_derived_columns(df)
+    df = df.sort_values("Shipping date (DateOrders)", kind="stable")
+    os.makedirs(DATA_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{dataset_id}-", suffix=f".{name}", dir=DATA_DIR)
+    os.close(fd)
+    os.remove(tmp_path)
+
+    if name == "duckdb":
+        con = duckdb.connect(tmp_path)
+        con.register("orders_df", df)
+        con.execute(f"CREATE TABLE {TABLE} AS SELECT * FROM orders_df")
+        con.unregister("orders_df")
+    else:
+        con = sqlite3.connect(tmp_path)
+        df.to_sql(TABLE, con, index=False, chunksize=50_000)
+    for i, col in enumerate(INDEXED_COLUMNS):
+        con.execute(f"CREATE INDEX idx_{i} ON {TABLE} ({_quote(col)})")
+    if name == "sqlite":
+        con.commit()
+    con.close()
+
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.remove(tmp_path)
+    return path
+
+
+def create_backend(name, dataset_id, df):
+    if name == "pandas":
+        return PandasBackend(df)
+    if name == "duckdb" and duckdb is None:
+        raise ImportError("The duckdb backend needs the `duckdb` package (pip install duckdb)")
+    if name not in ("sqlite", "duckdb"):
+        raise ValueError(f"Unknown query backend: {name}")
+    return SQLBackend(name, build_database(name, dataset_id, df))
+
+
+@st.cache_resource(show_spinner=False)
+def _backend(name, dataset_id):
+    return create_backend(name, dataset_id, open_dataset(dataset_id))
+
+
+def get_backend(df, name=None):
+    # ✅ One backend per process and dataset, built over the full (unfiltered) dataset;
+    # aggregates go through the shared result cache, so a selection seen before is not recomputed
+    dataset_id = df.attrs["dataset_id"]
+    return CachedBackend(_backend(name or QUERY_BACKEND, dataset_id), dataset_id)
+
+
+def select_orders(df, selection):
+    # ✅ Rows of a selection for the charts and exports that need them, filtered once by the pandas
+    # backend of the dataset; with the default backend, the aggregates of the rerun reuse that frame
+    rows = _backend("pandas", df.attrs["dataset_id"]).select(selection)
+    rows = rows.drop(columns=[col for col in rows.columns if col not in df.columns])
+    rows.attrs = dict(df.attrs)
+    return rows
+
+
+def filter_options(backend, selection, column):
+    # 🔹 Values of `column` left by the filters picked so far, from a cached aggregate: the option lists
+    # of a rerun no longer filter the page frame one column at a time
+    return backend.aggregate(selection, [column], {"orders": (column, "count")})[column].tolist()
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# 🗃️ **Cache of computed aggregates, keyed by dataset + normalized selection**
+# Memory tier: LRU bounded by DASHBOARD_CACHE_MAX_MB. Disk tier (optional): pickles under
+# DASHBOARD_CACHE_DIR, bounded by DASHBOARD_CACHE_DISK_MAX_MB, shared by replicas and restarts.
+CACHE_VERSION = "2"
+CACHE_MAX_BYTES = int(float(os.environ.get("DASHBOARD_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR")
+CACHE_DISK_MAX_BYTES = int(float(os.environ.get("DASHBOARD_CACHE_DISK_MAX_MB", "1024")) * 1024 * 1024)
+# Selection fields holding sets: their order never changes a result (multiselect values are under "columns")
+SET_FIELDS = ["not_null", "positive", "dates"]
+
+
+def _canonical(value):
+    # 🔹 Stable form: dict keys are sorted, numpy scalars become plain values, lists keep their order
+    # (bbox / center coordinates, group-by keys and metric specs are positional)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, set):
+        return _sorted_values(value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _sorted_values(values):
+    items = [_canonical(v) for v in values]
+    return sorted(items, key=lambda v: (type(v).__name__, json.dumps(v, sort_keys=True, default=str)))
+
+
+def canonical_selection(selection):
+    # ✅ Only the set-like parts of a selection are order-independent: the multiselect values of each
+    # column, the not_null / positive columns and the date ranges. The area stays as given.
+    selection = dict(selection)
+    selection["columns"] = {col: _sorted_values(values) for col, values in (selection.get("columns") or {}).items()}
+    for field in SET_FIELDS:
+        selection[field] = _sorted_values(selection.get(field) or [])
+    return selection
+
+
+def result_key(dataset_id, kind, *parts):
+    payload = json.dumps([CACHE_VERSION, dataset_id, kind, _canonical(list(parts))], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def aggregate_key(dataset_id, selection, by, metrics):
+    # 🔹 Metrics are (name, column, function) triples in their given order: the result columns follow
+    # it, so {"a": ..., "b": ...} and {"b": ..., "a": ...} are different frames
+    return result_key(dataset_id, "aggregate", canonical_selection(selection), list(by),
+                      [[name, *spec] for name, spec in metrics.items()])
+
+
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes) if value.dtype != object else 64 * len(value) + int(value.nbytes)
+    if isinstance(value, tuple):
+        return sum(_size_of(item) for item in value)
+    return 1024
+
+
+def _copy_of(value):
+    # Callers add columns to the frames they get back, the cached copy must stay untouched
+    if isinstance(value, tuple):
+        return tuple(_copy_of(item) for item in value)
+    return value.copy() if isinstance(value, (pd.DataFrame, pd.Series)) else value
+
+
+class ResultCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, disk_dir=CACHE_DIR, disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy_of(self._entries[key][0])
+
+        value = self._read_disk(key)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, value)
+            return _copy_of(value)
+        return None
+
+    def put(self, key, value):
+        self._remember(key, _copy_of(value))
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            self.misses += 1
+        # Computed outside the lock: two sessions may compute the same key once, never block each other
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remember(self, key, value):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # 🔹 Least recently used entries go first
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            value = pd.read_pickle(self._path(key))
+        except (OSError, EOFError, ValueError):
+            return None
+        try:
+            os.utime(self._path(key))  # Marks the entry as recently used for the disk LRU
+        except OSError:
+            pass  # Pruned meanwhile by another process sharing the directory
+        return value
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{key}-", dir=self.disk_dir)
+        os.close(fd)
+        pd.to_pickle(value, tmp_path)
+        os.replace(tmp_path, self._path(key))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".pkl"):
+                try:
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except OSError:
+                pass
+            total -= size
+
+
+# Process-wide cache shared by every session
+RESULTS = ResultCache()
+
+
+class CachedBackend:
+    # ✅ Wraps a query backend: identical (dataset, selection, query) triples are computed once
+    def __init__(self, backend, dataset_id, cache=RESULTS):
+        self.backend = backend
+        self.dataset_id = dataset_id
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def aggregate(self, selection, by, metrics):
+        key = aggregate_key(self.dataset_id, selection, by, metrics)
+        return self.cache.get_or_compute(key, lambda: self.backend.aggregate(selection, by, metrics))
+
+    def derive(self, name, selection, compute, *parts):
+        # 🔹 Tables derived from aggregates (labels, tooltips, chart nodes) share their cache entry lifetime:
+        # they are rebuilt only when the dataset, the selection or `parts` change
+        return self.cache.get_or_compute(result_key(self.dataset_id, name, canonical_selection(selection), *parts), compute)
@@ -0,0 +1,330 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# ⚠️ **Late-delivery risk: logistic regression on one-hot order features, in NumPy**
+# One-hot features are never materialized: each categorical feature is an array of codes, its
+# contribution to the logit is `weights[codes]` and its gradient is a bincount of the residuals.
+CATEGORICAL_FEATURES = ["Shipping Mode", "Order Region", "Category Name", "Customer Segment", "Type"]
+NUMERIC_FEATURES = ["Days for shipment (scheduled)"]
+TARGET = "Late_delivery_risk"
+RISK_VERSION = "1"
+L2 = 1.0
+ITERATIONS = 15
+HOLDOUT_SHARE = 0.2
+SCORE_CHUNK_ROWS = 250_000
+RISK_WORKERS = int(os.environ.get("DASHBOARD_RISK_WORKERS", str(min(os.cpu_count() or 1, 8))))
+# Below this many rows scoring stays in-process: serial scoring runs at ~12M rows/s, and each pool
+# round trip adds a pickled model, the workers' first touch of the columns and the scores sent back
+# through the pipe. On the benchmark machine the pool lost at every size from 0.3M to 4M rows; with
+# a single worker it is never used. `python risk_model.py --rows ...` reports the crossover.
+POOL_MIN_ROWS = int(os.environ.get("DASHBOARD_RISK_POOL_MIN_ROWS", "4000000"))
+# Orders that are still moving, when the export has an "Order Status" column
+OPEN_STATUSES = ["PENDING", "PENDING_PAYMENT", "PROCESSING", "ON_HOLD", "PAYMENT_REVIEW"]
+
+_executor = None
+_spawn_lock = threading.Lock()
+
+
+def target(df):
+    # 🔹 The export's own label when present, otherwise "delivered later than scheduled"
+    if TARGET in df.columns:
+        return pd.to_numeric(df[TARGET], errors="coerce").to_numpy(dtype=np.float64)
+    delay = pd.to_numeric(df["Delay"], errors="coerce").to_numpy(dtype=np.float64)
+    return np.where(np.isnan(delay), np.nan, (delay > 0).astype(np.float64))
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class RiskModel:
+    def __init__(self, vocabulary, weights, bias, means, scales, numeric_weights):
+        self.vocabulary = vocabulary            # feature -> list of known values
+        self.weights = weights                  # feature -> weights, last slot = unknown value (0)
+        self.bias = bias
+        self.means = means
+        self.scales = scales
+        self.numeric_weights = numeric_weights
+        self.metrics = {}
+
+    def codes(self, values, feature):
+        # 🔹 Known values -> their index, anything else -> the "unknown" slot
+        vocabulary = self.vocabulary[feature]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            lookup = pd.Index(vocabulary).get_indexer(values.cat.categories)
+            lookup = np.append(np.where(lookup < 0, len(vocabulary), lookup), len(vocabulary))
+            return lookup[values.cat.codes.to_numpy()]
+        codes = pd.Index(vocabulary).get_indexer(values)
+        return np.where(codes < 0, len(vocabulary), codes)
+
+    def numeric(self, df):
+        x = np.column_stack([pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64) for col in NUMERIC_FEATURES])
+        x = (x - self.means) / self.scales
+        return np.nan_to_num(x, nan=0.0)
+
+    def logit(self, df):
+        z = np.full(len(df), self.bias)
+        for feature in CATEGORICAL_FEATURES:
+            z += self.weights[feature][self.codes(df[feature], feature)]
+        z += self.numeric(df) @ self.numeric_weights
+        return z
+
+    def score(self, df):
+        return _sigmoid(self.logit(df)).astype(np.float32)
+
+    def coefficients(self):
+        rows = [(feature, value, float(w)) for feature in CATEGORICAL_FEATURES
+                for value, w in zip(self.vocabulary[feature], self.weights[feature])]
+        rows += [(col, "per std", float(w)) for col, w in zip(NUMERIC_FEATURES, self.numeric_weights)]
+        return pd.DataFrame(rows, columns=["Feature", "Value", "Weight"])
+
+
+def train(df, iterations=ITERATIONS, l2=L2, seed=0):
+    # ✅ Block-coordinate Newton: bias, then each feature's weights, then the numeric weights
+    y = target(df)
+    labelled = np.flatnonzero(np.isfinite(y))
+    holdout = np.random.default_rng(seed).random(len(labelled)) < HOLDOUT_SHARE
+    train_rows, test_rows = labelled[~holdout], labelled[holdout]
+    train_df = df.iloc[train_rows]
+    y_train = y[train_rows]
+
+    vocabulary = {f: sorted(train_df[f].dropna().unique().tolist()) for f in CATEGORICAL_FEATURES}
+    numeric = np.column_stack([pd.to_numeric(train_df[c], errors="coerce").to_numpy(dtype=np.float64) for c in NUMERIC_FEATURES])
+    means = np.nanmean(numeric, axis=0)
+    scales = np.nanstd(numeric, axis=0)
+    scales[~(scales > 0)] = 1.0
+    model = RiskModel(vocabulary, {f: np.zeros(len(v) + 1) for f, v in vocabulary.items()},
+                      float(np.log((y_train.mean() + 1e-9) / (1 - y_train.mean() + 1e-9))), means, scales,
+                      np.zeros(len(NUMERIC_FEATURES)))
+
+    codes = {f: model.codes(train_df[f], f) for f in CATEGORICAL_FEATURES}
+    x = model.numeric(train_df)
+    z = np.full(len(y_train), model.bias)
+
+    def newton_step(index, size, weights):
+        # Gradient and curvature of one block, with the logit `z` kept up to date after each block
+        p = _sigmoid(z)
+        residual, curvature = p - y_train, p * (1 - p)
+        if index is None:
+            return residual.sum() / (curvature.sum() + 1e-9)
+        grad = np.bincount(index, weights=residual, minlength=size) + l2 * weights
+        hess = np.bincount(index, weights=curvature, minlength=size) + l2
+        return grad / hess
+
+    for _ in range(iterations):
+        step = newton_step(None, 1, None)
+        model.bias -= step
+        z -= step
+        for f in CATEGORICAL_FEATURES:
+            step = newton_step(codes[f], len(model.weights[f]), model.weights[f])
+            step[-1] = 0.0  # the unknown slot stays neutral
+            model.weights[f] -= step
+            z -= step[codes[f]]
+        p = _sigmoid(z)
+        residual, curvature = p - y_train, p * (1 - p)
+        step = (x.T @ residual + l2 * model.numeric_weights) / ((x * x).T @ curvature + l2)
+        model.numeric_weights -= step
+        z -= x @ step
+
+    if len(test_rows):
+        p_test = model.score(df.iloc[test_rows]).astype(np.float64)
+        model.metrics = evaluate(y[test_rows], p_test)
+    model.metrics["train_rows"] = int(len(train_rows))
+    return model
+
+
+def evaluate(y, p):
+    # 📊 Holdout AUC (rank formula, ties averaged), log loss and accuracy at 0.5
+    ranks = pd.Series(p).rank().to_numpy()
+    positives = y == 1
+    n_pos, n_neg = positives.sum(), (~positives).sum()
+    auc = (ranks[positives].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg) if n_pos and n_neg else float("nan")
+    clipped = np.clip(p, 1e-7, 1 - 1e-7)
+    log_loss = -np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))
+    return {"holdout_rows": int(len(y)), "auc": float(auc), "log_loss": float(log_loss),
+            "accuracy": float(np.mean((p >= 0.5) == positives))}
+
+
+# 🚀 **Batch scoring: chunks of the memory-mapped dataset, scored in worker processes**
+_worker_datasets = {}
+
+
+def _init_worker():
+    # Imports once per worker, not on the first chunk
+    import dataset_registry  # noqa: F401
+
+
+def make_pool(workers=RISK_WORKERS):
+    # spawn: the Streamlit server is multi-threaded, forking it is not safe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker)
+
+
+@contextlib.contextmanager
+def _spawning_without_page():
+    # 🔹 spawn re-runs the `__main__` script in every new worker. Under Streamlit that is the page,
+    # which would render the dashboard in the worker (or fail there), so workers started inside this
+    # block see an empty `__main__`. Run as a script (the benchmark), this module is `__main__` itself.
+    main = sys.modules["__main__"]
+    if main is sys.modules[__name__]:
+        yield
+        return
+    with _spawn_lock:
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = make_pool()
+    return _executor
+
+
+def _score_rows(model, dataset_id, start, stop):
+    # Runs in a worker: maps the published columns (no copy through the pipe) and scores one slice
+    from dataset_registry import open_dataset
+    if dataset_id not in _worker_datasets:
+        _worker_datasets[dataset_id] = open_dataset(dataset_id)
+    return start, model.score(_worker_datasets[dataset_id].iloc[start:stop])
+
+
+def _bounds(n_rows, chunk_rows):
+    return [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+
+
+def score_dataset(model, df, chunk_rows=SCORE_CHUNK_ROWS, workers=None, min_rows=POOL_MIN_ROWS, executor=None):
+    # ✅ Large published datasets are scored across the process pool (one large chunk per worker),
+    # everything else chunk by chunk in-process
+    dataset_id = df.attrs.get("dataset_id")
+    scores = np.empty(len(df), dtype=np.float32)
+    pool_workers = RISK_WORKERS if workers is None else workers
+    if dataset_id is None or pool_workers < 2 or len(df) < max(min_rows, pool_workers):
+        for start, stop in _bounds(len(df), chunk_rows):
+            scores[start:stop] = model.score(df.iloc[start:stop])
+        return scores
+
+    bounds = _bounds(len(df), -(-len(df) // pool_workers))
+    owned = executor is None and workers is not None
+    if executor is None:
+        executor = _pool() if workers is None else make_pool(workers)
+    try:
+        # Workers are started on submit
+        with _spawning_without_page():
+            futures = [executor.submit(_score_rows, model, dataset_id, start, stop) for start, stop in bounds]
+        for future in futures:
+            start, chunk = future.result()
+            scores[start:start + len(chunk)] = chunk
+    finally:
+        if owned:
+            executor.shutdown()
+    return scores
+
+
+# 💾 **Model and scores are computed once per dataset version, then stored next to it**
+def _scores_path(dataset_id):
+    from dataset_registry import dataset_path
+    return os.path.join(dataset_path(dataset_id), f"risk-v{RISK_VERSION}.npy")
+
+
+def dataset_scores(model, dataset_id):
+    from dataset_registry import _mapped_dataset
+    path = _scores_path(dataset_id)
+    if not os.path.exists(path):
+        df = _mapped_dataset(dataset_id).copy(deep=False)
+        df.attrs["dataset_id"] = dataset_id
+        scores = score_dataset(model, df)
+        fd, tmp_path = tempfile.mkstemp(prefix=".risk-", suffix=".npy", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, scores)
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+# 🧪 **Benchmark: python risk_model.py --rows 300000 1000000 4000000 [--workers 4]**
+# Serial vs pooled scoring at each size (the pool is forced on); the crossover is the smallest size
+# where the pool is faster, the value to use for DASHBOARD_RISK_POOL_MIN_ROWS on that machine.
+def benchmark_scoring(model, df, executor, workers, chunk_rows=SCORE_CHUNK_ROWS):
+    start = time.perf_counter()
+    serial = score_dataset(model, df, chunk_rows, workers=0)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = score_dataset(model, df, chunk_rows, workers, min_rows=0, executor=executor)
+    pooled_s = time.perf_counter() - start
+    return {
+        "rows": len(df),
+        "serial": {"seconds": serial_s, "rows_per_s": len(df) / serial_s},
+        "pool": {"seconds": pooled_s, "rows_per_s": len(df) / pooled_s},
+        "max_abs_diff": float(np.max(np.abs(serial - pooled))) if len(df) else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the late-delivery risk model and report scoring throughput.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[300_000, 1_000_000, 4_000_000])
+    parser.add_argument("--workers", type=int, default=max(RISK_WORKERS, 2))
+    parser.add_argument("--chunk-rows", type=int, default=SCORE_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import synthetic_orders
+    with tempfile.TemporaryDirectory(prefix="dashboard-risk-") as workdir:
+        # Set before the registry is imported; spawned workers inherit it
+        os.environ["DASHBOARD_DATA_DIR"] = workdir
+        import dataset_registry
+
+        # Pool start-up (spawning and importing) is measured apart from steady-state scoring
+        start = time.perf_counter()
+        executor = make_pool(args.workers)
+        list(executor.map(int, range(args.workers)))
+        startup_s = time.perf_counter() - start
+
+        sizes, model, train_s = [], None, None
+        for rows in sorted(args.rows):
+            orders = dataset_registry.normalize_orders(synthetic_orders.make_orders(rows, args.seed))
+            dataset_id = dataset_registry.dataset_id_for(f"risk-benchmark:{rows}:{args.seed}".encode())
+            dataset_registry.publish(dataset_id, orders)
+            df = dataset_registry.open_dataset(dataset_id)
+            df.attrs["dataset_id"] = dataset_id
+            if model is None:
+                start = time.perf_counter()
+                model = train(df)
+                train_s = time.perf_counter() - start
+            # Warm-up: each worker maps the new dataset once, as the app's pool does
+            score_dataset(model, df, args.chunk_rows, args.workers, min_rows=0, executor=executor)
+            sizes.append(benchmark_scoring(model, df, executor, args.workers, args.chunk_rows))
+        executor.shutdown()
+
+    faster = [size["rows"] for size in sizes if size["pool"]["seconds"] < size["serial"]["seconds"]]
+    report = {
+        "workers": args.workers,
+        "cpu_count": os.cpu_count(),
+        "chunk_rows": args.chunk_rows,
+        "train_s": train_s,
+        "model": model.metrics if model is not None else {},
+        "pool_startup_s": startup_s,
+        "sizes": sizes,
+        "crossover_rows": faster[0] if faster else None,
+        "pool_min_rows": POOL_MIN_ROWS,
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# 🗞️ **Snapshot reports: the three analysis pages rendered to static HTML (and PNG) per filter spec**
+# The scheduler process ingests the dataset (and builds the SQL database) once. Worker processes map it,
+# keep their backend, GeoJSON and country names for every spec they render, and all aggregates go through
+# the result cache: per worker in memory, and shared by the workers on disk in DASHBOARD_CACHE_DIR (point it
+# and DASHBOARD_DATA_DIR at persistent folders to reuse them across runs). No network access: the GeoJSON
+# is a local file, plotly.js is written next to the reports and the maps are plotly map traces on a blank
+# style (no tiles, no Leaflet/CDN assets like the folium maps of the live page).
+# Usage:
+#   python snapshot_reports.py orders.csv --per Market --per "Customer Segment" --output reports/
+#   python snapshot_reports.py --rows 200000 --specs specs.json --format both --workers 4
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_WORKERS = int(os.environ.get("DASHBOARD_REPORT_WORKERS", str(min(os.cpu_count() or 1, 8))))
+PLOTLY_JS = "plotly.min.js"
+# 🗺️ Built-in plotly map style without any tile or glyph source: the reports render offline
+MAP_STYLE = "white-bg"
+MAP_HEIGHT = 500
+
+# 📌 **Filter specs**
+#   {"name": "Market - Europe", "years": [2017], "columns": {"Market": ["Europe"]}}
+#   {"name": "Q4 2017", "dates": [["2017-10-01", "2018-01-01"]]}
+# "years", "dates" (half-open shipping-date ranges) and "columns" are optional; a spec without them
+# covers every order.
+ALL_ORDERS = {"name": "All orders"}
+
+
+def expand_specs(df, per):
+    # 🔹 One spec per value of each `per` column, after the unfiltered one
+    specs = [ALL_ORDERS]
+    for col in per:
+        for value in sorted(df[col].dropna().unique()):
+            specs.append({"name": f"{col} - {value}", "columns": {col: [value]}})
+    return specs
+
+
+def load_specs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+    for i, spec in enumerate(specs):
+        spec.setdefault("name", f"Report {i + 1}")
+    return specs
+
+
+def spec_slug(spec):
+    return re.sub(r"[^a-z0-9]+", "-", spec["name"].lower()).strip("-") or "report"
+
+
+def describe_spec(spec):
+    from date_index import date_range, describe_ranges
+    parts = [f"Years: {', '.join(map(str, spec['years']))}"] if spec.get("years") else []
+    parts += [f"Dates: {describe_ranges([date_range(*r) for r in spec['dates']])}"] if spec.get("dates") else []
+    parts += [f"{col}: {', '.join(map(str, values))}" for col, values in (spec.get("columns") or {}).items()]
+    return " · ".join(parts) or "All orders"
+
+
+# 🧵 **Worker side: one context per dataset, kept for every spec the worker renders**
+_contexts = {}
+
+
+def _init_worker():
+    # Imports once per worker (pages, backends, plotting), not on the first report
+    os.chdir(APP_DIR)
+    import dashboard002, dashboard003, dashboard004  # noqa: F401
+
+
+def _context(dataset_id, backend_name):
+    if (dataset_id, backend_name) not in _contexts:
+        from dashboard002 import fetch_geojson, load_country_translation
+        from dataset_registry import open_dataset
+        from query_backend import PandasBackend, create_backend
+        from result_cache import CachedBackend
+
+        df = open_dataset(dataset_id)
+        df.attrs["dataset_id"] = dataset_id
+        inner = create_backend(backend_name, dataset_id, df)
+        _contexts[(dataset_id, backend_name)] = {
+            "backend": CachedBackend(inner, dataset_id),
+            # 🔹 Row-level charts (heatmap, correlations) need the filtered orders themselves
+            "rows": inner if isinstance(inner, PandasBackend) else PandasBackend(df),
+            "geojson": fetch_geojson(),
+            "country_translation": load_country_translation() or {},
+        }
+    return _contexts[(dataset_id, backend_name)]
+
+
+# 🗺️ **Offline maps: the two folium maps of the Delivery Delays page, as plotly map figures**
+def colormap_scale(colormap, steps=10):
+    # 🔹 The page's branca colormap sampled into a plotly colorscale, so both share their colors
+    return [[i / steps, colormap(colormap.vmin + (colormap.vmax - colormap.vmin) * i / steps)] for i in range(steps + 1)]
+
+
+def _outline_layer(geojson):
+    return {"source": geojson, "type": "line", "color": "black", "line": {"width": 0.5}, "below": "traces"}
+
+
+def report_heatmap(points, geojson, colormap_clients):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Densitymap(
+        lat=points[:, 0], lon=points[:, 1], z=points[:, 2], radius=10,
+        colorscale=[[0.0, "blue"], [0.5, "green"], [1.0, "red"]], showscale=False, hoverinfo="skip",
+    ))
+    # Legend of the delays themselves (the density colors follow the folium HeatMap gradient)
+    fig.add_trace(go.Scattermap(
+        lat=[None], lon=[None], mode="markers", hoverinfo="skip", showlegend=False,
+        marker={"color": [colormap_clients.vmin], "cmin": colormap_clients.vmin, "cmax": colormap_clients.vmax,
+                "colorscale": colormap_scale(colormap_clients), "showscale": True,
+                "colorbar": {"title": {"text": colormap_clients.caption}}},
+    ))
+    fig.update_layout(
+        map={"style": MAP_STYLE, "zoom": 3, "layers": [_outline_layer(geojson)],
+             "center": {"lat": float(points[:, 0].mean()), "lon": float(points[:, 1].mean())}},
+        height=MAP_HEIGHT, margin={"l": 0, "r": 0, "t": 0, "b": 0},
+    )
+    return fig
+
+
+def report_country_map(geojson, country_delay_dict, country_label_dict, colormap_countries):
+    import plotly.graph_objects as go
+    from chart_labels import NO_DATA
+
+    names = [feature["properties"]["name"] for feature in geojson["features"]]
+    known = [name for name in names if country_delay_dict.get(name) is not None]
+    missing = [name for name in names if country_delay_dict.get(name) is None]
+    common = {"geojson": geojson, "featureidkey": "properties.name", "marker": {"opacity": 0.3, "line": {"width": 0.5}},
+              "hovertemplate": "Country: %{location}<br>Avg Delay (days): %{text}<extra></extra>"}
+    fig = go.Figure([
+        go.Choroplethmap(locations=missing, z=[0] * len(missing), text=[NO_DATA] * len(missing),
+                         colorscale=[[0, "gray"], [1, "gray"]], showscale=False, **common),
+        go.Choroplethmap(locations=known, z=[country_delay_dict[name] for name in known],
+                         text=[country_label_dict.get(name, NO_DATA) for name in known],
+                         zmin=colormap_countries.vmin, zmax=colormap_countries.vmax,
+                         colorscale=colormap_scale(colormap_countries),
+                         colorbar={"title": {"text": colormap_countries.caption}}, **common),
+    ])
+    fig.update_layout(map={"style": MAP_STYLE, "zoom": 1, "center": {"lat": 20, "lon": 0}},
+                      height=MAP_HEIGHT, margin={"l": 0, "r": 0, "t": 0, "b": 0})
+    return fig
+
+
+def render_delivery_delays(ctx, spec):
+    import dashboard002 as page
+    from delay_kernels import normalize
+    from query_backend import make_selection
+
+    backend, country_translation = ctx["backend"], ctx["country_translation"]
+    selection = make_selection(spec.get("years"), spec.get("columns"), not_null=page.MAP_COLUMNS, dates=spec.get("dates"))
+    df = ctx["rows"].select(selection)
+    if df.empty:
+        return [("note", None, "No data available for the selected filters!")]
+
+    norm_delay = normalize(df["Delay"].to_numpy(), out=np.empty(len(df)))
+    df_country_avg = backend.derive(
+        "country_delays", selection,
+        lambda: page.query_country_delays(backend, selection, country_translation), country_translation,
+    )
+    colormap_clients = page.delay_colormap(float(df["Delay"].min()), float(df["Delay"].max()), "⏳ Delivery Delay (days)")
+    colormap_countries = page.delay_colormap(df_country_avg["Delay"].min(), df_country_avg["Delay"].max(),
+                                             "⏳ Average Delivery Delay (days)")
+    country_map = report_country_map(
+        ctx["geojson"],
+        dict(zip(df_country_avg["Order Country"], df_country_avg["Delay"])),
+        dict(zip(df_country_avg["Order Country"], df_country_avg["Delay Label"])),
+        colormap_countries,
+    )
+    return [
+        ("kpi", None, page.format_delivery_kpi(page.compute_delivery_kpi(backend, selection))),
+        ("map", "🗺️ Heatmap of Delivery Delays (Inbound Logistics)",
+         report_heatmap(page.heat_points(df, norm_delay), ctx["geojson"], colormap_clients)),
+        ("map", "🌍 Average Delivery Delays by Country (Outbound Logistics)", country_map),
+        ("figure", "📊 Delay Count by Shipping Mode", page.build_delay_count_chart(backend, selection)[0]),
+        ("figure", "📈 Average Delay Trend Over Time", page.build_delay_trend_chart(backend, selection)[0]),
+    ]
+
+
+def render_product_categories(ctx, spec):
+    import dashboard003 as page
+    from delay_hierarchy import build_hierarchy_treemap, hierarchy_levels, hierarchy_nodes, visible_nodes
+    from query_backend import make_selection
+
+    backend = ctx["backend"]
+    selection = make_selection(spec.get("years"), spec.get("columns"), dates=spec.get("dates"))
+    nodes = hierarchy_nodes(backend, selection, tuple(hierarchy_levels()))
+    if nodes.empty:
+        return [("note", None, "No data available for the selected filters!")]
+    fig = build_hierarchy_treemap(visible_nodes(nodes, ()))
+    fig.update_layout(title="📊 Delay Ratio by Department & Category", title_x=0.5)
+    return [
+        ("figure", "🌳 Delay Ratio by Department, Category & Product", fig),
+        ("figure", "🏆 Top 5 Products with Highest Delays", page.build_top_products_chart(backend, selection)[0]),
+    ]
+
+
+def render_profitability(ctx, spec):
+    import dashboard004 as page
+    from query_backend import make_selection
+
+    backend = ctx["backend"]
+    selection = make_selection(spec.get("years"), spec.get("columns"), not_null=page.PROFIT_COLUMNS,
+                               positive=["Days for shipment (scheduled)"],
+                               dates=spec.get("dates"))
+    df = ctx["rows"].select(selection)
+    if df.empty:
+        return [("note", None, "No data available for the selected filters!")]
+
+    sections = []
+    kpi = page.compute_correlation_kpi(df.assign(**{"Delay Ratio": df["Delay"]}))
+    if kpi is not None:
+        sections.append(("kpi", None, page.format_correlation_kpi(kpi)))
+    fig, _ = page.build_bubble_chart(backend, selection)
+    if fig is not None:
+        sections.append(("figure", "📈 Profit Margin vs. Delay Ratio by Customer Segment", fig))
+    if "Type" in df.columns:
+        sections.append(("figure", "💳 Profitability & Delays by Customer Segment & Payment Type",
+                         page.build_segment_type_chart(backend, selection)[0]))
+    return sections
+
+
+# page slug -> (title, renderer)
+PAGES = {
+    "delivery-delays": ("📊 Delivery Delays", render_delivery_delays),
+    "product-categories": ("📊 Relationship Between Product Categories and Delays", render_product_categories),
+    "profitability": ("📊 Impact of Shipping Delays on Profitability and Sales", render_profitability),
+}
+
+
+def _kpi_html(kpi):
+    label, value, delta = kpi
+    label = re.sub(r"[*`]", "", label)  # st.metric labels use Markdown
+    return (f'<div class="kpi"><div>{html.escape(label)}</div><strong>{html.escape(value)}</strong>'
+            f'<span>{html.escape(delta)}</span></div>')
+
+
+def write_page(path, title, spec, sections, plotly_js):
+    body = [f"<h1>{html.escape(title)}</h1>", f'<p class="spec">{html.escape(describe_spec(spec))}</p>']
+    for kind, name, payload in sections:
+        if name:
+            body.append(f"<h3>{html.escape(name)}</h3>")
+        if kind == "kpi":
+            body.append(_kpi_html(payload))
+        elif kind in ("figure", "map"):
+            body.append(payload.to_html(full_html=False, include_plotlyjs=False))
+        elif kind == "note":
+            body.append(f'<p class="note">{html.escape(payload)}</p>')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)} · {html.escape(spec["name"])}</title>'
+            f'<script src="{plotly_js}"></script><style>body{{font-family:sans-serif;margin:2em}}'
+            f'.kpi{{display:inline-block;padding:1em;border:1px solid #ddd}}.kpi strong{{display:block;font-size:2em}}'
+            f'.spec{{color:#666}}</style></head><body>{"".join(body)}</body></html>'
+        )
+
+
+def render_report(dataset_id, backend_name, spec, output_dir, formats):
+    # ✅ Runs in a worker: every page of one spec, returns the timings and the files written
+    start = time.perf_counter()
+    ctx = _context(dataset_id, backend_name)
+    folder = os.path.join(output_dir, spec_slug(spec))
+    os.makedirs(folder, exist_ok=True)
+    files, pages = [], {}
+    for slug, (title, render) in PAGES.items():
+        page_start = time.perf_counter()
+        sections = render(ctx, spec)
+        if "html" in formats:
+            path = os.path.join(folder, f"{slug}.html")
+            write_page(path, title, spec, sections, f"../{PLOTLY_JS}")
+            files.append(path)
+        if "png" in formats:
+            # 🔹 Plotly charts only: the maps are drawn with WebGL, which a headless export cannot count on
+            figures = [payload for kind, _, payload in sections if kind == "figure"]
+            for i, fig in enumerate(figures):
+                path = os.path.join(folder, f"{slug}-{i + 1}.png")
+                fig.write_image(path, width=1200, height=700)
+                files.append(path)
+        pages[slug] = time.perf_counter() - page_start
+    return {
+        "name": spec["name"],
+        "folder": folder,
+        "seconds": time.perf_counter() - start,
+        "pages_s": pages,
+        "files": len(files),
+        "worker": os.getpid(),
+    }
+
+
+def make_pool(workers=REPORT_WORKERS):
+    # spawn: same start method as the risk scoring pool, safe next to a threaded server
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker)
+
+
+def write_index(output_dir, results):
+    rows = "".join(
+        f'<tr><td>{html.escape(r["name"])}</td>'
+        + "".join(f'<td><a href="{os.path.basename(r["folder"])}/{slug}.html">{html.escape(title)}</a></td>'
+                  for slug, (title, _) in PAGES.items())
+        + (f'<td>{r["seconds"]:.2f} s</td></tr>' if "error" not in r else f'<td>failed: {html.escape(r["error"])}</td></tr>')
+        for r in results
+    )
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Snapshot reports</title></head><body>'
+                f"<h1>Snapshot reports</h1><table>{rows}</table></body></html>")
+
+
+def run_reports(dataset_id, backend_name, specs, output_dir, formats, workers):
+    import plotly.offline
+
+    os.makedirs(output_dir, exist_ok=True)
+    if "html" in formats:
+        # 🔹 plotly.js written once next to the reports, so they open offline
+        with open(os.path.join(output_dir, PLOTLY_JS), "w", encoding="utf-8") as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    # Pool start-up (spawning and importing the pages) is measured apart from rendering
+    start = time.perf_counter()
+    executor = make_pool(workers)
+    list(executor.map(int, range(workers)))
+    startup_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = {executor.submit(render_report, dataset_id, backend_name, spec, output_dir, formats): i
+               for i, spec in enumerate(specs)}
+    results = [None] * len(specs)
+    for future in as_completed(futures):
+        spec = specs[futures[future]]
+        try:
+            result = future.result()
+            print(f"✅ {result['name']}: {result['seconds']:.2f} s", flush=True)
+        except Exception as e:
+            # 🔹 One broken spec does not cost the other reports
+            result = {"name": spec["name"], "folder": os.path.join(output_dir, spec_slug(spec)), "error": repr(e)}
+            print(f"⚠️ {spec['name']}: {e!r}", flush=True)
+        results[futures[future]] = result
+    wall = time.perf_counter() - start
+    executor.shutdown()
+
+    if "html" in formats:
+        write_index(output_dir, results)
+    seconds = np.array([r["seconds"] for r in results if "error" not in r])
+    return {
+        "reports": len(results),
+        "failed": sum(1 for r in results if "error" in r),
+        "workers": workers,
+        "formats": sorted(formats),
+        "startup_s": startup_s,
+        "wall_s": wall,
+        "report_s": {
+            "mean": float(seconds.mean()) if len(seconds) else None,
+            "max": float(seconds.max()) if len(seconds) else None,
+            "total": float(seconds.sum()),
+        },
+        "per_report": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the dashboard pages to static snapshot reports, one per filter spec.")
+    parser.add_argument("dataset", nargs="?", help="orders CSV (synthetic orders when omitted)")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows of synthetic orders (ignored with a dataset)")
+    parser.add_argument("--specs", help="JSON file with a list of filter specs")
+    parser.add_argument("--per", action="append", default=[], metavar="COLUMN",
+                        help="one report per value of this column (repeatable), in addition to --specs")
+    parser.add_argument("--output", default="reports", help="output folder")
+    parser.add_argument("--format", choices=["html", "png", "both"], default="html")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    parser.add_argument("--backend", help="query backend (pandas, sqlite, duckdb)")
+    parser.add_argument("--geojson", help="local country GeoJSON (default: DASHBOARD_GEOJSON_PATH; required with a "
+                                          "dataset, synthetic shapes are only used for synthetic orders)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    formats = {"html", "png"} if args.format == "both" else {args.format}
+    if "png" in formats:
+        # 📦 PNG export is optional: HTML reports only need plotly itself
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            raise ImportError("PNG snapshots need the `kaleido` package (pip install kaleido)")
+
+    import synthetic_orders
+
+    output_dir = os.path.abspath(args.output)
+    with tempfile.TemporaryDirectory(prefix="dashboard-reports-") as workdir:
+        # 🔧 Set before the registry and the pages are imported; spawned workers inherit them
+        os.environ.setdefault("DASHBOARD_DATA_DIR", os.path.join(workdir, "datasets"))
+        os.environ.setdefault("DASHBOARD_CACHE_DIR", os.path.join(workdir, "cache"))
+        if args.geojson:
+            os.environ["DASHBOARD_GEOJSON_PATH"] = os.path.abspath(args.geojson)
+        elif "DASHBOARD_GEOJSON_PATH" not in os.environ:
+            # 🔹 Synthetic square "countries" only go with synthetic orders: a real dataset is never
+            # reported on made-up geography
+            if args.dataset:
+                parser.error("a dataset needs the local country GeoJSON: pass --geojson or set DASHBOARD_GEOJSON_PATH")
+            os.environ["DASHBOARD_GEOJSON_PATH"] = synthetic_orders.write_country_geojson(
+                os.path.join(workdir, "countries.geo.json"), os.path.join(APP_DIR, "country_translation.json")
+            )
+        if args.backend:
+            os.environ["DASHBOARD_QUERY_BACKEND"] = args.backend
+        os.chdir(APP_DIR)
+
+        from data_validation import ValidationError, read_orders_csv
+        from dataset_registry import MANIFEST, dataset_id_for, dataset_path, ingest_orders, open_dataset, publish
+        from query_backend import QUERY_BACKEND, create_backend
+
+        dataset = args.dataset or synthetic_orders.write_orders_csv(os.path.join(workdir, "orders.csv"), args.rows, args.seed)
+        with open(dataset, "rb") as f:
+            data = f.read()
+        dataset_id = dataset_id_for(data)
+        start = time.perf_counter()
+        if not os.path.exists(os.path.join(dataset_path(dataset_id), MANIFEST)):
+            try:
+                publish(dataset_id, *ingest_orders(read_orders_csv(data)))
+            except ValidationError as e:
+                parser.error(str(e))
+        df = open_dataset(dataset_id)
+        # 🔹 Built once here, so the workers do not race to create the database file
+        create_backend(QUERY_BACKEND, dataset_id, df)
+        ingest_s = time.perf_counter() - start
+
+        specs = (load_specs(args.specs) if args.specs else []) + (expand_specs(df, args.per) if args.per else [])
+        if not specs:
+            specs = [ALL_ORDERS]
+        report = run_reports(dataset_id, QUERY_BACKEND, specs, output_dir, formats, args.workers)
+        report["ingest_s"] = ingest_s
+        report["dataset"] = {"path": args.dataset or "synthetic", "rows": int(len(df))}
+        report["backend"] = QUERY_BACKEND
+
+    with open(os.path.join(output_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({key: value for key, value in report.items() if key != "per_report"}, indent=2))
+    if report["failed"]:
+        raise SystemExit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
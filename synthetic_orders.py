@@ -0,0 +1,126 @@
+import json
+import sys
+import numpy as np
+import pandas as pd
+
+# 🧪 **Synthetic shipment orders with the columns of the DataCo export used by the pages**
+# Used by the load test, the snapshot reports and the performance checks; fully offline.
+MARKETS = {
+    "USCA": ["East of USA", "West of USA", "US Center", "Canada"],
+    "LATAM": ["Central America", "South America", "Caribbean"],
+    "Europe": ["Western Europe", "Northern Europe", "Southern Europe", "Eastern Europe"],
+    "Pacific Asia": ["Eastern Asia", "Southeast Asia", "South Asia", "Oceania"],
+    "Africa": ["West Africa", "North Africa", "East Africa", "Southern Africa"],
+}
+COUNTRIES = {
+    "USCA": ["Estados Unidos", "Canada"],
+    "LATAM": ["México", "Brasil", "Guatemala", "Colombia"],
+    "Europe": ["Francia", "Alemania", "Reino Unido", "Países Bajos"],
+    "Pacific Asia": ["China", "India", "Japón", "Indonesia", "Australia"],
+    "Africa": ["Nigeria", "Marruecos", "Senegal"],
+}
+DEPARTMENTS = {
+    "Apparel": ["Cleats", "Men's Footwear", "Women's Apparel"],
+    "Fan Shop": ["Indoor/Outdoor Games", "Water Sports", "Camping & Hiking", "Fishing"],
+    "Golf": ["Golf Bags & Carts", "Golf Balls", "Golf Gloves"],
+    "Outdoors": ["Men's Golf Clubs", "Pet Supplies", "Soccer"],
+    "Technology": ["Computers", "Cameras", "Video Games"],
+}
+PRODUCTS_PER_CATEGORY = 6
+SHIPPING_MODES = {"Standard Class": 4, "Second Class": 2, "First Class": 1, "Same Day": 0}
+# Share of orders slipping by extra days, per market and shipping mode (gives the risk model a signal)
+MARKET_SLIP = {"USCA": 0.15, "LATAM": 0.3, "Europe": 0.25, "Pacific Asia": 0.4, "Africa": 0.45}
+MODE_SLIP = {"Standard Class": 0.0, "Second Class": 0.1, "First Class": 0.35, "Same Day": 0.05}
+SEGMENTS = ["Consumer", "Corporate", "Home Office"]
+PAYMENT_TYPES = ["DEBIT", "TRANSFER", "PAYMENT", "CASH"]
+
+
+def make_orders(n_rows, seed=0, start="2015-01-01", days=1096):
+    rng = np.random.default_rng(seed)
+
+    markets = np.array(list(MARKETS), dtype=object)
+    market = markets[rng.integers(0, len(markets), n_rows)]
+    region = np.empty(n_rows, dtype=object)
+    country = np.empty(n_rows, dtype=object)
+    for name in markets:
+        rows = np.flatnonzero(market == name)
+        region[rows] = np.array(MARKETS[name], dtype=object)[rng.integers(0, len(MARKETS[name]), len(rows))]
+        country[rows] = np.array(COUNTRIES[name], dtype=object)[rng.integers(0, len(COUNTRIES[name]), len(rows))]
+
+    categories = [(department, category) for department, names in DEPARTMENTS.items() for category in names]
+    category_index = rng.integers(0, len(categories), n_rows)
+    department = np.array([d for d, _ in categories], dtype=object)[category_index]
+    category = np.array([c for _, c in categories], dtype=object)[category_index]
+    product_names = np.array([f"{c} Model {i + 1}" for _, c in categories for i in range(PRODUCTS_PER_CATEGORY)], dtype=object)
+    product = product_names[category_index * PRODUCTS_PER_CATEGORY + rng.integers(0, PRODUCTS_PER_CATEGORY, n_rows)]
+
+    # 🚚 Real shipping days drift around the scheduled days, slower modes drift more
+    modes = np.array(list(SHIPPING_MODES), dtype=object)
+    mode_index = rng.choice(len(modes), n_rows, p=[0.6, 0.2, 0.15, 0.05])
+    scheduled = np.array(list(SHIPPING_MODES.values()))[mode_index]
+    slip = np.array([MARKET_SLIP[m] for m in markets])[pd.Categorical(market, categories=markets).codes]
+    slip += np.array([MODE_SLIP[m] for m in modes])[mode_index]
+    real = np.clip(scheduled + rng.integers(-1, 3, n_rows) + (rng.random(n_rows) < slip) * rng.integers(0, 3, n_rows), 0, 6)
+
+    sales = np.round(rng.gamma(2.0, 90.0, n_rows) + 10, 2)
+    profit_ratio = np.round(rng.normal(0.12, 0.2, n_rows).clip(-0.8, 0.5), 2)
+    profit = np.round(sales * profit_ratio, 2)
+    shipped = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 24 * 60, n_rows), unit="min")
+
+    return pd.DataFrame({
+        "Type": np.array(PAYMENT_TYPES, dtype=object)[rng.integers(0, len(PAYMENT_TYPES), n_rows)],
+        "Days for shipping (real)": real,
+        "Days for shipment (scheduled)": scheduled,
+        "Benefit per order": profit,
+        "Sales per customer": sales,
+        "Delivery Status": np.where(real > scheduled, "Late delivery", np.where(real < scheduled, "Advance shipping", "Shipping on time")),
+        "Late_delivery_risk": (real > scheduled).astype(int),
+        "Category Name": category,
+        "Customer Segment": np.array(SEGMENTS, dtype=object)[rng.choice(3, n_rows, p=[0.52, 0.3, 0.18])],
+        "Department Name": department,
+        "Latitude": np.round(rng.uniform(18.0, 48.5, n_rows), 6),
+        "Longitude": np.round(rng.uniform(-124.0, -67.0, n_rows), 6),
+        "Market": market,
+        "Order Country": country,
+        "Order Item Profit Ratio": profit_ratio,
+        "Sales": sales,
+        "Order Item Total": sales,
+        "Order Profit Per Order": profit,
+        "Order Region": region,
+        "Product Name": product,
+        "shipping date (DateOrders)": shipped.strftime("%m/%d/%Y %H:%M"),
+        "Shipping Mode": modes[mode_index],
+    })
+
+
+def write_orders_csv(path, n_rows, seed=0):
+    make_orders(n_rows, seed).to_csv(path, index=False, encoding="latin-1")
+    return path
+
+
+def make_country_geojson(country_translation):
+    # 🗺️ One square per synthetic country, named like the translated "Order Country" values
+    names = [country_translation.get(c, c) for market in COUNTRIES.values() for c in market]
+    features = []
+    for i, name in enumerate(names):
+        west, south = -170 + (i % 12) * 28, -50 + (i // 12) * 40
+        features.append({
+            "type": "Feature",
+            "id": f"C{i:02d}",
+            "properties": {"name": name},
+            "geometry": {"type": "Polygon", "coordinates": [[[west, south], [west + 20, south], [west + 20, south + 20], [west, south + 20], [west, south]]]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def write_country_geojson(path, translation_file="country_translation.json"):
+    with open(translation_file, "r", encoding="utf-8") as f:
+        country_translation = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_country_geojson(country_translation), f)
+    return path
+
+
+if __name__ == "__main__":
+    # Usage: python synthetic_orders.py <rows> <output.csv> [seed]
+    write_orders_csv(sys.argv[2], int(sys.argv[1]), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
@@ -0,0 +1,46 @@
+import os
+import sys
+import pytest
+
+# The dashboard modules live at the repository root, next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERF_RUN = pytest.StashKey()
+# ⏱️ The perf tests time absolute milliseconds recorded on one machine: they only run when asked for,
+# with `-m perf` (or any -m expression) or DASHBOARD_PERF_TESTS=1, never in a plain `pytest` run
+PERF_TESTS = os.environ.get("DASHBOARD_PERF_TESTS", "0") == "1"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: timing/memory checks against perf_baselines.json")
+
+
+def pytest_collection_modifyitems(config, items):
+    if PERF_TESTS or config.option.markexpr:
+        return
+    deselected = [item for item in items if item.get_closest_marker("perf")]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if not item.get_closest_marker("perf")]
+
+
+@pytest.fixture(scope="session")
+def perf_run(request):
+    # ⏱️ One measuring session for every perf test: contexts and calibration samples are shared
+    from perf_regression import PerfRun, load_baselines, workspace
+    with workspace():
+        run = PerfRun(load_baselines(), os.environ.get("DASHBOARD_PERF_BACKEND", "pandas"))
+        request.config.stash[PERF_RUN] = run
+        yield run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    # 📊 Per-stage diff table against the stored baselines, after the test results
+    run = config.stash.get(PERF_RUN, None)
+    if run is None or not run.results:
+        return
+    terminalreporter.section("performance vs perf_baselines.json")
+    for message in run.warnings():
+        terminalreporter.write_line(message)
+    terminalreporter.write_line(run.summary())
+    terminalreporter.write_line("Refresh after an intended change: python perf_regression.py --update")
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from chart_labels import NO_DATA, NODE_SEP, format_fixed, format_percent, join_lines, treemap_nodes
+
+EDGE_VALUES = [0.0, -0.0, -0.001, 0.004, 0.005, 1.115, 2.675, -2.5, 999.995, 1000.0, -1234567.891, 1e12]
+
+
+@pytest.mark.parametrize("decimals", [0, 1, 2, 3])
+def test_format_fixed_matches_the_f_string(decimals):
+    rng = np.random.default_rng(decimals)
+    values = np.concatenate([EDGE_VALUES, rng.normal(0, 1e4, 5000), np.round(rng.normal(0, 50, 5000), decimals + 1)])
+    expected = [f"{value:,.{decimals}f}" for value in values]
+    assert format_fixed(values, decimals).tolist() == expected
+
+
+def test_missing_values_prefix_and_suffix():
+    values = [np.nan, np.inf, -np.inf, -1234.5, 0.0]
+    assert format_fixed(values, 2, prefix="$", suffix=" days").tolist() == [
+        NO_DATA, NO_DATA, NO_DATA, "-$1,234.50 days", "$0.00 days"]
+    assert format_fixed([np.nan], missing="–").tolist() == ["–"]
+    assert format_percent([0.25, np.nan]).tolist() == ["25.0%", NO_DATA]
+
+
+def test_empty_and_multidimensional_input_keep_their_shape():
+    assert format_fixed([]).shape == (0,)
+    assert format_fixed(np.array([[1.0, 2000.0], [-3.0, np.nan]])).tolist() == [["1.00", "2,000.00"], ["-3.00", NO_DATA]]
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = np.random.default_rng(2)
+    n = 2000
+    return pd.DataFrame({
+        "Department": rng.choice(["Apparel", "Golf", "Fan Shop"], n),
+        "Category": rng.choice(["Cleats", "Balls", "Shirts", "Bags"], n),
+        "Product": rng.choice([f"P{i}" for i in range(12)], n),
+        "total": rng.integers(-3, 6, n).astype(float),
+        "orders": rng.integers(1, 4, n).astype(float),
+        "avg": rng.normal(1.0, 2.0, n),
+    })
+
+
+def test_treemap_nodes_match_a_groupby_per_level(orders):
+    path = ["Department", "Category", "Product"]
+    nodes = treemap_nodes(orders, path, "total", "avg", weight="orders")
+    total = orders["total"].sum()
+
+    for depth in range(1, len(path) + 1):
+        keys = path[:depth]
+        level = nodes[nodes["depth"] == depth]
+        grouped = orders.assign(weighted=orders["orders"] * orders["avg"]).groupby(keys)
+        expected = grouped[["total", "orders", "weighted"]].sum()
+        assert level["id"].tolist() == [NODE_SEP.join(map(str, np.atleast_1d(k))) for k in expected.index]
+        assert level["parent"].tolist() == (
+            [NODE_SEP.join(map(str, np.atleast_1d(k)[:-1])) for k in expected.index] if depth > 1 else [""] * len(level))
+        np.testing.assert_allclose(level["value"], expected["total"])
+        np.testing.assert_allclose(level["color"], expected["weighted"] / expected["orders"])
+        shares = [f"{value / total * 100:,.1f}%" for value in expected["total"]]
+        assert level["text"].tolist() == [
+            f"{label}<br>{value:,.0f}<br>{share}" for label, value, share in zip(level["label"], expected["total"], shares)]
+
+    # Every parent is a node of the level above
+    assert set(nodes.loc[nodes["depth"] > 1, "parent"]) <= set(nodes["id"])
+
+
+def test_treemap_hover_and_default_size(orders):
+    nodes = treemap_nodes(orders, ["Department"], "total", "avg", value_name="Total", color_name="Average")
+    np.testing.assert_array_equal(nodes["size"], nodes["value"])
+    first = nodes.iloc[0]
+    assert first["hover"] == join_lines(
+        [f"<b>{first['label']}</b>"], [f"Total: {first['value']:,.0f} days"], [f"Average: {first['color']:,.2f} days"],
+        [f"Share: {first['value'] / orders['total'].sum() * 100:,.1f}%"])[0]
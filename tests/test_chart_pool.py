@@ -0,0 +1,54 @@
+import threading
+import pytest
+import chart_pool
+
+
+def test_callbacks_run_in_completion_order_on_the_calling_thread():
+    release = [threading.Event() for _ in range(3)]
+    rendered, threads = [], set()
+
+    def job(i):
+        release[i].wait(5)
+        if i + 1 < len(release):
+            release[i + 1].set()  # 0 finishes first, then 1, then 2
+        return i * 10
+
+    def render(name):
+        def callback(result):
+            rendered.append((name, result))
+            threads.add(threading.current_thread().name)
+        return callback
+
+    futures = [chart_pool.submit(job, i) for i in (2, 1, 0)]
+    release[0].set()
+    results = chart_pool.render_as_completed({future: render(f"job{i}") for future, i in zip(futures, (2, 1, 0))})
+
+    assert rendered == [("job0", 0), ("job1", 10), ("job2", 20)]
+    assert threads == {threading.current_thread().name}
+    assert {results[future] for future in futures} == {0, 10, 20}
+
+
+def test_a_failed_job_is_raised_after_the_earlier_charts_are_rendered():
+    rendered, shown = [], threading.Event()
+
+    def fail():
+        shown.wait(5)
+        raise ValueError("no data")
+
+    def render(result):
+        rendered.append(result)
+        shown.set()
+
+    with pytest.raises(ValueError, match="no data"):
+        chart_pool.render_as_completed({chart_pool.submit(lambda: "ok"): render, chart_pool.submit(fail): render})
+    assert rendered == ["ok"]
+
+
+def test_chart_jobs_waiting_on_a_download_do_not_starve_it():
+    # Every chart worker waits on the download: it must still run, on its own pool
+    started = threading.Barrier(chart_pool.CHART_WORKERS + 1)
+    download = chart_pool.submit_io(lambda: (started.wait(5), "geojson")[1])
+    jobs = [chart_pool.submit(lambda: (started.wait(5), download.result(timeout=5))[1])
+            for _ in range(chart_pool.CHART_WORKERS)]
+    results = chart_pool.render_as_completed({job: lambda result: None for job in jobs})
+    assert list(results.values()) == ["geojson"] * chart_pool.CHART_WORKERS
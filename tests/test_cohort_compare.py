@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+import synthetic_orders
+from cohort_compare import cohort_aggregates, cohort_correlations, cohort_labels, cohort_values
+from dataset_registry import normalize_orders
+from date_index import DATE_COLUMN
+from query_backend import PandasBackend, make_selection
+
+PAIRS = [(x, y) for x in ["Days for shipping (real)", "Days for shipment (scheduled)", "Delay"]
+         for y in ["Sales", "Order Profit Per Order", "Profit Margin"]]
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return normalize_orders(synthetic_orders.make_orders(5_000, seed=11))
+
+
+def cohorts_for(df, dimension):
+    values = sorted(cohort_values(df, dimension).dropna().unique().tolist())
+    # Two single-value cohorts and one merged cohort; the last value is left out when there are enough
+    return [(str(values[0]), values[:1]), (str(values[1]), values[1:2]), ("rest", values[2:-1] or values[2:])]
+
+
+def reference_rollup(df, dimension, cohorts):
+    # Plain row-level groupby: every row labelled with its cohort, then the page metrics
+    labels = cohort_labels(cohort_values(df, dimension), [members for _, members in cohorts])
+    names = np.array([name for name, _ in cohorts], dtype=object)
+    rows = df[labels >= 0].assign(Cohort=names[labels[labels >= 0]])
+    metrics = {"total_sales": ("Sales", "sum"), "orders": ("Sales", "count"),
+               "avg_delay_ratio": ("Delay", "mean"), "avg_profit_margin": ("Profit Margin", "mean")}
+    by_segment = rows.groupby(["Cohort", "Customer Segment"], observed=True).agg(**metrics)
+    return by_segment, rows.groupby("Cohort").agg(**metrics)
+
+
+@pytest.mark.parametrize("dimension", ["Market", "Shipping Year", "Shipping Mode", "Customer Segment"])
+def test_rollup_matches_a_row_level_groupby(orders, dimension):
+    cohorts = cohorts_for(orders, dimension) if dimension != "Shipping Year" else [
+        (str(year), [year]) for year in sorted(orders[DATE_COLUMN].dt.year.unique())]
+    by_segment, totals = cohort_aggregates(PandasBackend(orders), make_selection(), dimension, cohorts)
+    expected_by_segment, expected_totals = reference_rollup(orders, dimension, cohorts)
+
+    assert totals["Cohort"].tolist() == [name for name, _ in cohorts]
+    columns = list(expected_totals.columns)
+    pd.testing.assert_frame_equal(totals.set_index("Cohort")[columns], expected_totals.loc[totals["Cohort"]],
+                                  check_dtype=False, check_names=False)
+    result = by_segment.set_index(["Cohort", "Customer Segment"])[columns].sort_index()
+    pd.testing.assert_frame_equal(result, expected_by_segment.sort_index(), check_dtype=False)
+
+
+def test_shipping_year_comes_from_the_derived_columns(orders):
+    # The stored frame has no "Shipping Year": the backends add it with add_derived_columns, and
+    # cohort_values derives it from the date for the page frame
+    assert "Shipping Year" not in orders.columns
+    assert "Shipping Year" in PandasBackend(orders).df.columns
+    pd.testing.assert_series_equal(cohort_values(orders, "Shipping Year"), PandasBackend(orders).df["Shipping Year"],
+                                   check_names=False)
+
+    class RawBackend(PandasBackend):
+        def __init__(self, df):
+            super().__init__(df)
+            self.df = df
+
+    with pytest.raises(KeyError, match="Shipping Year"):
+        cohort_aggregates(RawBackend(orders), make_selection(), "Shipping Year", [("2015", [2015]), ("2016", [2016])])
+
+
+@pytest.mark.parametrize("dimension", ["Market", "Shipping Year", "Type"])
+def test_bincount_correlations_match_groupby_corr(orders, dimension):
+    cohorts = cohorts_for(orders, dimension)
+    names = [name for name, _ in cohorts]
+    labels = cohort_labels(cohort_values(orders, dimension), [members for _, members in cohorts])
+    result = cohort_correlations(orders, labels, names, PAIRS).set_index(["Shipping Measure", "Financial Metric"])
+
+    columns = sorted({col for pair in PAIRS for col in pair})
+    expected = orders[columns][labels >= 0].groupby(labels[labels >= 0]).corr()
+    for i, name in enumerate(names):
+        for x, y in PAIRS:
+            assert result.loc[(x, y), name] == pytest.approx(expected.loc[(i, x), y] * 100, abs=1e-9)
+
+
+def test_correlation_of_a_cohort_without_rows_is_nan(orders):
+    labels = np.zeros(len(orders), dtype=np.int64)
+    result = cohort_correlations(orders, labels, ["all", "empty"], PAIRS[:1])
+    assert np.isfinite(result.loc[0, "all"]) and np.isnan(result.loc[0, "empty"])
@@ -0,0 +1,59 @@
+import gzip
+import io
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+from data_export import available_formats, export_to_file
+
+
+def make_frame(rows=2_500):
+    return pd.DataFrame({
+        "Order Id": range(rows),
+        "Market": pd.Categorical(["Europe", "LATAM"] * (rows // 2) + ["Europe"] * (rows % 2)),
+        "Delay": [i % 7 - 2 for i in range(rows)],
+    })
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_export_is_accepted_by_download_button(fmt):
+    # The deferred download_button callable must return a type Streamlit can turn into bytes
+    data, _ = convert_data_to_bytes_and_infer_mime(export_to_file(make_frame(), fmt, chunk_rows=1_000),
+                                                   TypeError("unsupported"))
+    assert isinstance(data, bytes) and data
+
+
+def test_gzip_csv_round_trip():
+    df = make_frame()
+    data, _ = convert_data_to_bytes_and_infer_mime(export_to_file(df, "CSV (gzip)", chunk_rows=1_000),
+                                                   TypeError("unsupported"))
+    result = pd.read_csv(io.BytesIO(gzip.decompress(data)))
+    assert len(result) == len(df)
+    assert result["Delay"].tolist() == df["Delay"].tolist()
+
+
+def test_parquet_round_trip():
+    pytest.importorskip("pyarrow")
+    df = make_frame()
+    pd.testing.assert_frame_equal(pd.read_parquet(export_to_file(df, "Parquet", chunk_rows=1_000)), df)
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_export_is_written_to_a_file(fmt):
+    # The encoded export lives in a temp file, not in a memory buffer
+    sink = export_to_file(make_frame(), fmt, chunk_rows=1_000)
+    assert isinstance(sink, io.RawIOBase) and sink.fileno() >= 0
+    assert sink.tell() == 0
+
+
+@pytest.mark.parametrize("fmt", ["Arrow IPC", "Parquet"])
+def test_schema_covers_values_after_the_first_chunk(fmt):
+    # The first chunk has only nulls in the object column "Note": its type still comes from the later values
+    pa = pytest.importorskip("pyarrow")
+    df = make_frame().assign(Note=pd.Series([None] * 1_500 + ["late"] * 1_000, dtype=object))
+    data = export_to_file(df, fmt, chunk_rows=1_000).read()
+    if fmt == "Parquet":
+        result = pd.read_parquet(io.BytesIO(data))
+    else:
+        result = pa.ipc.open_stream(data).read_pandas()
+    assert result["Note"].iloc[:1_500].isna().all()
+    assert result["Note"].iloc[1_500:].tolist() == ["late"] * 1_000
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import synthetic_orders
+from data_validation import REASONS_COLUMN, ValidationError, detect_encoding, read_orders_csv, validate_orders
+
+PAGE_COLUMNS = ["Latitude", "Longitude", "Order Country", "Sales", "Order Profit Per Order", "Market", "Customer Segment"]
+
+
+@pytest.fixture
+def orders():
+    return synthetic_orders.make_orders(200, seed=4)
+
+
+def test_valid_orders_pass_and_the_date_column_is_renamed(orders):
+    clean, quarantine, report = validate_orders(orders)
+    assert len(clean) == len(orders) and quarantine.empty
+    assert report["renamed_columns"] == {"shipping date (DateOrders)": "Shipping date (DateOrders)"}
+    assert clean["Shipping date (DateOrders)"].notna().all()
+
+
+def test_page_specific_columns_are_optional(orders):
+    # Page 003 only needs the product columns: a file without coordinates, profit or market is accepted
+    clean, quarantine, report = validate_orders(orders.drop(columns=PAGE_COLUMNS))
+    assert len(clean) == len(orders) and quarantine.empty
+    assert set(PAGE_COLUMNS) <= set(report["missing_optional_columns"])
+
+
+def test_bad_page_values_are_cleared_not_quarantined(orders):
+    orders = orders.astype({"Latitude": object, "Order Profit Per Order": object})
+    orders.loc[0, "Latitude"] = 123.0
+    orders.loc[1, "Latitude"] = "north"
+    orders.loc[2, "Order Profit Per Order"] = None
+    orders.loc[3, "Market"] = "Eur\x00pe"
+    clean, quarantine, report = validate_orders(orders)
+
+    assert len(clean) == len(orders) and quarantine.empty
+    assert np.isnan(clean.loc[0, "Latitude"]) and np.isnan(clean.loc[1, "Latitude"])
+    assert np.isnan(clean.loc[2, "Order Profit Per Order"])
+    assert clean["Market"].isna().sum() == 1
+    assert report["cleared_values"] == {"Latitude out of range": 1, "non-numeric Latitude": 1,
+                                        "invalid text encoding in Market": 1}
+
+
+def test_bad_core_values_are_quarantined(orders):
+    orders.loc[0, "Days for shipping (real)"] = -2
+    orders.loc[1, "Product Name"] = None
+    orders.loc[2, "shipping date (DateOrders)"] = "not a date"
+    clean, quarantine, report = validate_orders(orders)
+
+    assert len(clean) == len(orders) - 3
+    assert quarantine[REASONS_COLUMN].tolist() == [
+        "negative Days for shipping (real)", "missing Product Name", "invalid date in Shipping date (DateOrders)",
+    ]
+    assert report["quarantined_rows"] == 3
+
+
+def test_missing_required_column_stops_ingest(orders):
+    with pytest.raises(ValidationError, match="Product Name"):
+        validate_orders(orders.drop(columns=["Product Name"]))
+
+
+def test_cp1252_smart_quotes_are_not_quarantined(orders):
+    # 0x93/0x94 are quotes in cp1252 but C1 controls in Latin-1
+    orders.loc[0, "Product Name"] = "“Smart” Kettle"
+    data = orders.to_csv(index=False).encode("cp1252")
+    assert detect_encoding(data) == "cp1252"
+
+    clean, quarantine, _ = validate_orders(read_orders_csv(data))
+    assert quarantine.empty
+    assert "“Smart” Kettle" in set(clean["Product Name"])
+
+
+def test_encoding_detection_falls_back_to_latin1():
+    assert detect_encoding("Café".encode("utf-8")) == "utf-8"
+    assert detect_encoding(b"Caf\xe9 \x81") == "latin-1"  # 0x81 is undefined in cp1252
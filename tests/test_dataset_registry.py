@@ -0,0 +1,111 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import dataset_registry
+import synthetic_orders
+from dataset_registry import (MANIFEST, LocalDataset, dataset_id_for, ingest_orders, load_dataset, open_dataset,
+                              open_quarantine, publish, read_orders_csv)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_registry, "DATA_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(dataset_registry, "_dataset_ids", {})
+    return tmp_path / "datasets"
+
+
+def as_stored(df):
+    # Text columns come back as categoricals, everything else as the same NumPy dtype
+    text = [col for col in df.columns if df[col].dtype.kind not in "biufM" and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+    return df.astype({col: "category" for col in text})
+
+
+def in_memory(df):
+    # Memory-mapped codes and values compared as plain arrays
+    return pd.DataFrame({
+        col: pd.Categorical.from_codes(np.array(s.cat.codes), dtype=s.dtype)
+        if isinstance(s.dtype, pd.CategoricalDtype) else np.array(s)
+        for col, s in df.items()
+    })
+
+
+def is_mapped(values):
+    while values is not None and not isinstance(values, np.memmap):
+        values = values.base
+    return values is not None
+
+
+def test_publish_then_open_gives_the_same_frame(data_dir):
+    df, quarantine, report = ingest_orders(synthetic_orders.make_orders(2_000, seed=21))
+    publish("round-trip", df, quarantine, report)
+    loaded = open_dataset("round-trip")
+
+    pd.testing.assert_frame_equal(in_memory(loaded), as_stored(df))
+    for col in loaded.select_dtypes("category"):
+        assert loaded[col].cat.categories.tolist() == as_stored(df)[col].cat.categories.tolist()
+    # Columns are read from the memory-mapped files, not copied
+    assert is_mapped(loaded["Delay"].to_numpy()) and is_mapped(loaded["Market"].cat.codes.to_numpy())
+
+
+def test_categoricals_missing_values_and_dtypes_round_trip(data_dir):
+    df = pd.DataFrame({
+        "size": pd.Categorical(["M", "S", None, "L"], categories=["S", "M", "L"], ordered=True),
+        "code": pd.Categorical([3, 1, 3, 2]),
+        "name": pd.Series(["a", None, "c", "a"], dtype="str"),
+        "flag": [True, False, True, False],
+        "small": np.array([1, -2, 3, 4], dtype=np.int16),
+        "when": pd.to_datetime(["2017-01-01", "2017-01-02", None, "2017-01-04"]),
+    })
+    publish("dtypes", df)
+    loaded = open_dataset("dtypes")
+    pd.testing.assert_frame_equal(in_memory(loaded), as_stored(df))
+    assert loaded["size"].cat.ordered and loaded["size"].isna().tolist() == [False, False, True, False]
+
+
+def test_manifest_and_quarantine_round_trip(data_dir):
+    orders = synthetic_orders.make_orders(500, seed=22)
+    orders.loc[3, "Product Name"] = None
+    df, quarantine, report = ingest_orders(orders)
+    folder = publish("with-quarantine", df, quarantine, report)
+
+    with open(os.path.join(folder, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["rows"] == len(df) and [c["name"] for c in manifest["columns"]] == list(df.columns)
+    assert manifest["validation"] == json.loads(json.dumps(report))
+    stored = open_quarantine("with-quarantine")
+    assert len(stored) == 1 and stored.columns.tolist() == quarantine.columns.tolist()
+    assert open_quarantine("round-trip").empty
+
+
+def test_publishing_again_keeps_the_first_copy(data_dir):
+    df = ingest_orders(synthetic_orders.make_orders(300, seed=23))[0]
+    folder = publish("twice", df)
+    stamp = os.stat(os.path.join(folder, MANIFEST)).st_mtime_ns
+    assert publish("twice", df.iloc[:10]) == folder
+    assert os.stat(os.path.join(folder, MANIFEST)).st_mtime_ns == stamp
+    assert len(open_dataset("twice")) == len(df)
+    assert not [name for name in os.listdir(data_dir) if name.startswith(".")]
+
+
+def test_load_dataset_publishes_once_and_reloads_from_the_registry(data_dir, tmp_path):
+    path = synthetic_orders.write_orders_csv(str(tmp_path / "orders.csv"), 1_000, 24)
+    with open(path, "rb") as f:
+        data = f.read()
+    expected = ingest_orders(read_orders_csv(data))[0]
+
+    first = load_dataset(LocalDataset(path))
+    assert first.attrs == {"dataset_id": dataset_id_for(data), "source": "orders.csv"}
+    pd.testing.assert_frame_equal(in_memory(first), as_stored(expected))
+
+    # A rerun with the same file reuses the dataset id without reading the file again
+    class Unreadable(LocalDataset):
+        def getvalue(self):
+            raise AssertionError("the file was read again")
+
+    again = load_dataset(Unreadable(path))
+    pd.testing.assert_frame_equal(again, first)
+    # Pages change their copy, never the shared mapping
+    again["Delay"] = 0
+    assert not (load_dataset(LocalDataset(path))["Delay"] == 0).all()
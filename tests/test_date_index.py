@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+import synthetic_orders
+from dataset_registry import normalize_orders
+from date_index import DATE_COLUMN, DateIndex, date_range, quarter_range, range_mask, year_ranges
+from query_backend import PandasBackend, make_selection
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return normalize_orders(synthetic_orders.make_orders(5_000, seed=9))
+
+
+def range_sets(df):
+    years = sorted(df[DATE_COLUMN].dt.year.unique())
+    return [
+        year_ranges(years[:1]),
+        year_ranges(years),  # consecutive years: one range
+        year_ranges([years[0], years[-1]]),  # two blocks
+        [quarter_range(years[1], 2), date_range(f"{years[0]}-03-01", f"{years[0]}-03-15")],
+        [date_range("1990-01-01", "1991-01-01")],  # before the data
+        [date_range(f"{years[-1] + 1}-01-01", f"{years[-1] + 2}-01-01")],  # after the data
+    ]
+
+
+def test_rows_match_a_date_mask(orders):
+    index = DateIndex.build(orders[DATE_COLUMN])
+    for ranges in range_sets(orders):
+        rows = index.rows(ranges)
+        expected = np.flatnonzero(range_mask(orders[DATE_COLUMN], ranges))
+        assert np.arange(len(orders))[rows].tolist() == expected.tolist()
+        # One block is a slice (a view of the mapped columns), several are sorted positions
+        assert isinstance(rows, slice) == (len(index.slices(ranges)) <= 1)
+
+
+def test_unsorted_dates_are_not_indexed(orders):
+    shuffled = orders.sample(frac=1.0, random_state=0)
+    assert DateIndex.build(shuffled[DATE_COLUMN]) is None
+    assert DateIndex.build(pd.Series(pd.to_datetime(["2017-01-02", "2017-01-01"]))) is None
+    assert DateIndex.build(pd.Series([], dtype="datetime64[ns]")) is not None
+
+
+def test_backend_falls_back_to_a_mask_for_unsorted_dates(orders):
+    # Same rows whichever way the dates are stored
+    shuffled = orders.sample(frac=1.0, random_state=0)
+    sorted_backend, shuffled_backend = PandasBackend(orders), PandasBackend(shuffled)
+    assert sorted_backend.date_index is not None and shuffled_backend.date_index is None
+    markets = orders["Market"].dropna().unique()[:2]
+    for ranges in range_sets(orders):
+        selection = make_selection(dates=ranges, columns={"Market": markets})
+        expected = sorted_backend.select(selection)
+        result = shuffled_backend.select(selection).sort_index()
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_first_last_and_years(orders):
+    index = DateIndex.build(orders[DATE_COLUMN])
+    assert index.first() == orders[DATE_COLUMN].min() and index.last() == orders[DATE_COLUMN].max()
+    assert index.years() == sorted(orders[DATE_COLUMN].dt.year.unique())
+    assert DateIndex.build(pd.Series([], dtype="datetime64[ns]")).years() == []
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import synthetic_orders
+from dataset_registry import normalize_orders
+from date_index import DATE_COLUMN
+from delay_forecast import fit, refresh, smooth, weekly_sums
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return normalize_orders(synthetic_orders.make_orders(20_000, seed=5))
+
+
+def split(df, weeks_before_end):
+    # Old data stops on a Thursday, so its last week is still filling up when the new data comes in
+    last = df[DATE_COLUMN].max().normalize()
+    cutoff = last - np.timedelta64(7 * weeks_before_end + (last.dayofweek - 3) % 7, "D")
+    return df[df[DATE_COLUMN] < cutoff]
+
+
+def full_smoothing(model):
+    # The state of the model parameters run over the whole history from scratch
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = model.sums / model.counts
+    start = np.full(model.level.shape, np.nan), np.zeros(model.level.shape)
+    prev_level, prev_trend, _, _ = smooth(observed[..., :-1], model.alpha, model.beta, *start)
+    level, trend, _, _ = smooth(observed[..., -1:], model.alpha, model.beta, prev_level, prev_trend)
+    return level, trend, prev_level, prev_trend
+
+
+@pytest.mark.parametrize("weeks_before_end", [0, 1, 6])
+def test_incremental_refresh_equals_a_full_refit(orders, weeks_before_end):
+    old = fit(*weekly_sums(split(orders, weeks_before_end)))
+    new_data = weekly_sums(orders)
+    refreshed = refresh(old, *new_data)
+    refit = fit(*new_data)
+
+    # The incremental path keeps the fitted parameters and only advances the state
+    assert refreshed.alpha is old.alpha and refreshed.beta is old.beta
+    np.testing.assert_array_equal(refreshed.sums, refit.sums)
+    np.testing.assert_array_equal(refreshed.counts, refit.counts)
+    state = (refreshed.level, refreshed.trend, refreshed.prev_level, refreshed.prev_trend)
+    for advanced, from_scratch in zip(state, full_smoothing(refreshed)):
+        np.testing.assert_allclose(advanced, from_scratch, rtol=1e-9, atol=1e-9)
+
+    # Wherever the refit picks the same (alpha, beta), its forecast is the refreshed forecast
+    same = (refit.alpha == refreshed.alpha) & (refit.beta == refreshed.beta)
+    assert same.mean() > 0.5
+    np.testing.assert_allclose(refreshed.forecast()[same], refit.forecast()[same], rtol=1e-9, atol=1e-9)
+
+
+def test_changed_history_is_refitted(orders):
+    old_data = weekly_sums(orders.iloc[1:])
+    new_data = weekly_sums(orders)
+    refreshed = refresh(fit(*old_data), *new_data)
+    refit = fit(*new_data)
+    for name in ("alpha", "beta", "level", "trend"):
+        np.testing.assert_array_equal(getattr(refreshed, name), getattr(refit, name))
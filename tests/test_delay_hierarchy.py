@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+from chart_labels import NODE_SEP
+from delay_hierarchy import HIERARCHY, child_nodes, hierarchy_nodes, node_path, visible_nodes
+
+
+class FrameBackend:
+    # Aggregates a plain frame, derived tables are computed every time
+    def __init__(self, df):
+        self.df = df
+
+    def aggregate(self, selection, by, metrics):
+        return self.df.groupby(by, observed=True).agg(**metrics).reset_index()
+
+    def derive(self, name, selection, compute, *parts):
+        return compute()
+
+
+@pytest.fixture(scope="module")
+def nodes():
+    # "A", "A B" and "A\tB" share a prefix; the tab used to sort before the id separator
+    rows = [
+        ("A", "Cleats", "Boots", 3), ("A", "Cleats", "Studs", -1), ("A", "Shirts", "Tee", 2),
+        ("A B", "Cleats", "Boots", 4), ("A\tB", "Golf", "Balls", 5), ("Z", "Golf\tGear", "Tees", 1),
+    ]
+    df = pd.DataFrame(rows * 2, columns=HIERARCHY + ["Delay"])
+    return hierarchy_nodes(FrameBackend(df), None, tuple(HIERARCHY))
+
+
+def brute_force(nodes, path, depth):
+    focus = NODE_SEP.join(path)
+    inside = [node_id == focus or node_id.startswith(focus + NODE_SEP) for node_id in nodes["id"]]
+    return nodes[np.array(inside) & (nodes["depth"] <= len(path) + depth)]
+
+
+def test_visible_nodes_match_a_prefix_scan(nodes):
+    for node_id in nodes["id"]:
+        path = node_path(node_id)
+        for depth in (1, 2):
+            visible = visible_nodes(nodes, path, depth)
+            assert visible["id"].tolist() == brute_force(nodes, path, depth)["id"].tolist()
+            assert visible["parent"].iat[0] == ""  # the focus is the root of the figure
+
+
+def test_visible_nodes_from_the_top_and_for_a_missing_focus(nodes):
+    assert visible_nodes(nodes, (), 1)["id"].tolist() == nodes.loc[nodes["depth"] == 1, "id"].tolist()
+    assert visible_nodes(nodes, ("Missing",)).empty
+
+
+def test_control_characters_are_kept_out_of_ids(nodes):
+    assert not nodes["id"].str.contains("\t").any()
+    assert "A\tB" in set(nodes["label"])  # labels themselves are shown unchanged
+    assert [node_path(i) for i in child_nodes(nodes, ("Z",))["id"]] == [("Z", "Golf Gear")]
+
+
+def test_share_is_of_the_whole_total(nodes):
+    # Every node shows its share of the whole table, whatever the focused node
+    total = nodes.loc[nodes["depth"] == 1, "value"].sum()
+    leaf = nodes[nodes["id"] == NODE_SEP.join(("A", "Shirts", "Tee"))].iloc[0]
+    assert leaf["text"].endswith(f"<br>{leaf['value'] / total * 100:.1f}%")
+
+
+def test_drill_down_selectbox_focuses_the_picked_node():
+    def app():
+        import pandas as pd
+        from delay_hierarchy import HIERARCHY, show_hierarchy_treemap
+        from test_delay_hierarchy import FrameBackend
+
+        df = pd.DataFrame([("A", "Cleats", "Boots", 3), ("A", "Shirts", "Tee", 2), ("B", "Golf", "Balls", 5)],
+                          columns=HIERARCHY + ["Delay"])
+        show_hierarchy_treemap(FrameBackend(df), None, HIERARCHY, key="tree")
+
+    at = AppTest.from_function(app).run()
+    assert at.selectbox[0].label == "Drill into Department Name"
+    at.selectbox[0].select("A").run()
+    assert at.session_state["tree_path"] == ("A",)
+    assert at.selectbox[0].label == "Drill into Category Name"
+    at.selectbox[0].select(f"A{NODE_SEP}Shirts").run()
+    assert at.session_state["tree_path"] == ("A", "Shirts")
+    assert len(at.selectbox) == 0  # the products are the deepest level
+    assert not at.exception
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+import synthetic_orders
+from dataset_registry import normalize_orders
+from date_index import DATE_COLUMN, range_mask, year_ranges
+from geo_index import GeoIndex, haversine_km, lon_ranges
+from query_backend import PandasBackend, make_selection
+
+# 🧪 **Parity: the grid index must return exactly the rows of a full scan**
+AREAS = [
+    {"bbox": [25.0, -110.0, 40.0, -85.0]},
+    {"bbox": [-10.0, 170.0, 10.0, 190.0]},  # across the antimeridian, east past +180
+    {"bbox": [-10.0, -190.0, 10.0, -170.0]},  # across the antimeridian, west past -180
+    {"bbox": [80.0, -540.0, 95.0, 540.0]},  # zoomed out past the whole world and the pole
+    {"bbox": [0.3, 0.3, 0.7, 0.7]},  # inside a single cell
+    {"center": [35.0, -95.0], "radius_km": 500.0},
+    {"center": [0.0, 179.8], "radius_km": 300.0},  # across the antimeridian
+    {"center": [89.5, 20.0], "radius_km": 400.0},  # covers the north pole
+    {"center": [-88.0, -60.0], "radius_km": 150.0},  # close to the south pole, wide in longitude
+    {"center": [60.0, 10.0], "radius_km": 25_000.0},  # the whole sphere
+]
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(7)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 20_000)))
+    lon = rng.uniform(-180, 180, 20_000)
+    # Dense clusters around the edge cases, plus rows without coordinates
+    lat[:3000] = rng.uniform(85, 90, 3000)
+    lat[3000:6000], lon[3000:6000] = rng.uniform(-5, 5, 3000), rng.choice([-1, 1], 3000) * rng.uniform(178, 180, 3000)
+    lat[6000:6500] = rng.uniform(-90, -86, 500)
+    lat[6500:7000], lon[6500:7000] = rng.uniform(0.2, 0.8, 500), rng.uniform(0.2, 0.8, 500)
+    lat[6000:6100] = np.nan
+    lon[6100:6200] = np.nan
+    return lat, lon
+
+
+def brute_force(lat, lon, area):
+    with np.errstate(invalid="ignore"):
+        if "center" in area:
+            center_lat, center_lon = area["center"]
+            keep = haversine_km(center_lat, center_lon, lat, lon) <= area["radius_km"]
+        else:
+            south, west, north, east = area["bbox"]
+            keep = (lat >= south) & (lat <= north)
+            if east - west < 360:
+                keep &= (lon - west) % 360 <= east - west
+    return np.flatnonzero(keep & np.isfinite(lat) & np.isfinite(lon))
+
+
+@pytest.mark.parametrize("area", AREAS, ids=str)
+def test_query_rows_match_a_full_scan(points, area):
+    lat, lon = points
+    rows = GeoIndex(lat, lon).query_rows(area)
+    np.testing.assert_array_equal(rows, brute_force(lat, lon, area))
+
+
+def test_lon_ranges_stay_inside_the_world():
+    assert lon_ranges(170.0, 190.0) == [(170.0, 180.0), (-180.0, -170.0)]
+    assert lon_ranges(-190.0, -170.0) == [(170.0, 180.0), (-180.0, -170.0)]
+    assert lon_ranges(-200.0, 200.0) == [(-180.0, 180.0)]
+
+
+def test_empty_index_returns_no_rows():
+    assert GeoIndex([], []).query_rows({"bbox": [-90.0, -180.0, 90.0, 180.0]}).size == 0
+
+
+def test_pandas_backend_intersects_area_and_date_rows():
+    df = normalize_orders(synthetic_orders.make_orders(5_000, seed=3))
+    backend = PandasBackend(df)
+    years = sorted(df[DATE_COLUMN].dt.year.unique())
+    lat = pd.to_numeric(df["Latitude"], errors="coerce").to_numpy()
+    lon = pd.to_numeric(df["Longitude"], errors="coerce").to_numpy()
+    for area in AREAS[:1] + AREAS[5:6]:
+        for chosen in ([], years[:1], [years[0], years[-1]]):
+            selected = backend.select(make_selection(years=chosen, area=area))
+            expected = np.zeros(len(df), dtype=bool)
+            expected[brute_force(lat, lon, area)] = True
+            if chosen:
+                expected &= range_mask(df[DATE_COLUMN], year_ranges(chosen))
+            assert selected.index.tolist() == np.flatnonzero(expected).tolist()
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from dashboard002 import build_heatmap, delay_colormap, heat_points
+from delay_kernels import normalize, reusable_buffer
+
+
+def test_heat_points_do_not_alias_the_session_buffer():
+    # The heatmap is built on a pool thread while the next rerun refills the session buffer
+    store = {}
+    df = pd.DataFrame({"Latitude": [30.0, 35.0, 40.0], "Longitude": [-100.0, -95.0, -90.0], "Delay": [-1, 2, 5]})
+    norm_delay = normalize(df["Delay"].to_numpy(), out=reusable_buffer(store, "norm_delay", len(df)))
+    points = heat_points(df, norm_delay)
+
+    normalize(np.array([5, 5, 5]), out=reusable_buffer(store, "norm_delay", len(df)))  # next rerun
+    np.testing.assert_allclose(points[:, 2], [0.0, 0.5, 1.0])
+    assert not np.shares_memory(points, store["norm_delay"])
+
+
+def test_build_heatmap_centers_on_the_points():
+    points = np.array([[30.0, -100.0, 0.0], [40.0, -90.0, 1.0]])
+    m = build_heatmap(points, delay_colormap(0.0, 1.0, ""))
+    assert m.location == [35.0, -95.0]
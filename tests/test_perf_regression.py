@@ -0,0 +1,13 @@
+import pytest
+from perf_regression import DATASETS, STAGES, format_table
+
+# ⏱️ One test per (dataset, stage): fails when the stage is slower or bigger than its baseline in
+# perf_baselines.json beyond the tolerance, measured twice before failing
+pytestmark = pytest.mark.perf
+CASES = [(dataset, stage) for dataset in DATASETS for stage in STAGES]
+
+
+@pytest.mark.parametrize("dataset, stage", CASES, ids=[f"{dataset}-{stage}" for dataset, stage in CASES])
+def test_stage_within_baseline(perf_run, dataset, stage):
+    row = perf_run.check(dataset, stage)
+    assert row["status"] != "REGRESSION", "\n" + format_table([row])
@@ -0,0 +1,67 @@
+import pandas as pd
+from query_backend import make_selection
+from result_cache import CachedBackend, ResultCache
+from result_cache import aggregate_key as cache_key
+
+METRICS = {"avg_delay": ("Delay", "mean")}
+
+
+def aggregate_key(selection, by=("Market",), metrics=METRICS):
+    return cache_key("dataset", selection, by, metrics)
+
+
+def test_different_bboxes_get_different_keys():
+    assert aggregate_key(make_selection(area={"bbox": [10, 20, 30, 40]})) != \
+        aggregate_key(make_selection(area={"bbox": [20, 10, 40, 30]}))
+
+
+def test_swapped_centers_get_different_keys():
+    area = {"radius_km": 100.0}
+    assert aggregate_key(make_selection(area=dict(area, center=[35, 40]))) != \
+        aggregate_key(make_selection(area=dict(area, center=[40, 35])))
+
+
+def test_group_keys_and_metrics_keep_their_order():
+    selection = make_selection()
+    assert aggregate_key(selection, by=["Market", "Order Region"]) != aggregate_key(selection, by=["Order Region", "Market"])
+    assert aggregate_key(selection, metrics={"x": ("Delay", "sum")}) != aggregate_key(selection, metrics={"x": ("sum", "Delay")})
+    assert aggregate_key(selection, metrics={"a": ("Delay", "sum"), "b": ("Delay", "mean")}) != \
+        aggregate_key(selection, metrics={"b": ("Delay", "mean"), "a": ("Delay", "sum")})
+
+
+def test_set_like_selection_fields_ignore_order():
+    assert aggregate_key(make_selection(columns={"Market": ["Europe", "LATAM"]}, not_null=["Latitude", "Longitude"])) == \
+        aggregate_key(make_selection(columns={"Market": ["LATAM", "Europe"]}, not_null=["Longitude", "Latitude"]))
+    assert aggregate_key(make_selection(years=[2015, 2017])) == \
+        aggregate_key(make_selection(dates=list(reversed(make_selection(years=[2015, 2017])["dates"]))))
+
+
+class CountingBackend:
+    def __init__(self):
+        self.calls = 0
+
+    def aggregate(self, selection, by, metrics):
+        self.calls += 1
+        return pd.DataFrame({"area": [repr(selection["area"])]})
+
+
+def test_map_drilldown_areas_do_not_share_cached_aggregates():
+    inner = CountingBackend()
+    backend = CachedBackend(inner, "dataset", ResultCache(disk_dir=None))
+    first = backend.aggregate(make_selection(area={"bbox": [10, 20, 30, 40]}), [], METRICS)
+    second = backend.aggregate(make_selection(area={"bbox": [20, 10, 40, 30]}), [], METRICS)
+    assert inner.calls == 2
+    assert first["area"].iat[0] != second["area"].iat[0]
+
+
+class FrameBackend:
+    def aggregate(self, selection, by, metrics):
+        return pd.DataFrame({name: [i] for i, name in enumerate(metrics)})
+
+
+def test_reordered_metrics_keep_their_column_order():
+    backend = CachedBackend(FrameBackend(), "dataset", ResultCache(disk_dir=None))
+    first = backend.aggregate(make_selection(), [], {"a": ("Delay", "sum"), "b": ("Delay", "mean")})
+    second = backend.aggregate(make_selection(), [], {"b": ("Delay", "mean"), "a": ("Delay", "sum")})
+    assert list(first.columns) == ["a", "b"]
+    assert list(second.columns) == ["b", "a"]
@@ -0,0 +1,64 @@
+import sys
+import types
+import numpy as np
+import pytest
+import dataset_registry
+import risk_model
+import synthetic_orders
+from dataset_registry import normalize_orders
+
+
+@pytest.fixture(scope="module")
+def scored():
+    df = normalize_orders(synthetic_orders.make_orders(3_000, seed=2))
+    return df, risk_model.train(df, iterations=3)
+
+
+def test_small_datasets_are_scored_in_process(scored, monkeypatch):
+    df, model = scored
+    df = df.copy(deep=False)
+    df.attrs["dataset_id"] = "published"
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a pool was started below POOL_MIN_ROWS")
+
+    monkeypatch.setattr(risk_model, "make_pool", no_pool)
+    monkeypatch.setattr(risk_model, "_pool", no_pool)
+    scores = risk_model.score_dataset(model, df, chunk_rows=1_000, workers=4)
+    np.testing.assert_allclose(scores, model.score(df), rtol=1e-6)
+
+
+def test_single_worker_never_uses_the_pool(scored, monkeypatch):
+    df, model = scored
+    df = df.copy(deep=False)
+    df.attrs["dataset_id"] = "published"
+    monkeypatch.setattr(risk_model, "_pool", lambda: pytest.fail("pool used with one worker"))
+    monkeypatch.setattr(risk_model, "RISK_WORKERS", 1)
+    risk_model.score_dataset(model, df, min_rows=0)
+
+
+def test_pool_scores_match_the_in_process_scores(scored, tmp_path, monkeypatch):
+    # The workers map the published columns themselves: the dataset is published where they look
+    df, model = scored
+    data_dir = str(tmp_path / "datasets")
+    monkeypatch.setenv("DASHBOARD_DATA_DIR", data_dir)
+    monkeypatch.setattr(dataset_registry, "DATA_DIR", data_dir)
+    dataset_registry.publish("pooled", df)
+    published = dataset_registry.open_dataset("pooled")
+    published.attrs["dataset_id"] = "pooled"
+
+    in_process = risk_model.score_dataset(model, published, chunk_rows=1_000, workers=1)
+    # Under Streamlit `__main__` is the page script, which spawn would re-run in every worker
+    page = tmp_path / "page.py"
+    page.write_text("raise RuntimeError('the page ran in a worker')\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(page)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    # Scoring in this process now fails: the chunks must come back from the workers
+    monkeypatch.setattr(risk_model.RiskModel, "score", lambda self, rows: pytest.fail("scored in process"))
+    executor = risk_model.make_pool(2)
+    try:
+        pooled = risk_model.score_dataset(model, published, chunk_rows=1_000, workers=2, min_rows=0, executor=executor)
+    finally:
+        executor.shutdown()
+    np.testing.assert_array_equal(pooled, in_process)
@@ -0,0 +1,49 @@
+import re
+import numpy as np
+import pytest
+import snapshot_reports
+import synthetic_orders
+from dashboard002 import delay_colormap
+from snapshot_reports import report_country_map, report_heatmap, write_page
+
+
+@pytest.fixture(scope="module")
+def geojson():
+    return synthetic_orders.make_country_geojson({})
+
+
+def test_report_maps_load_nothing_from_the_network(tmp_path, geojson):
+    # Reports must open offline: no tiles, no CDN script or stylesheet, only ../plotly.min.js
+    names = [feature["properties"]["name"] for feature in geojson["features"]]
+    points = np.array([[30.0, -100.0, 0.0], [40.0, -90.0, 1.0]])
+    sections = [
+        ("map", "heatmap", report_heatmap(points, geojson, delay_colormap(-1.0, 4.0, "Delay"))),
+        ("map", "countries", report_country_map(geojson, {names[0]: 2.0, names[1]: -1.0},
+                                                {names[0]: "2.00", names[1]: "-1.00"}, delay_colormap(-1.0, 2.0, "Delay"))),
+    ]
+    path = tmp_path / "delivery-delays.html"
+    write_page(path, "Delivery Delays", {"name": "All orders"}, sections, "../plotly.min.js")
+
+    page = path.read_text(encoding="utf-8")
+    assert re.findall(r"https?://", page) == []
+    assert re.findall(r'<script src="([^"]+)"', page) == ["../plotly.min.js"]
+    assert '"style":"white-bg"' in page.replace(" ", "")
+
+
+def test_country_map_marks_countries_without_data(geojson):
+    names = [feature["properties"]["name"] for feature in geojson["features"]]
+    fig = report_country_map(geojson, {names[0]: 2.0}, {names[0]: "2.00"}, delay_colormap(0.0, 2.0, ""))
+    missing, known = fig.data
+    assert list(known.locations) == [names[0]]
+    assert set(missing.locations) == set(names[1:])
+
+
+def test_dataset_without_geojson_is_refused(tmp_path, monkeypatch):
+    # Synthetic country shapes are only for synthetic orders, never for a real dataset
+    dataset = synthetic_orders.write_orders_csv(str(tmp_path / "orders.csv"), 100, 0)
+    monkeypatch.delenv("DASHBOARD_GEOJSON_PATH", raising=False)
+    monkeypatch.setenv("DASHBOARD_DATA_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setenv("DASHBOARD_CACHE_DIR", str(tmp_path / "cache"))
+    with pytest.raises(SystemExit) as excinfo:
+        snapshot_reports.main([dataset, "--output", str(tmp_path / "reports")])
+    assert excinfo.value.code == 2